@@ -1,35 +1,132 @@
+import asyncio
+import json
+from typing import Callable, Optional
+
 from starlette.websockets import WebSocket
 
+from clinicApp.app.core.config import settings
+
+# Код закрытия для клиента, который не успевает принимать сообщения.
+SLOW_CLIENT_CLOSE_CODE = 1008
+
+
+def dump_message(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class ClientConnection:
+    """
+    Соединение врача с ограниченной очередью исходящих сообщений.
+    В сокет пишет только собственная задача-писатель, поэтому медленный клиент не задерживает остальных.
+    """
+
+    def __init__(self, websocket: WebSocket, on_failure: Callable[[], None] = lambda: None,
+                 queue_size: int = settings.CHAT_SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._on_failure = on_failure
+        self.writer = asyncio.create_task(self._write())
+
+    async def _write(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await self.websocket.send_text(text)
+            except Exception:
+                # Клиент отключился - очередь больше никто не читает, убираем соединение из рассылки.
+                self._on_failure()
+                return
+
+    def offer(self, text: str) -> bool:
+        """Ставит сообщение в очередь без ожидания; False - очередь переполнена."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def put(self, text: str) -> bool:
+        """Ждёт места в очереди; False - писатель остановлен и сообщение уже не будет отправлено."""
+        if self.writer.done():
+            return False
+        put = asyncio.ensure_future(self.queue.put(text))
+        try:
+            await asyncio.wait({put, self.writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        return not put.cancelled()
+
+    async def close(self, code: int = SLOW_CLIENT_CLOSE_CODE, reason: Optional[str] = None):
+        self.writer.cancel()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
 
 class ConnectionManager:
     def __init__(self):
-        # Хранение активных соединений {department_name: {doctor_id: WebSocket}}
-        self.active_connections: dict[str, dict[int, WebSocket]] = {}
+        # Хранение активных соединений {department_name: {doctor_id: ClientConnection}}
+        self.active_connections: dict[str, dict[int, ClientConnection]] = {}
+        self._closing: set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket, department_name: str, doctor_id: int):
         await websocket.accept()
 
         if department_name not in self.active_connections:
             self.active_connections[department_name] = {}
-        self.active_connections[department_name][doctor_id] = websocket
+        previous = self.active_connections[department_name].get(doctor_id)
+        if previous:
+            previous.writer.cancel()
+        self.active_connections[department_name][doctor_id] = ClientConnection(
+            websocket, lambda: self.disconnect(department_name, doctor_id, websocket)
+        )
 
-    def disconnect(self, department_name: str, doctor_id: int):
-        if department_name in self.active_connections and doctor_id in self.active_connections[department_name]:
-            del self.active_connections[department_name][doctor_id]
-            if not self.active_connections[department_name]:
-                del self.active_connections[department_name]
+    def disconnect(self, department_name: str, doctor_id: int, websocket: Optional[WebSocket] = None):
+        connections = self.active_connections.get(department_name)
+        connection = connections.get(doctor_id) if connections else None
+        # Повторное подключение того же врача заменяет соединение - старый сокет не должен удалить новое.
+        if not connection or (websocket is not None and connection.websocket is not websocket):
+            return
+        connection.writer.cancel()
+        del connections[doctor_id]
+        if not connections:
+            del self.active_connections[department_name]
+
+    async def send_personal(self, data: dict, department_name: str, doctor_id: int) -> bool:
+        # Ждёт места в очереди: так история не переполняет очередь только что подключившегося клиента.
+        # False - соединение уже закрыто или отключено за переполнение, дальше отправлять незачем.
+        connection = self.active_connections.get(department_name, {}).get(doctor_id)
+        if not connection:
+            return False
+        return await connection.put(dump_message(data))
+
+    def _kick(self, department_name: str, doctor_id: int):
+        connection = self.active_connections[department_name][doctor_id]
+        self.disconnect(department_name, doctor_id)
+        task = asyncio.create_task(connection.close(reason="Send queue overflow"))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
 
     async def broadcast(self, message: str, department_name: str, sender_id: int, sender_name: str, timestamp: str):
-        if department_name not in self.active_connections:
+        connections = self.active_connections.get(department_name)
+        if not connections:
             return
 
         message_data = {
             "msg": message,
             "timestamp": timestamp,
             "sender": sender_name,
-            "isSender": False
         }
+        # Сообщение сериализуется дважды на всю рассылку: для отправителя и для остальных.
+        for_others = dump_message({**message_data, "isSender": False})
+        for_sender = dump_message({**message_data, "isSender": True})
 
-        for doctor_id, websocket in self.active_connections[department_name].items():
-            message_data["isSender"] = doctor_id == sender_id
-            await websocket.send_json(message_data)
\ No newline at end of file
+        overflowed = [
+            doctor_id
+            for doctor_id, connection in connections.items()
+            if not connection.offer(for_sender if doctor_id == sender_id else for_others)
+        ]
+        for doctor_id in overflowed:
+            self._kick(department_name, doctor_id)
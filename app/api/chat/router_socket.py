@@ -4,6 +4,7 @@ from sqlalchemy.future import select
 from datetime import datetime
 
 from clinicApp.app.api.chat.clientManager import ConnectionManager
+from clinicApp.app.core.config import settings
 from clinicApp.app.core.database import async_session_maker
 from clinicApp.app.models.models import ChatMessages, Doctors, Users, Departments
 
@@ -34,20 +35,23 @@ async def websocket_endpoint(
         # Подключаем врача к чату его отделения
         await manager.connect(websocket, department_name, doctor_id)
 
-        # Отправляем историю сообщений
+        # Отправляем историю сообщений: последние CHAT_HISTORY_LIMIT, от старых к новым
         messages = await session.execute(
             select(ChatMessages)
             .where(ChatMessages.doctor_id == doctor_id)
-            .order_by(ChatMessages.timestapm.asc())
+            .order_by(ChatMessages.timestapm.desc())
+            .limit(settings.CHAT_HISTORY_LIMIT)
         )
 
-        for msg in messages.scalars():
-            await websocket.send_json({
+        for msg in reversed(messages.scalars().all()):
+            sent = await manager.send_personal({
                 "msg": msg.message,
-                "timestamp": msg.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "timestamp": msg.timestapm.strftime("%Y-%m-%d %H:%M:%S"),
                 "sender": sender_name,
                 "isSender": msg.doctor_id == doctor_id
-            })
+            }, department_name, doctor_id)
+            if not sent:
+                break
 
         # Уведомляем о подключении
         await manager.broadcast(f"{sender_name} присоединился к чату.", department_name, doctor_id, sender_name,
@@ -71,7 +75,7 @@ async def websocket_endpoint(
                 await manager.broadcast(data, department_name, doctor_id, sender_name, timestamp)
 
         except WebSocketDisconnect:
-            manager.disconnect(department_name, doctor_id)
+            manager.disconnect(department_name, doctor_id, websocket)
             await manager.broadcast(f"{sender_name} покинул чат.", department_name, doctor_id, sender_name,
                                     datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
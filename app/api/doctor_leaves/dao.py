@@ -4,6 +4,9 @@ from typing import Optional
 from sqlalchemy import select, delete, and_, or_
 from sqlalchemy.orm import joinedload
 
+from clinicApp.app.api.doctor_leaves.leave_index import leave_index
+from clinicApp.app.api.doctor_leaves.schema import LEAVE_PENDING
+from clinicApp.app.api.search import name_condition, name_rank
 from clinicApp.app.core.database import async_session_maker
 from clinicApp.app.models.models import DoctorLeaves, Doctors, Users
 
@@ -21,11 +24,12 @@ class DoctorLeavesDao:
                 from_date=leave_data.from_date,
                 to_date=leave_data.to_date,
                 reason=leave_data.reason,
-                status="Pending",
+                status=LEAVE_PENDING,
             )
             session.add(new_leave)
             await session.commit()
-            return new_leave
+        await leave_index.refresh(doctor_id)
+        return new_leave
 
     @classmethod
     async def delete_doctor_leave(cls, leave_id: int):
@@ -43,7 +47,8 @@ class DoctorLeavesDao:
                 )
 
                 await session.commit()
-                return leave_id
+        await leave_index.refresh(leave_to_delete.doctor_id)
+        return leave_id
 
     @classmethod
     async def update_doctor_leave_request(cls, leave_id: int, leave_data):
@@ -55,11 +60,26 @@ class DoctorLeavesDao:
                 if not leave_to_update:
                     return None
 
+                old_doctor_id = leave_to_update.doctor_id
                 for key, value in leave_data.dict(exclude_unset=True).items():
                     setattr(leave_to_update, key, value)
 
                 await session.commit()
-                return {"message": "Leave request updated successfully"}
+        # Если заявка перешла к другому врачу, периоды прежнего врача тоже нужно перечитать.
+        for doctor_id in {old_doctor_id, leave_to_update.doctor_id}:
+            await leave_index.refresh(doctor_id)
+        return {"message": "Leave request updated successfully"}
+
+    @classmethod
+    async def set_status(cls, leave_id: int, status: str):
+        async with async_session_maker() as session:
+            async with session.begin():
+                leave = await session.get(cls.model, leave_id)
+                if not leave:
+                    return None
+                leave.status = status
+        await leave_index.refresh(leave.doctor_id)
+        return leave
 
     @classmethod
     async def get_leaves_for_doctor(cls, doctor_id: int):
@@ -96,28 +116,7 @@ class DoctorLeavesDao:
                 filters.append(Doctors._id == doctor_id)
 
             if full_name:
-                name_parts = full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    first_name, last_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{full_name}%")
-                    )
-
-                filters.append(and_(*name_conditions))
+                filters.append(name_condition(full_name))
             if from_date:
                 filters.append(cls.model.from_date >= from_date)
             if to_date:
@@ -130,6 +129,9 @@ class DoctorLeavesDao:
             if filters:
                 query = query.where(and_(*filters))
 
+            if full_name:
+                query = query.order_by(name_rank(full_name).desc())
+
             result = await session.execute(query)
             return result.scalars().all()
 
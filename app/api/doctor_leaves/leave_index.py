@@ -0,0 +1,94 @@
+import asyncio
+from bisect import bisect_right
+from datetime import date
+
+from sqlalchemy import select, func
+
+from clinicApp.app.api.doctor_leaves.schema import LEAVE_APPROVED
+from clinicApp.app.core.changes import changes
+from clinicApp.app.core.database import async_session_maker
+from clinicApp.app.models.models import DoctorLeaves
+
+
+def merge_ranges(ranges) -> tuple[list[date], list[date]]:
+    """Объединяет пересекающиеся и смежные периоды; возвращает отсортированные начала и концы."""
+    starts, ends = [], []
+    for from_date, to_date in sorted(ranges):
+        if ends and from_date.toordinal() <= ends[-1].toordinal() + 1:
+            ends[-1] = max(ends[-1], to_date)
+        else:
+            starts.append(from_date)
+            ends.append(to_date)
+    return starts, ends
+
+
+class LeaveIndex:
+    """
+    Одобренные отпуска врачей в памяти процесса.
+
+    Для каждого врача хранятся непересекающиеся периоды, отсортированные по началу,
+    поэтому проверка "врач в отпуске в этот день" - один бинарный поиск.
+    Изменения заявок через DoctorLeavesDao перечитывают отпуска одного врача в этом процессе
+    и рассылаются остальным процессам через changes.
+    """
+
+    def __init__(self):
+        self._ranges: dict[int, tuple[list[date], list[date]]] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        changes.subscribe("leaves", self._on_change)
+
+    @staticmethod
+    def approved():
+        return func.lower(DoctorLeaves.status) == LEAVE_APPROVED.lower()
+
+    @classmethod
+    def _query(cls):
+        return select(DoctorLeaves.doctor_id, DoctorLeaves.from_date, DoctorLeaves.to_date).where(cls.approved())
+
+    async def load(self):
+        async with async_session_maker() as session:
+            result = await session.execute(self._query())
+            leaves: dict[int, list[tuple[date, date]]] = {}
+            for row in result.all():
+                leaves.setdefault(row.doctor_id, []).append((row.from_date, row.to_date))
+
+        self._ranges = {doctor_id: merge_ranges(ranges) for doctor_id, ranges in leaves.items()}
+        self._loaded = True
+
+    async def ensure_loaded(self):
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    await self.load()
+
+    async def _on_change(self, payload):
+        if payload is None:
+            await self.load()
+        else:
+            await self._reload(int(payload))
+
+    async def refresh(self, doctor_id: int):
+        await self._reload(doctor_id)
+        await changes.publish("leaves", str(doctor_id))
+
+    async def _reload(self, doctor_id: int):
+        async with async_session_maker() as session:
+            result = await session.execute(self._query().where(DoctorLeaves.doctor_id == doctor_id))
+            ranges = [(row.from_date, row.to_date) for row in result.all()]
+
+        if ranges:
+            self._ranges[doctor_id] = merge_ranges(ranges)
+        else:
+            self._ranges.pop(doctor_id, None)
+
+    def is_on_leave(self, doctor_id: int, day: date) -> bool:
+        ranges = self._ranges.get(doctor_id)
+        if not ranges:
+            return False
+        starts, ends = ranges
+        index = bisect_right(starts, day) - 1
+        return index >= 0 and ends[index] >= day
+
+
+leave_index = LeaveIndex()
@@ -4,7 +4,8 @@ from typing import Optional
 from fastapi import APIRouter, Query, HTTPException
 
 from clinicApp.app.api.doctor_leaves.dao import DoctorLeavesDao
-from clinicApp.app.api.doctor_leaves.schema import DoctorLeaveUpdateSchema, DoctorLeaveAddSchema, DoctorLeaveAllSchema
+from clinicApp.app.api.doctor_leaves.schema import DoctorLeaveUpdateSchema, DoctorLeaveAddSchema, DoctorLeaveAllSchema, \
+    LeaveStatus
 
 router = APIRouter(prefix='/doctor_leaves', tags=['Doctor Leaves'])
 
@@ -38,12 +39,19 @@ async def doctor_update_leave(leave_data: DoctorLeaveUpdateSchema, leave_id: int
         raise HTTPException(status_code=404, detail="Заявка не найдена или не может быть обновлена.")
     return {"message": "Заявка редактирована успешно!"}
 
+@router.put("/admin/review", response_model=DoctorLeaveAllSchema, summary="Одобрить или отклонить заявление")
+async def review_leave(status: LeaveStatus = Query(...), leave_id: int = Query(...)):
+    leave = await DoctorLeavesDao.set_status(leave_id, status)
+    if not leave:
+        raise HTTPException(status_code=404, detail="Заявка не найдена.")
+    return leave
+
 @router.get("/admin/leaves/search", response_model=list[DoctorLeaveAllSchema])
 async def search_leaves(
     full_name: Optional[str] = Query(None, description="ФИО врача (например, Иванов Иван Иванович)"),
     from_date: Optional[date] = Query(None, description="Дата начала периода"),
     to_date: Optional[date] = Query(None, description="Дата конца периода"),
-    status: Optional[str] = Query(None, description="Статус отпуска"),
+    status: Optional[LeaveStatus] = Query(None, description="Статус отпуска"),
     reason: Optional[str] = Query(None, description="Причина отпуска"),
 ):
     leaves = await DoctorLeavesDao.search_leaves(None, full_name, from_date, to_date, status, reason)
@@ -1,8 +1,14 @@
 from datetime import date
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, computed_field
 
+# Статусы заявки на отпуск. Слоты скрывает только одобренный отпуск (см. leave_index.py).
+LEAVE_PENDING = "Pending"
+LEAVE_APPROVED = "Approved"
+LEAVE_REJECTED = "Rejected"
+LeaveStatus = Literal["Pending", "Approved", "Rejected"]
+
 
 class DoctorLeaveUpdateSchema(BaseModel):
     _id: int
@@ -10,7 +16,7 @@ class DoctorLeaveUpdateSchema(BaseModel):
     to_date: Optional[date] = None
     leave_type: Optional[str] = None
     reason: Optional[str] = None
-    status: Optional[str] = None
+    status: Optional[LeaveStatus] = None
 
 class DoctorLeaveAddSchema(BaseModel):
     from_date: Optional[date] = None
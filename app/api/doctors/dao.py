@@ -1,31 +1,61 @@
+from collections import Counter
 from datetime import datetime
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select, delete, update, and_, or_
+from sqlalchemy import select, delete, update, and_, or_, func, distinct, insert
 from sqlalchemy.orm import contains_eager, joinedload
 
 from clinicApp.app.api.auth.auth import get_password_hash
 from clinicApp.app.api.dao import BaseDAO
-from clinicApp.app.api.doctors.schemas import DoctorUpdateSchema
+from clinicApp.app.api.doctors.directory import doctor_directory
+from clinicApp.app.api.doctors.schemas import DoctorUpdateSchema, DoctorOnboardSchema
+from clinicApp.app.api.pagination import decode_cursor, encode_cursor, keyset_after, labeled, unflatten
+from clinicApp.app.api.patients.dao import USER_FIELDS, ADDRESS_FIELDS
+from clinicApp.app.api.schedule.cache import schedule_payloads
+from clinicApp.app.core.weekdays import days_mask
+from clinicApp.app.api.search import name_condition, name_rank
+from clinicApp.app.api.talons.availability import slot_availability
+from clinicApp.app.core.cache import TTLCache
+from clinicApp.app.core.config import settings
 from clinicApp.app.core.database import async_session_maker
-from clinicApp.app.models.models import Users, Addresses, Doctors, Education, Talons, Departments
+from clinicApp.app.models.models import Users, Addresses, Doctors, Education, Talons, Departments, Schedules, \
+    Shifts, TALON_DECLINED
+
+# Панель врача: короткий TTL, чтобы множество открытых панелей не умножало нагрузку на базу.
+dashboard_cache = TTLCache(settings.DASHBOARD_CACHE_TTL)
 
 
 class DoctorsDAO(BaseDAO):
     model = Doctors
 
     @classmethod
-    async def get_full_data(cls):
+    async def get_page(cls, limit: int = 100, cursor: Optional[str] = None):
         async with async_session_maker() as session:
             query = (
-                select(cls.model)
-                .options(joinedload(cls.model.users), joinedload(cls.model.addresses),
-                         joinedload(cls.model.departments), joinedload(cls.model.education))
+                select(
+                    cls.model._id,
+                    cls.model.start_date,
+                    cls.model.birthday,
+                    *labeled("users", Users, USER_FIELDS),
+                    *labeled("addresses", Addresses, ADDRESS_FIELDS),
+                    *labeled("departments", Departments, ("department_name",)),
+                )
+                .join(Users, cls.model.user_id == Users._id)
+                .outerjoin(Addresses, cls.model.address_id == Addresses._id)
+                .outerjoin(Departments, cls.model.department_id == Departments._id)
+                .order_by(cls.model._id)
             )
-            result = await session.execute(query)
-            return result.scalars().all()
+            if cursor:
+                query = query.where(keyset_after([cls.model._id], decode_cursor(cursor, int)))
+            else:
+                query = query.add_columns(func.count().over().label("total"))
 
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+            total = None if cursor else (rows[0].total if rows else 0)
+            next_cursor = encode_cursor(rows[limit - 1]._id) if len(rows) > limit else None
+            return {"items": [unflatten(row) for row in rows[:limit]], "next_cursor": next_cursor, "total": total}
 
     @classmethod
     async def get_by_id(cls, doctor_id: int):
@@ -84,7 +114,115 @@ class DoctorsDAO(BaseDAO):
                 session.add(new_doctor)
 
                 await session.commit()
-                return new_doctor
+        await doctor_directory.refresh(new_doctor._id)
+        return new_doctor
+
+    @classmethod
+    async def onboard_doctors(cls, doctors: list[DoctorOnboardSchema]) -> list[dict]:
+        """
+        Массовое добавление врачей с шаблонами расписания: по одному многострочному INSERT на таблицу
+        в одной транзакции. Сгенерированные id возвращаются в порядке входного списка.
+        """
+        logins = [doctor.users.login for doctor in doctors]
+        duplicates = {login for login, count in Counter(logins).items() if count > 1}
+
+        async with async_session_maker() as session:
+            async with session.begin():
+                existing = (await session.execute(select(Users.login).where(Users.login.in_(logins)))).scalars().all()
+                if existing or duplicates:
+                    raise HTTPException(
+                        status_code=409,
+                        detail={"message": "Пользователи уже существуют", "logins": sorted(set(existing) | duplicates)}
+                    )
+                await cls._check_onboard_references(session, doctors)
+
+                user_ids = await cls._insert_returning_ids(session, Users, [
+                    {
+                        "login": doctor.users.login,
+                        "password": get_password_hash(doctor.users.password),
+                        "first_name": doctor.users.first_name,
+                        "last_name": doctor.users.last_name,
+                        "second_name": doctor.users.second_name,
+                        "phone_number": doctor.users.phone_number,
+                        "gender": doctor.users.gender,
+                        "role_id": 2,
+                    }
+                    for doctor in doctors
+                ])
+                address_ids = await cls._insert_returning_ids(session, Addresses, [
+                    {
+                        "country": doctor.addresses.country,
+                        "city": doctor.addresses.city,
+                        "street": doctor.addresses.street,
+                        "house_number": doctor.addresses.house_number,
+                        "flat_number": doctor.addresses.flat_number,
+                    }
+                    for doctor in doctors
+                ])
+                education_ids = await cls._insert_returning_ids(session, Education, [
+                    doctor.education.model_dump(include={"university", "faculty", "speciality"}) for doctor in doctors
+                ])
+                doctor_ids = await cls._insert_returning_ids(session, Doctors, [
+                    {
+                        "start_date": doctor.start_date,
+                        "birthday": doctor.birthday,
+                        "department_id": doctor.department_id,
+                        "user_id": user_id,
+                        "address_id": address_id,
+                        "education_id": education_id,
+                    }
+                    for doctor, user_id, address_id, education_id in zip(doctors, user_ids, address_ids, education_ids)
+                ])
+
+                owners = [index for index, doctor in enumerate(doctors) for _ in doctor.schedules]
+                schedule_ids = await cls._insert_returning_ids(session, Schedules, [
+                    {"doctor_id": doctor_ids[index], "shift_id": schedule.shift_id, "days_mask": days_mask(schedule.days_of_week)}
+                    for index, doctor in enumerate(doctors) for schedule in doctor.schedules
+                ])
+
+        results = [
+            {"index": index, "doctor_id": doctor_id, "user_id": user_id, "schedule_ids": []}
+            for index, (doctor_id, user_id) in enumerate(zip(doctor_ids, user_ids))
+        ]
+        for index, schedule_id in zip(owners, schedule_ids):
+            results[index]["schedule_ids"].append(schedule_id)
+
+        # Один запрос на перезагрузку вместо обновления каждого врача по отдельности.
+        await doctor_directory.load()
+        if schedule_ids:
+            await schedule_payloads.bump()
+            await slot_availability.load()
+        return results
+
+    @staticmethod
+    async def _check_onboard_references(session, doctors: list[DoctorOnboardSchema]):
+        # Неизвестное отделение или смена иначе упали бы на внешнем ключе уже после вставки пользователей.
+        department_ids = {doctor.department_id for doctor in doctors}
+        shift_ids = {schedule.shift_id for doctor in doctors for schedule in doctor.schedules}
+        known_departments = set((await session.execute(
+            select(Departments._id).where(Departments._id.in_(department_ids))
+        )).scalars())
+        known_shifts = set((await session.execute(
+            select(Shifts._id).where(Shifts._id.in_(shift_ids))
+        )).scalars()) if shift_ids else set()
+
+        invalid = [
+            index for index, doctor in enumerate(doctors)
+            if doctor.department_id not in known_departments
+            or any(schedule.shift_id not in known_shifts for schedule in doctor.schedules)
+        ]
+        if invalid:
+            raise HTTPException(
+                status_code=422,
+                detail={"message": "Неизвестное отделение или смена", "indexes": invalid}
+            )
+
+    @staticmethod
+    async def _insert_returning_ids(session, model, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        result = await session.execute(insert(model).returning(model._id, sort_by_parameter_order=True), rows)
+        return list(result.scalars().all())
 
     @classmethod
     async def delete_doctor_by_id(cls, doctor_id: int):
@@ -102,7 +240,9 @@ class DoctorsDAO(BaseDAO):
                 )
 
                 await session.commit()
-                return doctor_id
+        doctor_directory.remove(doctor_id)
+        await schedule_payloads.bump()
+        return doctor_id
 
     @classmethod
     async def update_doctor(cls, doctor_id:int, request: DoctorUpdateSchema):
@@ -147,35 +287,35 @@ class DoctorsDAO(BaseDAO):
 
     @classmethod
     async def get_doctor_dashboard_data(cls, doctor_id: int):
+        return await dashboard_cache.get_or_load(doctor_id, lambda: cls._load_dashboard_data(doctor_id))
+
+    @classmethod
+    async def _load_dashboard_data(cls, doctor_id: int):
         async with async_session_maker() as session:
             today = datetime.now().date()
 
-            total_patients = await session.execute(
-                select(Talons.patient_id).distinct().filter_by(doctor_id=doctor_id)
-            )
-            today_patients = await session.execute(
-                select(Talons).filter_by(doctor_id=doctor_id, date=today)
-            )
-            total_appointments = await session.execute(
-                select(Talons).filter_by(doctor_id=doctor_id)
-            )
+            counts = (await session.execute(
+                select(
+                    func.count(distinct(Talons.patient_id)).label("total_patients"),
+                    func.count().filter(Talons.date == today).label("today_patients"),
+                    func.count().label("total_appointments"),
+                )
+                .filter(Talons.doctor_id == doctor_id)
+            )).one()
             upcoming_appointments = await session.execute(
                 select(Talons)
-                .filter(Talons.doctor_id == doctor_id, Talons.date >= today, Talons.status != "declined")
+                .filter(Talons.doctor_id == doctor_id, Talons.date >= today, Talons.status != TALON_DECLINED)
                 .order_by(Talons.date, Talons.time)
             )
-            today_appointments = await session.execute(
-                select(Talons)
-                .filter(Talons.doctor_id == doctor_id, Talons.date == today, Talons.status != "declined")
-                .order_by(Talons.time)
-            )
+            upcoming_appointments = upcoming_appointments.scalars().all()
 
             return {
-                "total_patients": len(total_patients.scalars().all()),
-                "today_patients": len(today_patients.scalars().all()),
-                "total_appointments": len(total_appointments.scalars().all()),
-                "upcoming_appointments": upcoming_appointments.scalars().all(),
-                "today_appointments": today_appointments.scalars().all(),
+                "total_patients": counts.total_patients,
+                "today_patients": counts.today_patients,
+                "total_appointments": counts.total_appointments,
+                "upcoming_appointments": upcoming_appointments,
+                # Предстоящие талоны отсортированы по дате и времени, сегодняшние идут первыми.
+                "today_appointments": [talon for talon in upcoming_appointments if talon.date == today],
             }
 
     @classmethod
@@ -190,35 +330,18 @@ class DoctorsDAO(BaseDAO):
             filters = []
 
             if full_name:
-                name_parts = full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    first_name, last_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{full_name}%")
-                    )
-
-                filters.append(and_(*name_conditions))
+                filters.append(name_condition(full_name))
 
             if department:
+                query = query.join(Departments, cls.model.department_id == Departments._id)
                 filters.append(Departments.department_name.ilike(f"%{department}%"))
 
             if filters:
                 query = query.where(and_(*filters))
 
+            if full_name:
+                query = query.order_by(name_rank(full_name).desc())
+
             result = await session.execute(query)
             return result.scalars().all()
 
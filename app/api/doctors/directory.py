@@ -0,0 +1,110 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Optional
+
+from sqlalchemy import select
+
+from clinicApp.app.core.database import async_session_maker
+from clinicApp.app.models.models import Doctors, Users, Departments
+
+
+def normalize(value: Optional[str]) -> str:
+    return (value or "").casefold().replace("ё", "е")
+
+
+class DoctorDirectory:
+    """
+    Справочник врачей в памяти процесса для автодополнения.
+
+    Префиксный индекс - отсортированный список пар (токен, doctor_id), где токены - слова
+    нормализованных ФИО и названия отделения; префикс ищется бинарным поиском.
+    Загружается целиком при старте и обновляется по одному врачу при изменениях через DoctorsDAO.
+    """
+
+    def __init__(self):
+        self._doctors: dict[int, dict] = {}
+        self._tokens: list[tuple[str, int]] = []
+
+    @staticmethod
+    def _query():
+        return (
+            select(Doctors._id, Users.last_name, Users.first_name, Users.second_name, Departments.department_name)
+            .join(Users, Doctors.user_id == Users._id)
+            .outerjoin(Departments, Doctors.department_id == Departments._id)
+        )
+
+    @staticmethod
+    def _entry(row) -> dict:
+        return {
+            "doctor_id": row._id,
+            "last_name": row.last_name,
+            "first_name": row.first_name,
+            "second_name": row.second_name,
+            "department": row.department_name,
+        }
+
+    @staticmethod
+    def _tokens_of(entry: dict) -> set[str]:
+        text = " ".join(
+            normalize(entry[field]) for field in ("last_name", "first_name", "second_name", "department")
+        )
+        return set(text.split())
+
+    async def load(self):
+        async with async_session_maker() as session:
+            result = await session.execute(self._query())
+            doctors = {row._id: self._entry(row) for row in result.all()}
+
+        self._doctors = doctors
+        self._tokens = sorted(
+            (token, doctor_id) for doctor_id, entry in doctors.items() for token in self._tokens_of(entry)
+        )
+
+    async def refresh(self, doctor_id: int):
+        async with async_session_maker() as session:
+            result = await session.execute(self._query().where(Doctors._id == doctor_id))
+            row = result.one_or_none()
+
+        self.remove(doctor_id)
+        if row:
+            entry = self._entry(row)
+            self._doctors[doctor_id] = entry
+            for token in self._tokens_of(entry):
+                insort(self._tokens, (token, doctor_id))
+
+    def remove(self, doctor_id: int):
+        entry = self._doctors.pop(doctor_id, None)
+        if not entry:
+            return
+        for token in self._tokens_of(entry):
+            index = bisect_left(self._tokens, (token, doctor_id))
+            if index < len(self._tokens) and self._tokens[index] == (token, doctor_id):
+                del self._tokens[index]
+
+    def _match(self, prefix: str) -> set[int]:
+        matched = set()
+        for index in range(bisect_left(self._tokens, (prefix,)), len(self._tokens)):
+            token, doctor_id = self._tokens[index]
+            if not token.startswith(prefix):
+                break
+            matched.add(doctor_id)
+        return matched
+
+    def autocomplete(self, query: str, limit: int = 10) -> list[dict]:
+        # Каждое слово запроса должно быть префиксом какого-либо слова ФИО или отделения.
+        doctor_ids = None
+        for term in normalize(query).split():
+            matched = self._match(term)
+            doctor_ids = matched if doctor_ids is None else doctor_ids & matched
+            if not doctor_ids:
+                return []
+        if doctor_ids is None:
+            return []
+        return heapq.nsmallest(
+            limit,
+            (self._doctors[doctor_id] for doctor_id in doctor_ids),
+            key=lambda entry: (normalize(entry["last_name"]), normalize(entry["first_name"]), entry["doctor_id"]),
+        )
+
+
+doctor_directory = DoctorDirectory()
@@ -8,16 +8,25 @@ from clinicApp.app.api.auth.dao import UsersDAO
 from clinicApp.app.api.doctor_leaves.dao import DoctorLeavesDao
 from clinicApp.app.api.doctor_leaves.schema import DoctorLeaveAllSchema
 from clinicApp.app.api.doctors.dao import DoctorsDAO
-from clinicApp.app.api.doctors.schemas import DoctorResponseSchema, DoctorUpdateSchema, DoctorDashboardSchema
+from clinicApp.app.api.doctors.directory import doctor_directory
+from clinicApp.app.api.doctors.schemas import DoctorResponseSchema, DoctorListSchema, DoctorUpdateSchema, DoctorDashboardSchema, \
+    DoctorSuggestionSchema, DoctorOnboardSchema, DoctorOnboardResult
 from clinicApp.app.api.medical_cards.dao import MedicalCardsDAO
-from clinicApp.app.api.medical_cards.schema import MedicalCardResponseSchema
+from clinicApp.app.api.medical_cards.schema import MedicalCardTimelineSchema
+from clinicApp.app.api.pagination import Page
+from clinicApp.app.api.schedule.cache import schedule_payloads
 
 router = APIRouter(prefix='/doctors', tags=['doctor'])
 
-@router.get("/", summary="Получить всех врачей", response_model=list[DoctorResponseSchema])
-async def get_all_doctors():
-    doctors= await DoctorsDAO.get_full_data()
-    return doctors
+MAX_ONBOARD_DOCTORS = 5000
+
+@router.get("/", summary="Получить всех врачей", response_model=Page[DoctorListSchema])
+async def get_all_doctors(limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    return await DoctorsDAO.get_page(limit, cursor)
+
+@router.get("/autocomplete", summary="Подсказки врачей по началу ФИО или отделения", response_model=list[DoctorSuggestionSchema])
+async def autocomplete_doctors(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    return doctor_directory.autocomplete(q, limit)
 
 @router.get('/get_data', summary="Получить врача по id", response_model=DoctorResponseSchema)
 async def get_doctor(doctor_id: int = Query(...)):
@@ -41,6 +50,14 @@ async def add_doctor(doctor_data: DoctorUpdateSchema) -> dict:
     await DoctorsDAO.add_doctor(doctor_data)
     return {"message": "Врач успешно добавлен!"}
 
+@router.post('/onboard', response_model=list[DoctorOnboardResult], summary='Массовое добавление врачей с расписанием')
+async def onboard_doctors(doctors: list[DoctorOnboardSchema]):
+    if not doctors:
+        return []
+    if len(doctors) > MAX_ONBOARD_DOCTORS:
+        raise HTTPException(status_code=422, detail=f"Не более {MAX_ONBOARD_DOCTORS} врачей за один запрос")
+    return await DoctorsDAO.onboard_doctors(doctors)
+
 @router.delete("/delete")
 async def dell_student_by_id(doctor_id: int = Query(...)) -> dict:
     check = await DoctorsDAO.delete_doctor_by_id(doctor_id=doctor_id)
@@ -62,15 +79,17 @@ async def update_doctors(data: DoctorUpdateSchema, doctor_id: int = Query(...))
     if data.education and education_id:
         await DoctorsDAO.update_education(education_id, data.education.model_dump(exclude_unset=True))
 
+    await doctor_directory.refresh(doctor_id)
+    await schedule_payloads.bump()
     return {"message": "Данные врача успешно обновлены"}
 
 @router.get("/dashboard", response_model=DoctorDashboardSchema)
 async def doctor_dashboard(doctor_id: int = Query(...)):
     return await DoctorsDAO.get_doctor_dashboard_data(int(doctor_id))
 
-@router.get("/patientsCards",  response_model=list[MedicalCardResponseSchema], summary='Список всех его записей в картах его пациентов')
-async def get_patient_cards(doctor_id: int = Query(...)):
-    return await MedicalCardsDAO.get_cards_for_doctor(doctor_id)
+@router.get("/patientsCards", response_model=Page[MedicalCardTimelineSchema], summary='Его записи в картах его пациентов, от новых к старым')
+async def get_patient_cards(doctor_id: int = Query(...), limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None):
+    return await MedicalCardsDAO.get_cards_for_doctor(doctor_id, limit, cursor)
 
 @router.get("/leaves/search", response_model=list[DoctorLeaveAllSchema])
 async def search_leaves(
@@ -1,9 +1,10 @@
 from datetime import date
 from typing import Optional, List
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 
-from clinicApp.app.schemas.schemas import BaseSchema, UserSchema, AddressSchema, DepartmentSchema, EducationSchema, TalonSchema
+from clinicApp.app.core.weekdays import normalize_days
+from clinicApp.app.schemas.schemas import BaseSchema, UserSchema, UserListSchema, AddressSchema, DepartmentSchema, EducationSchema, TalonSchema
 
 
 class DoctorResponseSchema(BaseModel):
@@ -15,6 +16,23 @@ class DoctorResponseSchema(BaseModel):
     departments: DepartmentSchema
 
 
+class DoctorListSchema(BaseModel):
+    _id: int
+    start_date: date
+    birthday: date
+    users: UserListSchema
+    addresses: Optional[AddressSchema] = None
+    departments: Optional[DepartmentSchema] = None
+
+
+class DoctorSuggestionSchema(BaseModel):
+    doctor_id: int
+    last_name: str
+    first_name: str
+    second_name: Optional[str] = None
+    department: Optional[str] = None
+
+
 class UserUpdateSchema(BaseModel):
     login: Optional[EmailStr] = None
     password: Optional[str] = None
@@ -47,6 +65,32 @@ class DoctorUpdateSchema(BaseSchema):
     addresses: Optional[AddressUpdateSchema] = None
     education: Optional[EducationUpdateSchema] =None
 
+class ScheduleTemplateSchema(BaseModel):
+    shift_id: int
+    days_of_week: List[str]
+
+    @field_validator('days_of_week')
+    def validate_days_of_week(cls, value):
+        return normalize_days(value)
+
+
+class DoctorOnboardSchema(BaseModel):
+    start_date: date
+    birthday: date
+    department_id: int
+    users: UserSchema
+    addresses: AddressSchema
+    education: EducationSchema
+    schedules: List[ScheduleTemplateSchema] = []
+
+
+class DoctorOnboardResult(BaseModel):
+    index: int
+    doctor_id: int
+    user_id: int
+    schedule_ids: List[int]
+
+
 class DoctorDashboardSchema(BaseModel):
     total_patients: int
     today_patients: int
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Слабые метки (W/"...") сравниваются как сильные - для GET это допустимо.
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional_json(request: Request, etag: str, body: bytes) -> Response:
+    """Ответ с ETag; если клиент прислал совпадающий If-None-Match, отдаётся 304 без тела."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
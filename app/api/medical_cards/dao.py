@@ -1,7 +1,11 @@
+from datetime import date
 from typing import Optional
 
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, and_, func, literal_column
+from sqlalchemy.orm import aliased
 
+from clinicApp.app.api.pagination import decode_cursor, encode_cursor, keyset_after
+from clinicApp.app.api.search import name_condition, name_rank
 from clinicApp.app.core.database import async_session_maker
 from clinicApp.app.models.models import MedicalCards, Patients, Doctors, Users
 
@@ -27,33 +31,84 @@ class MedicalCardsDAO:
 
 
     @classmethod
-    async def get_cards_for_doctor(cls, doctor_id: int):
-        async with async_session_maker() as session:
-            query = (
-                select(Users.first_name, Users.last_name, MedicalCards.date, MedicalCards._id)
-                .join(MedicalCards, Patients._id == MedicalCards.patient_id)
-                .join(Users, Users._id == Patients.user_id)
-                .join(Doctors, MedicalCards.doctor_id == Doctors._id)
-                .filter(Doctors._id == doctor_id)
-                .order_by(MedicalCards.date.desc())
+    def timeline_query(cls):
+        """Проекция записей карты с ФИО пациента и врача, от новых к старым; условия добавляет вызывающий."""
+        PatientUser = aliased(Users, name="patient_user")
+        DoctorUser = aliased(Users, name="doctor_user")
+        return (
+            select(
+                MedicalCards._id.label("card_id"),
+                MedicalCards.date,
+                MedicalCards.complaints,
+                MedicalCards.wellness_check,
+                MedicalCards.diagnosis,
+                MedicalCards.patient_id,
+                PatientUser.first_name.label("patient_first_name"),
+                PatientUser.last_name.label("patient_last_name"),
+                PatientUser.second_name.label("patient_second_name"),
+                MedicalCards.doctor_id,
+                DoctorUser.first_name.label("doctor_first_name"),
+                DoctorUser.last_name.label("doctor_last_name"),
+                DoctorUser.second_name.label("doctor_second_name"),
             )
-            result = await session.execute(query)
-            return result.scalars().all()
+            .join(Patients, MedicalCards.patient_id == Patients._id)
+            .join(PatientUser, Patients.user_id == PatientUser._id)
+            .join(Doctors, MedicalCards.doctor_id == Doctors._id)
+            .join(DoctorUser, Doctors.user_id == DoctorUser._id)
+            .order_by(MedicalCards.date.desc(), MedicalCards._id.desc())
+        )
+
+    @classmethod
+    async def _timeline_page(cls, condition, limit: int, cursor: Optional[str]):
+        # Индексы (doctor_id, date, _id) и (patient_id, date, _id) читаются в обратном порядке.
+        async with async_session_maker() as session:
+            query = cls.timeline_query().where(condition)
+            if cursor:
+                after = decode_cursor(cursor, date.fromisoformat, int)
+                query = query.where(keyset_after([MedicalCards.date, MedicalCards._id], after, descending=True))
+
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+            next_cursor = encode_cursor(rows[limit - 1].date, rows[limit - 1].card_id) if len(rows) > limit else None
+            return {"items": [row._asdict() for row in rows[:limit]], "next_cursor": next_cursor}
 
+    @classmethod
+    async def get_cards_for_doctor(cls, doctor_id: int, limit: int = 50, cursor: Optional[str] = None):
+        return await cls._timeline_page(MedicalCards.doctor_id == doctor_id, limit, cursor)
+
+    @classmethod
+    async def get_cards_for_patient(cls, patient_id: int, limit: int = 50, cursor: Optional[str] = None):
+        return await cls._timeline_page(MedicalCards.patient_id == patient_id, limit, cursor)
 
     @classmethod
-    async def get_cards_for_patient(cls,patient_id: int):
+    async def full_text_search(cls, phrase: str, from_date: Optional[date] = None, to_date: Optional[date] = None,
+            doctor_id: Optional[int] = None, patient_id: Optional[int] = None, limit: int = 20, offset: int = 0):
+        # Запрос разбирается обеими конфигурациями, как и search_vector; синтаксис как у поисковиков.
+        ts_query = (
+            func.websearch_to_tsquery(literal_column("'russian'::regconfig"), phrase)
+            .op("||")(func.websearch_to_tsquery(literal_column("'english'::regconfig"), phrase))
+        )
+        rank = func.ts_rank_cd(MedicalCards.search_vector, ts_query)
+
+        query = (
+            cls.timeline_query()
+            .add_columns(rank.label("rank"))
+            .where(MedicalCards.search_vector.op("@@")(ts_query))
+            .order_by(None)
+            .order_by(rank.desc(), MedicalCards.date.desc(), MedicalCards._id.desc())
+        )
+        if from_date:
+            query = query.where(MedicalCards.date >= from_date)
+        if to_date:
+            query = query.where(MedicalCards.date <= to_date)
+        if doctor_id is not None:
+            query = query.where(MedicalCards.doctor_id == doctor_id)
+        if patient_id is not None:
+            query = query.where(MedicalCards.patient_id == patient_id)
+
         async with async_session_maker() as session:
-            query = (
-                select(Users.first_name, Users.last_name, MedicalCards.date, MedicalCards._id)
-                .join(Patients, Users._id == Patients.user_id)
-                .join(MedicalCards, Patients._id == MedicalCards.patient_id)
-                .join(Doctors, MedicalCards.doctor_id == Doctors._id)
-                .where(Patients._id == patient_id)
-                .order_by(MedicalCards.date.desc())
-            )
-            result = await session.execute(query)
-            return result.scalars().all()
+            result = await session.execute(query.limit(limit).offset(offset))
+            return [row._asdict() for row in result.all()]
 
     @classmethod
     async def get_medical_record_by_id(cls,record_id: int):
@@ -70,67 +125,36 @@ class MedicalCardsDAO:
     @classmethod
     async def search(cls, doctor_full_name: Optional[str], patient_full_name: Optional[str]):
         async with async_session_maker() as session:
+            PatientUser = aliased(Users, name="patient_user")
+            DoctorUser = aliased(Users, name="doctor_user")
             query = (
-                select(Users.first_name, Users.last_name, MedicalCards.date, MedicalCards._id)
-                .join(Patients, Users._id == Patients.user_id)
+                select(PatientUser.first_name, PatientUser.last_name, MedicalCards.date, MedicalCards._id)
+                .join(Patients, PatientUser._id == Patients.user_id)
                 .join(MedicalCards, Patients._id == MedicalCards.patient_id)
                 .join(Doctors, MedicalCards.doctor_id == Doctors._id)
+                .join(DoctorUser, Doctors.user_id == DoctorUser._id)
             )
 
             filters = []
 
             if doctor_full_name:
-                name_parts = doctor_full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    last_name, first_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{doctor_full_name}%")
-                    )
-                filters.append(and_(*name_conditions))
+                filters.append(name_condition(doctor_full_name, DoctorUser))
 
             if patient_full_name:
-                name_parts = patient_full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    last_name, first_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{patient_full_name}%")
-                    )
-                filters.append(and_(*name_conditions))
-
-                if filters:
-                    query = query.where(and_(*filters))
-
-                query=query.order_by(MedicalCards.date.desc())
+                filters.append(name_condition(patient_full_name, PatientUser))
+
+            if filters:
+                query = query.where(and_(*filters))
+
+            # Сначала самые похожие ФИО, как в поиске врачей и пациентов; при равной близости - новые записи.
+            ranks = [
+                name_rank(full_name, users)
+                for full_name, users in ((doctor_full_name, DoctorUser), (patient_full_name, PatientUser))
+                if full_name
+            ]
+            query = query.order_by(*[rank.desc() for rank in ranks], MedicalCards.date.desc())
             result = await session.execute(query)
-            return result.scalars().all()
+            return result.all()
 
 
     # @classmethod
@@ -1,6 +1,10 @@
+from datetime import date
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 from clinicApp.app.api.medical_cards.dao import MedicalCardsDAO
+from clinicApp.app.api.medical_cards.schema import MedicalCardSearchSchema
 from clinicApp.app.schemas.schemas import MedicalCardSchema
 
 router = APIRouter(prefix='/medical_card', tags=['Medical Card'])
@@ -16,4 +20,14 @@ async def medical_record_doctor(record_id: int = Query(...)):
 async def add_note(note: MedicalCardSchema, doctor_id: int = Query(...)):
     return await MedicalCardsDAO.add_medical_record(doctor_id, note)
 
-
+@router.get("/search", response_model=list[MedicalCardSearchSchema], summary="Полнотекстовый поиск по жалобам, осмотру и диагнозу")
+async def search_medical_records(
+    q: str = Query(..., min_length=2, description="Симптомы или диагноз; поддерживаются \"фразы\", OR и -исключения"),
+    from_date: Optional[date] = Query(None, description="Дата записи не раньше"),
+    to_date: Optional[date] = Query(None, description="Дата записи не позже"),
+    doctor_id: Optional[int] = Query(None),
+    patient_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+):
+    return await MedicalCardsDAO.full_text_search(q, from_date, to_date, doctor_id, patient_id, limit, offset)
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -11,6 +12,21 @@ class MedicalCardResponseSchema(BaseModel):
     date: date
 
 
-
-
-
+class MedicalCardTimelineSchema(BaseModel):
+    card_id: int
+    date: date
+    complaints: str
+    wellness_check: str
+    diagnosis: str
+    patient_id: int
+    patient_first_name: str
+    patient_last_name: str
+    patient_second_name: Optional[str] = None
+    doctor_id: int
+    doctor_first_name: str
+    doctor_last_name: str
+    doctor_second_name: Optional[str] = None
+
+
+class MedicalCardSearchSchema(MedicalCardTimelineSchema):
+    rank: float
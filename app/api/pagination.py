@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import date, time
+from typing import Generic, Optional, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import and_, tuple_
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+    # Общее число записей - только на первой странице, чтобы дальние страницы не пересчитывали всю выборку.
+    total: Optional[int] = None
+
+
+def encode_cursor(*values) -> str:
+    raw = [value.isoformat() if isinstance(value, (date, time)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """Разбирает курсор из encode_cursor; types - конструкторы значений, например date.fromisoformat, int."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(raw) != len(types):
+            raise ValueError(cursor)
+        return [convert(value) for convert, value in zip(types, raw)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def keyset_after(columns: list, values: list, descending: bool = False):
+    """
+    Условие "строка после курсора" для сортировки по columns (все по возрастанию или все по убыванию).
+    Первая колонка дополнительно ограничена отдельным сравнением: по сравнению кортежей Postgres
+    не отсекает секции таблицы, секционированной по этой колонке (talons и medical_cards - по date).
+    """
+    if descending:
+        return and_(columns[0] <= values[0], tuple_(*columns) < tuple_(*values))
+    return and_(columns[0] >= values[0], tuple_(*columns) > tuple_(*values))
+
+
+def labeled(prefix: str, model, fields) -> list:
+    """Колонки model с метками вида "prefix__field" для сборки вложенного ответа через unflatten."""
+    return [getattr(model, field).label(f"{prefix}__{field}") for field in fields]
+
+
+def unflatten(row) -> dict:
+    data = {}
+    for key, value in row._mapping.items():
+        prefix, _, field = key.rpartition("__")
+        (data.setdefault(prefix, {}) if prefix else data)[field] = value
+    # Группа из LEFT JOIN без совпадения становится None, а не словарём из None.
+    return {
+        key: None if isinstance(value, dict) and all(item is None for item in value.values()) else value
+        for key, value in data.items()
+    }
@@ -1,31 +1,66 @@
+from datetime import date
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select, delete, update, and_, or_
+from sqlalchemy import select, delete, update, and_, or_, func, insert, text, type_coerce
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import contains_eager, joinedload
 
 from clinicApp.app.api.auth.auth import get_password_hash
 from clinicApp.app.api.dao import BaseDAO
+from clinicApp.app.api.medical_cards.dao import MedicalCardsDAO
+from clinicApp.app.api.patients.importer import ImportReport
+from clinicApp.app.api.pagination import decode_cursor, encode_cursor, keyset_after, labeled, unflatten
+from clinicApp.app.api.search import name_condition, name_rank
 from clinicApp.app.api.patients.schemas import PatientCreateSchema, PatientUpdateSchema
 from clinicApp.app.core.database import async_session_maker
-from clinicApp.app.models.models import Patients, Users, Addresses
+from clinicApp.app.models.models import Patients, Users, Addresses, MedicalCards, Talons, TALON_DECLINED
+
+USER_FIELDS = ("login", "first_name", "last_name", "second_name", "phone_number", "gender", "role_id")
+ADDRESS_FIELDS = ("country", "city", "street", "house_number", "flat_number")
+IMPORT_BATCH_SIZE = 1000
+CHART_USER_FIELDS = ("login", "first_name", "last_name", "second_name", "phone_number", "gender")
+CHART_CARDS_LIMIT = 20
+CHART_HISTORY_LIMIT = 20
+CHART_UPCOMING_LIMIT = 50
+
+
+def json_rows(rows, *order_by):
+    """Скалярный подзапрос: все строки подзапроса rows одним JSON-массивом в порядке order_by."""
+    array = func.coalesce(func.json_agg(aggregate_order_by(rows.table_valued(), *order_by)), text("'[]'::json"))
+    return type_coerce(select(array).scalar_subquery(), JSON)
 
 
 class PatientsDAO(BaseDAO):
     model = Patients
 
     @classmethod
-    async def get_full_data(cls):
+    async def get_page(cls, limit: int = 100, cursor: Optional[str] = None):
         async with async_session_maker() as session:
             query = (
-                select(cls.model)
-                .options(joinedload(cls.model.users), joinedload(cls.model.addresses))
+                select(
+                    cls.model._id,
+                    cls.model.b_date,
+                    *labeled("users", Users, USER_FIELDS),
+                    *labeled("addresses", Addresses, ADDRESS_FIELDS),
+                )
+                .join(Users, cls.model.user_id == Users._id)
+                .outerjoin(Addresses, cls.model.address_id == Addresses._id)
+                .order_by(cls.model._id)
             )
-            result = await session.execute(query)
-            return result.scalars().all()
+            if cursor:
+                query = query.where(keyset_after([cls.model._id], decode_cursor(cursor, int)))
+            else:
+                query = query.add_columns(func.count().over().label("total"))
 
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+            total = None if cursor else (rows[0].total if rows else 0)
+            next_cursor = encode_cursor(rows[limit - 1]._id) if len(rows) > limit else None
+            return {"items": [unflatten(row) for row in rows[:limit]], "next_cursor": next_cursor, "total": total}
 
     @classmethod
     async def get_by_id(cls, patient_id: int):
@@ -38,6 +73,56 @@ class PatientsDAO(BaseDAO):
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
+    @classmethod
+    async def get_chart(cls, patient_id: int, cards_limit: int = CHART_CARDS_LIMIT,
+            history_limit: int = CHART_HISTORY_LIMIT, upcoming_limit: int = CHART_UPCOMING_LIMIT):
+        """
+        Карта пациента за один запрос к БД: пациент, пользователь и адрес - колонками,
+        последние записи в карте, будущие талоны и история визитов - вложенными JSON-массивами.
+        """
+        today = date.today()
+        talon_columns = (
+            Talons._id.label("talon_id"), Talons.date, Talons.time, Talons.status, Talons.doctor_id, Talons.service_id,
+        )
+        cards = (
+            MedicalCardsDAO.timeline_query()
+            .where(MedicalCards.patient_id == patient_id)
+            .limit(cards_limit)
+            .subquery("cards")
+        )
+        upcoming = (
+            select(*talon_columns)
+            .where(Talons.patient_id == patient_id, Talons.date >= today, Talons.status != TALON_DECLINED)
+            .order_by(Talons.date, Talons.time)
+            .limit(upcoming_limit)
+            .subquery("upcoming")
+        )
+        history = (
+            select(*talon_columns)
+            .where(Talons.patient_id == patient_id, Talons.date < today)
+            .order_by(Talons.date.desc(), Talons.time.desc())
+            .limit(history_limit)
+            .subquery("history")
+        )
+
+        query = (
+            select(
+                cls.model._id.label("patient_id"),
+                cls.model.b_date,
+                *labeled("users", Users, CHART_USER_FIELDS),
+                *labeled("addresses", Addresses, ADDRESS_FIELDS),
+                json_rows(cards, cards.c.date.desc(), cards.c.card_id.desc()).label("recent_cards"),
+                json_rows(upcoming, upcoming.c.date, upcoming.c.time).label("upcoming_talons"),
+                json_rows(history, history.c.date.desc(), history.c.time.desc()).label("visit_history"),
+            )
+            .join(Users, cls.model.user_id == Users._id)
+            .outerjoin(Addresses, cls.model.address_id == Addresses._id)
+            .where(cls.model._id == patient_id)
+        )
+        async with async_session_maker() as session:
+            row = (await session.execute(query)).one_or_none()
+            return unflatten(row) if row else None
+
     @classmethod
     async def add_patient(cls, patient_data: PatientCreateSchema):
         async with async_session_maker() as session:
@@ -75,6 +160,97 @@ class PatientsDAO(BaseDAO):
                 await session.commit()
                 return new_patient
 
+    @classmethod
+    async def import_patients(cls, records, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+        """
+        Массовый импорт: records - асинхронный поток (номер строки, PatientCreateSchema или текст ошибки).
+        Каждая пачка вставляется несколькими многострочными INSERT и фиксируется отдельно.
+        """
+        report = ImportReport()
+        async with async_session_maker() as session:
+            batch = []
+            async for row_number, patient in records:
+                if isinstance(patient, str):
+                    report.fail(row_number, patient)
+                    continue
+                batch.append((row_number, patient))
+                if len(batch) >= batch_size:
+                    await cls._import_batch(session, batch, report)
+                    batch = []
+            if batch:
+                await cls._import_batch(session, batch, report)
+        return report.as_dict()
+
+    @classmethod
+    async def _import_batch(cls, session, batch: list, report: ImportReport):
+        logins = [patient.users.login for _, patient in batch]
+        existing = set((await session.execute(select(Users.login).where(Users.login.in_(logins)))).scalars())
+
+        fresh = []
+        for row_number, patient in batch:
+            if patient.users.login in existing:
+                report.fail(row_number, "Пользователь уже существует")
+                continue
+            existing.add(patient.users.login)
+            fresh.append((row_number, patient))
+        if not fresh:
+            return
+
+        try:
+            async with session.begin_nested():
+                await cls._insert_patients(session, [patient for _, patient in fresh])
+            report.imported += len(fresh)
+        except DBAPIError:
+            # Пачка целиком не прошла (дубликат, слишком длинная строка, число вне диапазона и т.п.) -
+            # повторяем построчно, чтобы найти конкретные строки с ошибкой.
+            for row_number, patient in fresh:
+                try:
+                    async with session.begin_nested():
+                        await cls._insert_patients(session, [patient])
+                    report.imported += 1
+                except DBAPIError as error:
+                    report.fail(row_number, str(error.orig))
+        await session.commit()
+
+    @staticmethod
+    async def _insert_patients(session, patients: list[PatientCreateSchema]):
+        user_ids = (await session.execute(
+            insert(Users).returning(Users._id, sort_by_parameter_order=True),
+            [
+                {
+                    "login": patient.users.login,
+                    "password": get_password_hash(patient.users.password),
+                    "first_name": patient.users.first_name,
+                    "last_name": patient.users.last_name,
+                    "second_name": patient.users.second_name,
+                    "phone_number": patient.users.phone_number,
+                    "gender": patient.users.gender,
+                    "role_id": 1,
+                }
+                for patient in patients
+            ],
+        )).scalars().all()
+        address_ids = (await session.execute(
+            insert(Addresses).returning(Addresses._id, sort_by_parameter_order=True),
+            [
+                {
+                    "country": patient.addresses.country,
+                    "city": patient.addresses.city,
+                    "street": patient.addresses.street,
+                    "house_number": patient.addresses.house_number,
+                    "flat_number": patient.addresses.flat_number,
+                }
+                for patient in patients
+            ],
+        )).scalars().all()
+        await session.execute(
+            insert(Patients),
+            [
+                {"b_date": patient.b_date, "user_id": user_id, "address_id": address_id}
+                for patient, user_id, address_id in zip(patients, user_ids, address_ids)
+            ],
+        )
+
     @classmethod
     async def delete_patient_by_id(cls, patient_id: int):
         async with async_session_maker() as session:
@@ -126,32 +302,14 @@ class PatientsDAO(BaseDAO):
             filters = []
 
             if full_name:
-                name_parts = full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    first_name, last_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{full_name}%")
-                    )
-
-                filters.append(and_(*name_conditions))
+                filters.append(name_condition(full_name))
 
             if filters:
                 query = query.where(and_(*filters))
 
+            if full_name:
+                query = query.order_by(name_rank(full_name).desc())
+
             result = await session.execute(query)
             return result.scalars().all()
 
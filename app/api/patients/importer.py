@@ -0,0 +1,103 @@
+import codecs
+import csv
+import json
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from clinicApp.app.api.patients.schemas import PatientCreateSchema
+
+USER_COLUMNS = ("login", "password", "first_name", "last_name", "second_name", "phone_number", "gender")
+ADDRESS_COLUMNS = ("country", "city", "street", "house_number", "flat_number")
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+
+async def iter_lines(chunks):
+    """Строки из потока байтов (UTF-8, BOM допускается) без чтения всего тела в память."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_csv(lines):
+    """
+    CSV с заголовком; колонки: b_date, поля пользователя (USER_COLUMNS) и адреса (ADDRESS_COLUMNS).
+    Одна запись - одна строка файла.
+    """
+    header = None
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        row_number += 1
+        row = dict(zip(header, values))
+        yield row_number, {
+            "b_date": row.get("b_date"),
+            "users": {"role_id": 1, **{column: row[column] for column in USER_COLUMNS if row.get(column)}},
+            "addresses": {column: row[column] for column in ADDRESS_COLUMNS if row.get(column)},
+        }
+
+
+async def parse_ndjson(lines):
+    """NDJSON: в каждой строке объект в формате PatientCreateSchema (как в /patients/add_patient)."""
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            yield row_number, f"Некорректный JSON: {error}"
+            continue
+        if isinstance(data, dict) and isinstance(data.get("users"), dict):
+            data["users"].setdefault("role_id", 1)
+        yield row_number, data
+
+
+PARSERS = {
+    "text/csv": parse_csv,
+    "application/x-ndjson": parse_ndjson,
+}
+
+
+async def validate_patients(rows):
+    """Проверяет строки схемой PatientCreateSchema; вместо невалидной строки отдаёт текст ошибки."""
+    async for row_number, data in rows:
+        if isinstance(data, str):
+            yield row_number, data
+            continue
+        try:
+            yield row_number, PatientCreateSchema.model_validate(data)
+        except ValidationError as error:
+            yield row_number, "; ".join(
+                f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors()
+            )
+        except HTTPException as error:
+            yield row_number, str(error.detail)
@@ -1,22 +1,24 @@
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from clinicApp.app.api.address.dao import AddressDAO
 from clinicApp.app.api.auth.dao import UsersDAO
 from clinicApp.app.api.medical_cards.dao import MedicalCardsDAO
-from clinicApp.app.api.medical_cards.schema import MedicalCardResponseSchema
+from clinicApp.app.api.medical_cards.schema import MedicalCardResponseSchema, MedicalCardTimelineSchema
+from clinicApp.app.api.pagination import Page
 from clinicApp.app.api.patients.dao import PatientsDAO
-from clinicApp.app.api.patients.schemas import PatientResponseSchema, PatientCreateSchema, PatientUpdateSchema
+from clinicApp.app.api.patients.importer import PARSERS, iter_lines, validate_patients
+from clinicApp.app.api.patients.schemas import PatientResponseSchema, PatientListSchema, PatientCreateSchema, PatientUpdateSchema, \
+    PatientImportReport, PatientChartSchema
 from clinicApp.app.api.talons.dao import AppointmentsDAO
 from clinicApp.app.schemas.schemas import TalonSchema
 
 router = APIRouter(prefix='/patients', tags=['Patient'])
 
-@router.get("/", summary="Получить всех пациентов", response_model=list[PatientResponseSchema])
-async def get_all_patients():
-    patients= await PatientsDAO.get_full_data()
-    return patients
+@router.get("/", summary="Получить всех пациентов", response_model=Page[PatientListSchema])
+async def get_all_patients(limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    return await PatientsDAO.get_page(limit, cursor)
 
 @router.get('/patient', summary="Получить пациента по id", response_model=PatientResponseSchema)
 async def get_patient(id: int = Query(...)):
@@ -28,6 +30,18 @@ async def get_patient(id: int = Query(...)):
         )
     return patient
 
+@router.get('/{patient_id}/chart', response_model=PatientChartSchema, summary="Карта пациента для врача одним запросом")
+async def get_patient_chart(patient_id: int, cards_limit: int = Query(20, ge=1, le=100),
+                            history_limit: int = Query(20, ge=1, le=100),
+                            upcoming_limit: int = Query(50, ge=1, le=200)):
+    chart = await PatientsDAO.get_chart(patient_id, cards_limit, history_limit, upcoming_limit)
+    if not chart:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+    return chart
+
 @router.post('/add_patient', summary='Добавить пациента')
 async def add_patient(patient_data: PatientCreateSchema) -> dict:
     existing_user = await UsersDAO.find_one_or_none(login=patient_data.users.login)
@@ -40,6 +54,18 @@ async def add_patient(patient_data: PatientCreateSchema) -> dict:
     await PatientsDAO.add_patient(patient_data)
     return {"message": "Пациент успешно добавлен!"}
 
+@router.post('/import', response_model=PatientImportReport, summary='Массовый импорт пациентов из CSV или NDJSON')
+async def import_patients(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    parse = PARSERS.get(content_type)
+    if not parse:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Поддерживаемые форматы: {', '.join(PARSERS)}"
+        )
+    # Тело читается потоком: строки проверяются и вставляются пачками по мере поступления.
+    return await PatientsDAO.import_patients(validate_patients(parse(iter_lines(request.stream()))))
+
 @router.delete("/delete/{patient_id}")
 async def dell_student_by_id(patient_id: int) -> dict:
     check = await PatientsDAO.delete_patient_by_id(patient_id=patient_id)
@@ -60,9 +86,9 @@ async def update_patients(patient_id: int, request: PatientUpdateSchema) -> dict
 
     return {"message": "Данные пациента успешно обновлены"}
 
-@router.get("/myCards", response_model = list[MedicalCardResponseSchema], summary='Список всех записей в картах конкретного пациента')
-async def get_patient_cards(patient_id: int = Query(...)):
-    return await MedicalCardsDAO.get_cards_for_patient(patient_id)
+@router.get("/myCards", response_model=Page[MedicalCardTimelineSchema], summary='Записи в карте конкретного пациента, от новых к старым')
+async def get_patient_cards(patient_id: int = Query(...), limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None):
+    return await MedicalCardsDAO.get_cards_for_patient(patient_id, limit, cursor)
 
 
 @router.get("/get_future_talon", response_model=list[TalonSchema], summary='Список всех будущих визитов пациента')
@@ -1,9 +1,10 @@
-from datetime import date
-from typing import Optional
+from datetime import date, time
+from typing import Optional, List
 
 from pydantic import BaseModel, EmailStr
 
-from clinicApp.app.schemas.schemas import UserSchema, AddressSchema
+from clinicApp.app.api.medical_cards.schema import MedicalCardTimelineSchema
+from clinicApp.app.schemas.schemas import UserSchema, UserListSchema, AddressSchema
 
 
 class PatientResponseSchema(BaseModel):
@@ -16,12 +17,30 @@ class PatientResponseSchema(BaseModel):
         orm_mode = True
 
 
+class PatientListSchema(BaseModel):
+    _id: int
+    b_date: date
+    users: UserListSchema
+    addresses: Optional[AddressSchema] = None
+
+
 class PatientCreateSchema(BaseModel):
     b_date: date
     users: UserSchema
     addresses: AddressSchema
 
 
+class PatientImportError(BaseModel):
+    row: int
+    error: str
+
+
+class PatientImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[PatientImportError]
+
+
 class UserUpdateSchema(BaseModel):
     login: Optional[EmailStr] = None
     password: Optional[str] = None
@@ -48,3 +67,31 @@ class PatientUpdateSchema(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PatientChartUserSchema(BaseModel):
+    login: str
+    first_name: str
+    last_name: str
+    second_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    gender: Optional[str] = None
+
+
+class PatientChartTalonSchema(BaseModel):
+    talon_id: int
+    date: date
+    time: time
+    status: str
+    doctor_id: Optional[int] = None
+    service_id: Optional[int] = None
+
+
+class PatientChartSchema(BaseModel):
+    patient_id: int
+    b_date: date
+    users: PatientChartUserSchema
+    addresses: Optional[AddressUpdateSchema] = None
+    recent_cards: List[MedicalCardTimelineSchema]
+    upcoming_talons: List[PatientChartTalonSchema]
+    visit_history: List[PatientChartTalonSchema]
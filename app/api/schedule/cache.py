@@ -0,0 +1,10 @@
+from pydantic import TypeAdapter
+
+from clinicApp.app.api.schedule.schema import ScheduleResponse
+from clinicApp.app.core.versions import SharedVersionedPayloadCache
+
+# Версия расписания увеличивается при любом изменении расписаний, а также врачей, чьи данные в него входят.
+# Изменение в одном воркере рассылается остальным через LISTEN/NOTIFY (core/changes.py).
+schedule_payloads = SharedVersionedPayloadCache("schedule")
+
+schedule_list_adapter = TypeAdapter(list[ScheduleResponse])
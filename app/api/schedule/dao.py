@@ -3,7 +3,11 @@ from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy import select, delete, and_, or_
 
+from clinicApp.app.api.schedule.cache import schedule_payloads
+from clinicApp.app.api.search import name_condition, name_rank
 from clinicApp.app.api.schedule.schema import ScheduleResponse, ScheduleUpdate
+from clinicApp.app.core.weekdays import days_mask, first_day, has_days, matching_days_mask
+from clinicApp.app.api.talons.availability import slot_availability
 from clinicApp.app.core.database import async_session_maker
 from clinicApp.app.models.models import Schedules, Doctors, Departments, Shifts, Users
 from clinicApp.app.schemas.schemas import ScheduleSchema
@@ -22,13 +26,13 @@ class ScheduleDAO:
                     Users.last_name, Users.first_name, Users.second_name,
                     Departments.department_name,
                     Shifts.start_time, Shifts.end_time,
-                    cls.model.day_of_week
+                    cls.model.days_mask
                 )
                 .join(Doctors, cls.model.doctor_id == Doctors._id)
                 .join(Users, Doctors.user_id == Users._id)
                 .join(Shifts, cls.model.shift_id == Shifts._id)
                 .join(Departments, Doctors.department_id == Departments._id)
-                .order_by(Users.last_name, cls.model.day_of_week)
+                .order_by(Users.last_name, first_day(cls.model.days_mask))
             )
 
             result = await session.execute(query)
@@ -43,14 +47,14 @@ class ScheduleDAO:
                     Users.last_name, Users.first_name, Users.second_name,
                     Departments.department_name,
                     Shifts.start_time, Shifts.end_time,
-                    cls.model.day_of_week
+                    cls.model.days_mask
                 )
                 .join(Doctors, cls.model.doctor_id == Doctors._id)
                 .join(Users, Doctors.user_id == Users._id)
                 .join(Shifts, cls.model.shift_id == Shifts._id)
                 .join(Departments, Doctors.department_id == Departments._id)
                 .filter(cls.model._id==doctor_id)
-                .order_by(Users.last_name, cls.model.day_of_week)
+                .order_by(Users.last_name, first_day(cls.model.days_mask))
             )
             result = await session.execute(query)
             row = result.first()
@@ -63,11 +67,17 @@ class ScheduleDAO:
     @classmethod
     async def add_schedule(cls, schedule: ScheduleSchema):
         async with async_session_maker() as session:
-            db_schedule = cls.model(**schedule.dict())
+            db_schedule = cls.model(
+                days_mask=days_mask(schedule.days_of_week),
+                doctor_id=schedule.doctor_id,
+                shift_id=schedule.shift_id,
+            )
             session.add(db_schedule)
             await session.commit()
             session.refresh(db_schedule)
-            return db_schedule
+        await schedule_payloads.bump()
+        await slot_availability.load()
+        return db_schedule
 
     @classmethod
     async def update(cls, schedule_id: int, schedule):
@@ -79,11 +89,17 @@ class ScheduleDAO:
                 if not db_schedule:
                     return None
 
-                for key, value in schedule.dict(exclude_unset=True).items():
+                values = schedule.dict(exclude_unset=True)
+                days_of_week = values.pop("days_of_week", None)
+                if days_of_week:
+                    values["days_mask"] = days_mask(days_of_week)
+                for key, value in values.items():
                     setattr(db_schedule, key, value)
 
                 await session.commit()
-                return db_schedule
+        await schedule_payloads.bump()
+        await slot_availability.load()
+        return db_schedule
 
     @classmethod
     async def delete(cls, schedule_id: int):
@@ -101,7 +117,9 @@ class ScheduleDAO:
                 )
 
                 await session.commit()
-                return schedule_id
+        await schedule_payloads.bump()
+        await slot_availability.load()
+        return schedule_id
 
     @classmethod
     async def search(cls, full_name: Optional[str] = None, department: Optional[str] = None, day_of_week: Optional[str] = None):
@@ -112,7 +130,7 @@ class ScheduleDAO:
                     Users.last_name, Users.first_name, Users.second_name,
                     Departments.department_name,
                     Shifts.start_time, Shifts.end_time,
-                    cls.model.day_of_week
+                    cls.model.days_mask
                 )
                 .join(Doctors, cls.model.doctor_id == Doctors._id)
                 .join(Users, Doctors.user_id == Users._id)
@@ -122,38 +140,19 @@ class ScheduleDAO:
 
             filters=[]
             if full_name:
-                name_parts = full_name.split()
-                name_conditions = []
-
-                if len(name_parts) == 3:
-                    last_name, first_name, second_name = name_parts
-                    name_conditions.append(or_(
-                        Users.last_name.ilike(f"%{last_name}%"),
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.second_name.ilike(f"%{second_name}%")
-                    ))
-                elif len(name_parts) == 2:
-                    first_name, last_name = name_parts
-                    name_conditions.append(and_(
-                        Users.first_name.ilike(f"%{first_name}%"),
-                        Users.last_name.ilike(f"%{last_name}%")
-                    ))
-                else:
-                    name_conditions.append(
-                        Users.last_name.ilike(f"%{full_name}%")
-                    )
-
-                filters.append(and_(*name_conditions))
+                filters.append(name_condition(full_name))
 
             if department:
                 filters.append(Departments.department_name.ilike(f"%{department}%"))
 
             if day_of_week:
-                filters.append(Schedules.day_of_week.ilike(f"%{day_of_week}%"))
+                filters.append(has_days(Schedules.days_mask, matching_days_mask(day_of_week)))
 
             if filters:
                 query=query.where(and_(*filters))
 
-            query = query.order_by(Users.last_name, cls.model.day_of_week)
+            if full_name:
+                query = query.order_by(name_rank(full_name).desc())
+            query = query.order_by(Users.last_name, first_day(cls.model.days_mask))
             result = await session.execute(query)
             return [ScheduleResponse.from_row(row) for row in result.all()]
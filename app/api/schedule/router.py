@@ -1,6 +1,9 @@
 from typing import Optional
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
+
+from clinicApp.app.api.etag import conditional_json
+from clinicApp.app.api.schedule.cache import schedule_payloads, schedule_list_adapter
 from clinicApp.app.api.schedule.dao import ScheduleDAO
 from clinicApp.app.api.schedule.schema import ScheduleResponse, ScheduleUpdate
 from clinicApp.app.schemas.schemas import ScheduleSchema
@@ -8,8 +11,12 @@ from clinicApp.app.schemas.schemas import ScheduleSchema
 router = APIRouter(prefix='/schedule', tags=['Schedule'])
 
 @router.get("/", response_model=list[ScheduleResponse])
-async def get_all():
-    return await ScheduleDAO.get_all_schedules()
+async def get_all(request: Request):
+    async def build():
+        return schedule_list_adapter.dump_json(await ScheduleDAO.get_all_schedules())
+
+    etag, body = await schedule_payloads.get_or_build(("all",), build)
+    return conditional_json(request, etag, body)
 
 @router.get("/getSchedule", response_model=ScheduleResponse, summary="Получить раасписания по id")
 async def get_schedule_by_id(schedule_id: int = Query(...)):
@@ -40,5 +47,9 @@ async def doctor_delete_schedule(schedule_id: int = Query(...)):
     return {"message": "Расписание удалено успешно!"}
 
 @router.get("/admin/search", response_model=list[ScheduleResponse], summary='Поиск и фильтрация расписаний для админа')
-async def search_schedules(full_name: Optional[str] = Query(None), department: Optional[str] = Query(None), day_of_week:Optional[str] = Query(None)):
-    return await ScheduleDAO.search(full_name, department, day_of_week)
\ No newline at end of file
+async def search_schedules(request: Request, full_name: Optional[str] = Query(None), department: Optional[str] = Query(None), day_of_week:Optional[str] = Query(None)):
+    async def build():
+        return schedule_list_adapter.dump_json(await ScheduleDAO.search(full_name, department, day_of_week))
+
+    etag, body = await schedule_payloads.get_or_build(("search", full_name, department, day_of_week), build)
+    return conditional_json(request, etag, body)
\ No newline at end of file
@@ -1,13 +1,18 @@
 from datetime import time
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
+from clinicApp.app.core.weekdays import day_names, normalize_days
 
 
 class ScheduleUpdate(BaseModel):
     shift_id: Optional[int]
-    day_of_week: Optional[str]
+    days_of_week: Optional[list[str]]
+
+    @field_validator('days_of_week')
+    def validate_days_of_week(cls, value):
+        return normalize_days(value) if value is not None else None
 
 class ScheduleResponse(BaseModel):
     _id: int
@@ -17,9 +22,11 @@ class ScheduleResponse(BaseModel):
     department_name: str
     start_time: time
     end_time: time
-    day_of_week: str
+    days_of_week: list[str]
 
 
     @classmethod
     def from_row(cls, row):
-        return cls.model_validate(row._asdict())
+        data = row._asdict()
+        data["days_of_week"] = day_names(data.pop("days_mask"))
+        return cls.model_validate(data)
@@ -0,0 +1,31 @@
+from sqlalchemy import and_, or_, func, true
+
+from clinicApp.app.models.models import Users
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def name_condition(full_name: str, users=Users):
+    """
+    Каждое слово запроса должно встречаться в фамилии, имени или отчестве.
+    ILIKE '%слово%' обслуживается GIN-индексами pg_trgm на этих колонках.
+    users - модель Users или её aliased(...), если в запросе несколько пользователей.
+    """
+    terms = full_name.split()
+    if not terms:
+        return true()
+    return and_(*[
+        or_(
+            users.last_name.ilike(pattern),
+            users.first_name.ilike(pattern),
+            users.second_name.ilike(pattern),
+        )
+        for pattern in (f"%{_escape_like(term)}%" for term in terms)
+    ])
+
+
+def name_rank(full_name: str, users=Users):
+    """Триграммная близость ФИО к запросу, для сортировки результатов по убыванию."""
+    return func.similarity(func.concat_ws(" ", users.last_name, users.first_name, users.second_name), full_name)
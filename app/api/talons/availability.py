@@ -0,0 +1,210 @@
+import asyncio
+from datetime import date, time
+from typing import Optional
+
+from sqlalchemy import select
+
+from clinicApp.app.api.doctor_leaves.leave_index import leave_index
+from clinicApp.app.core.weekdays import weekdays_of
+from clinicApp.app.core.cache import LRUCache
+from clinicApp.app.core.changes import changes
+from clinicApp.app.core.config import settings
+from clinicApp.app.core.database import async_session_maker
+from clinicApp.app.models.models import Schedules, Shifts, Talons, TALON_DECLINED
+
+SLOT_MINUTES = 30
+
+
+class ShiftSlots:
+    """Сетка слотов одной смены: слот i начинается через i * SLOT_MINUTES минут после начала смены."""
+
+    __slots__ = ("start_minute", "labels", "full_mask")
+
+    def __init__(self, start_time: time, end_time: time):
+        self.start_minute = start_time.hour * 60 + start_time.minute
+        end_minute = end_time.hour * 60 + end_time.minute
+        count = max(0, -(-(end_minute - self.start_minute) // SLOT_MINUTES))
+        self.labels = tuple(
+            "%02d:%02d" % divmod(self.start_minute + i * SLOT_MINUTES, 60) for i in range(count)
+        )
+        self.full_mask = (1 << count) - 1
+
+    def __eq__(self, other):
+        return isinstance(other, ShiftSlots) and self.labels == other.labels
+
+    def index_of(self, slot_time: time) -> Optional[int]:
+        offset = slot_time.hour * 60 + slot_time.minute - self.start_minute
+        if offset < 0 or offset % SLOT_MINUTES:
+            return None
+        index = offset // SLOT_MINUTES
+        return index if index < len(self.labels) else None
+
+    def mask_of(self, booked_times) -> int:
+        mask = 0
+        for booked_time in booked_times:
+            index = self.index_of(booked_time)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def free_labels(self, booked_mask: int) -> list[str]:
+        free = self.full_mask & ~booked_mask
+        return [label for i, label in enumerate(self.labels) if free >> i & 1]
+
+    def free_indexes(self, booked_mask: int):
+        free = self.full_mask & ~booked_mask
+        while free:
+            lowest = free & -free
+            yield lowest.bit_length() - 1
+            free ^= lowest
+
+    def minute_of(self, index: int) -> int:
+        return self.start_minute + index * SLOT_MINUTES
+
+
+class SlotAvailability:
+    """
+    Доступность слотов в памяти процесса.
+
+    Шаблоны смен (врач -> номер дня недели -> смена) загружаются из Schedules/Shifts целиком,
+    занятые слоты хранятся битовой маской на пару (врач, дата) в LRU-кэше на capacity дней.
+    Маска дня подгружается одним запросом при промахе и дальше поддерживается DAO записи
+    на приём; изменение расписания сбрасывает дни только тех врачей, чьи смены изменились.
+    Запись и отмена рассылаются остальным процессам через changes - там день просто сбрасывается,
+    а изменение расписания (тема schedule) перечитывает шаблоны.
+    """
+
+    def __init__(self, capacity: int = settings.SLOT_CACHE_SIZE):
+        self._templates: Optional[dict[int, dict[int, ShiftSlots]]] = None
+        self._templates_lock = asyncio.Lock()
+        self._days = LRUCache(capacity)
+        self._inflight: dict[tuple[int, date], asyncio.Task] = {}
+        self._stale: set[tuple[int, date]] = set()
+        changes.subscribe("slots", self._on_change)
+        changes.subscribe("schedule", self._on_schedule_change)
+
+    async def load(self):
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Schedules.doctor_id, Schedules.days_mask, Shifts.start_time, Shifts.end_time)
+                .join(Shifts, Schedules.shift_id == Shifts._id)
+                .order_by(Schedules._id)
+            )
+            templates: dict[int, dict[int, ShiftSlots]] = {}
+            for row in result.all():
+                shift = ShiftSlots(row.start_time, row.end_time)
+                days = templates.setdefault(row.doctor_id, {})
+                for weekday in weekdays_of(row.days_mask):
+                    days.setdefault(weekday, shift)
+
+        old_templates = self._templates or {}
+        self._templates = templates
+        changed = {
+            doctor_id for doctor_id in old_templates.keys() | templates.keys()
+            if old_templates.get(doctor_id) != templates.get(doctor_id)
+        }
+        for key in self._days.keys():
+            if key[0] in changed:
+                self._days.pop(key)
+        self._stale.update(key for key in self._inflight if key[0] in changed)
+
+    async def _ensure_templates(self) -> dict[int, dict[int, ShiftSlots]]:
+        if self._templates is None:
+            async with self._templates_lock:
+                if self._templates is None:
+                    await self.load()
+        return self._templates
+
+    async def get_shift(self, doctor_id: int, day: date) -> Optional[ShiftSlots]:
+        templates = await self._ensure_templates()
+        return templates.get(doctor_id, {}).get(day.weekday())
+
+    async def get_available_slots(self, doctor_id: int, day: date) -> list[str]:
+        shift = await self.get_shift(doctor_id, day)
+        if not shift or not shift.labels:
+            return []
+        await leave_index.ensure_loaded()
+        if leave_index.is_on_leave(doctor_id, day):
+            return []
+        booked_mask = await self._booked_mask(doctor_id, day, shift)
+        return shift.free_labels(booked_mask)
+
+    async def _booked_mask(self, doctor_id: int, day: date, shift: ShiftSlots) -> int:
+        key = (doctor_id, day)
+        mask = self._days.get(key)
+        if mask is not None:
+            return mask
+
+        # Параллельные запросы одного и того же дня ждут одну общую загрузку.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_booked(key, shift))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fetch_booked(self, key: tuple[int, date], shift: ShiftSlots) -> int:
+        doctor_id, day = key
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(Talons.time)
+                    .where(Talons.doctor_id == doctor_id, Talons.date == day, Talons.status != TALON_DECLINED)
+                )
+                mask = shift.mask_of(result.scalars().all())
+            # Если во время запроса маска менялась, снимок мог устареть - не кэшируем его.
+            if key not in self._stale:
+                self._days.set(key, mask)
+            return mask
+        finally:
+            self._inflight.pop(key, None)
+            self._stale.discard(key)
+
+    def _forget(self, key: tuple[int, date]):
+        if key in self._inflight:
+            self._stale.add(key)
+        self._days.pop(key, None)
+
+    def _book_local(self, doctor_id: int, day: date, slot_time: time):
+        key = (doctor_id, day)
+        if key in self._inflight:
+            self._stale.add(key)
+        mask = self._days.peek(key)
+        if mask is None or self._templates is None:
+            return
+        shift = self._templates.get(doctor_id, {}).get(day.weekday())
+        index = shift.index_of(slot_time) if shift else None
+        if index is not None:
+            self._days.set(key, mask | 1 << index)
+
+    async def book(self, doctor_id: int, day: date, slot_time: time):
+        await self.book_many([(doctor_id, day, slot_time)])
+
+    async def book_many(self, slots):
+        """slots - тройки (doctor_id, date, time); остальным процессам - одна рассылка на всю пачку."""
+        if not slots:
+            return
+        for doctor_id, day, slot_time in slots:
+            self._book_local(doctor_id, day, slot_time)
+        await changes.publish("slots", *{f"{doctor_id}:{day.isoformat()}" for doctor_id, day, _ in slots})
+
+    async def release(self, doctor_id: int, day: date):
+        # На слот может приходиться несколько талонов, поэтому день просто перечитывается при следующем запросе.
+        self._forget((doctor_id, day))
+        await changes.publish("slots", f"{doctor_id}:{day.isoformat()}")
+
+    async def _on_change(self, payload):
+        if payload is None:
+            self._stale.update(self._inflight)
+            self._days.clear()
+            return
+        doctor_id, day = payload.split(":")
+        self._forget((int(doctor_id), date.fromisoformat(day)))
+
+    async def _on_schedule_change(self, payload):
+        await self.load()
+
+    def stats(self) -> dict:
+        return self._days.stats()
+
+
+slot_availability = SlotAvailability()
@@ -1,88 +1,118 @@
+import asyncio
 import json
-import os
+import logging
 from typing import Optional
 
-import redis
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
-from sqlalchemy import func, or_, and_, alias
+from aiokafka import AIOKafkaConsumer
+from fastapi import HTTPException
+from sqlalchemy import func, or_, and_, text, exists, values, column, Integer, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from datetime import datetime, timedelta, date
-
-from sqlalchemy.orm import selectinload
-
-from clinicApp.app.api.talons.schema import AppointmentCreate, AppointmentResponse
+from datetime import datetime, timedelta, date, time
+
+from sqlalchemy.orm import selectinload, aliased
+
+from clinicApp.app.api.doctor_leaves.leave_index import leave_index
+from clinicApp.app.api.pagination import decode_cursor, encode_cursor, keyset_after
+from clinicApp.app.core.weekdays import has_days, weekday_bit, weekdays_of
+from clinicApp.app.api.search import name_condition
+from clinicApp.app.api.talons.availability import slot_availability, ShiftSlots
+from clinicApp.app.api.talons.holds import slot_holds
+from clinicApp.app.api.talons.schema import AppointmentCreate, AppointmentBulkCreate, AppointmentResponse
+from clinicApp.app.core.config import settings
 from clinicApp.app.core.database import async_session_maker
-from clinicApp.app.models.models import Talons, Schedules, Patients, Doctors, Departments, Users
+from clinicApp.app.core.kafka import kafka_producer, consume_batches
+from clinicApp.app.core.metrics import ThroughputMeter
+from clinicApp.app.models.models import Talons, Schedules, Shifts, Patients, Doctors, Departments, Users, Services, \
+    DoctorVisitCounters, PatientDoctorVisits, DoctorLeaves, TALON_DECLINED
+
+REQUEST_TOPIC = settings.REQUEST_TOPIC
+RESPONSE_TOPIC = settings.RESPONSE_TOPIC
+CONFIRMATION_TOPIC = settings.CONFIRMATION_TOPIC
+ERROR_TOPIC = settings.ERROR_TOPIC
+KAFKA_BOOTSTRAP_SERVERS = settings.KAFKA_BOOTSTRAP_SERVERS
+MAX_HOLD_ATTEMPTS = 20
 
-redis_client = redis.Redis(host="localhost", port=6379, db=0)
-REQUEST_TOPIC = os.getenv("REQUEST_TOPIC")
-RESPONSE_TOPIC = os.getenv("RESPONSE_TOPIC")
-CONFIRMATION_TOPIC = os.getenv("CONFIRMATION_TOPIC")
-ERROR_TOPIC = os.getenv("ERROR_TOPIC")
-KAFKA_BOOTSTRAP_SERVERS =  os.getenv("KAFKA_BOOTSTRAP_SERVERS")
+logger = logging.getLogger(__name__)
 
 class AppointmentsDAO:
     model = Talons
 
     @classmethod
-    async def find_all(cls, full_name: Optional[str] = None, from_date: Optional[date] = None,
+    def _find_all_query(cls, full_name: Optional[str] = None, from_date: Optional[date] = None,
             to_date: Optional[date] = None, status: Optional[str] = None):
-        async with async_session_maker() as session:
-            DoctorUser = alias(Users, name="doctor_user")
-            PatientUser = alias(Users, name="patient_user")
-
-            query = (
-                select(
-                    Talons.date,
-                    Talons.time,
-                    Talons.status,
-                    DoctorUser.c.last_name.label("doctor_last_name"),
-                    DoctorUser.c.first_name.label("doctor_first_name"),
-                    DoctorUser.c.second_name.label("doctor_second_name"),
-                    PatientUser.c.last_name.label("patient_last_name"),
-                    PatientUser.c.first_name.label("patient_first_name"),
-                    PatientUser.c.second_name.label("patient_second_name")
-                )
-                .join(Doctors, Talons.doctor_id == Doctors._id)
-                .join(DoctorUser, Doctors.user_id == DoctorUser.c._id)
-                .join(Patients, Talons.patient_id == Patients._id)
-                .join(PatientUser, Patients.user_id == PatientUser.c._id)
+        DoctorUser = aliased(Users, name="doctor_user")
+        PatientUser = aliased(Users, name="patient_user")
+
+        query = (
+            select(
+                Talons._id,
+                Talons.date,
+                Talons.time,
+                Talons.status,
+                DoctorUser.last_name.label("doctor_last_name"),
+                DoctorUser.first_name.label("doctor_first_name"),
+                DoctorUser.second_name.label("doctor_second_name"),
+                PatientUser.last_name.label("patient_last_name"),
+                PatientUser.first_name.label("patient_first_name"),
+                PatientUser.second_name.label("patient_second_name")
             )
+            .join(Doctors, Talons.doctor_id == Doctors._id)
+            .join(DoctorUser, Doctors.user_id == DoctorUser._id)
+            .join(Patients, Talons.patient_id == Patients._id)
+            .join(PatientUser, Patients.user_id == PatientUser._id)
+            .order_by(Talons.date, Talons.time, Talons._id)
+        )
 
-            filter=[]
+        filter=[]
 
-            if full_name:
-                full_name_parts = full_name.split()
-                search_conditions = []
-                for term in full_name_parts:
-                    search_conditions.append(
-                        or_(
-                            DoctorUser.c.first_name.ilike(f"%{term}%"),
-                            DoctorUser.c.last_name.ilike(f"%{term}%"),
-                            DoctorUser.c.second_name.ilike(f"%{term}%")
-                        )
-                    )
-                filter.append(and_(*search_conditions))
+        if full_name:
+            filter.append(name_condition(full_name, DoctorUser))
 
-            if from_date:
-                filter.append(cls.model.date>=from_date)
+        if from_date:
+            filter.append(cls.model.date>=from_date)
 
-            if to_date:
-                filter.append(cls.model.date <= to_date)
-            if status:
-                filter.append(cls.model.status == status)
+        if to_date:
+            filter.append(cls.model.date <= to_date)
+        if status:
+            filter.append(cls.model.status == status)
 
-            if filter:
-                query=query.where(and_(*filter))
+        if filter:
+            query=query.where(and_(*filter))
+        return query
 
-            result = await session.execute(query)
-            return [AppointmentResponse.from_row(row) for row in result.all()]
+    @classmethod
+    async def find_all(cls, full_name: Optional[str] = None, from_date: Optional[date] = None,
+            to_date: Optional[date] = None, status: Optional[str] = None,
+            limit: int = 100, cursor: Optional[str] = None):
+        async with async_session_maker() as session:
+            query = cls._find_all_query(full_name, from_date, to_date, status)
+            if cursor:
+                after = decode_cursor(cursor, date.fromisoformat, time.fromisoformat, int)
+                query = query.where(keyset_after([Talons.date, Talons.time, Talons._id], after))
+
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1].date, rows[-1].time, rows[-1]._id)
+            return {"items": [AppointmentResponse.from_row(row) for row in rows], "next_cursor": next_cursor}
 
+    @classmethod
+    async def stream_all(cls, full_name: Optional[str] = None, from_date: Optional[date] = None,
+            to_date: Optional[date] = None, status: Optional[str] = None):
+        async with async_session_maker() as session:
+            query = cls._find_all_query(full_name, from_date, to_date, status)
+            result = await session.stream(query.execution_options(yield_per=1000))
+            async for row in result:
+                yield AppointmentResponse.from_row(row)
 
     @classmethod
     async def find_appointments(cls, patient_id: int, date: Optional[str] = date.today(), department: Optional[str] = None, full_name: Optional[str] = None):
         async with async_session_maker() as session:
-            day_of_week = datetime.strptime(date, "%Y-%m-%d").strftime("%A")
+            day_bit = weekday_bit(datetime.strptime(date, "%Y-%m-%d").date())
 
             query = (
                 select(
@@ -92,37 +122,26 @@ class AppointmentsDAO:
                     Users.second_name,
                     Users.phone_number,
                     Departments.department_name.label("department"),
-                    func.coalesce(func.count(Talons._id).filter(Talons.patient_id == patient_id), 0).label(
-                        "department_visits"),
-                    func.coalesce(func.count(Talons._id).filter(Talons.doctor_id == Doctors._id), 0).label("doctor_visits")
+                    func.coalesce(PatientDoctorVisits.visits, 0).label("department_visits"),
+                    func.coalesce(DoctorVisitCounters.visits, 0).label("doctor_visits")
                 )
                 .join(Departments, Doctors.department_id == Departments._id)
-                .join(Schedules, Doctors._id == Schedules.doctor_id)
                 .join(Users, Doctors.user_id == Users._id)
-                .outerjoin(Talons, Talons.doctor_id == Doctors._id)
-                .where(Schedules.day_of_week == day_of_week)
-                .group_by(Doctors._id, Departments.department_name, Users.last_name, Users.first_name, Users.second_name,Users.phone_number)
+                .outerjoin(PatientDoctorVisits, and_(PatientDoctorVisits.doctor_id == Doctors._id,
+                                                     PatientDoctorVisits.patient_id == patient_id))
+                .outerjoin(DoctorVisitCounters, DoctorVisitCounters.doctor_id == Doctors._id)
+                .where(exists().where(Schedules.doctor_id == Doctors._id, has_days(Schedules.days_mask, day_bit)))
             )
 
             if department:
                 query = query.where(Departments.department_name.ilike(f"%{department}%"))
 
             if full_name:
-                search_terms = full_name.split()
-                search_conditions = []
-                for term in search_terms:
-                    search_conditions.append(
-                        or_(
-                            Users.first_name.ilike(f"%{term}%"),
-                            Users.last_name.ilike(f"%{term}%"),
-                            Users.second_name.ilike(f"%{term}%")
-                        )
-                    )
-                query = query.where(and_(*search_conditions))
+                query = query.where(name_condition(full_name))
 
             query = query.order_by(
-                func.count(Talons._id).filter(Talons.patient_id == patient_id).desc(),
-                func.count(Talons._id).filter(Talons.doctor_id == Doctors._id).desc(),
+                func.coalesce(PatientDoctorVisits.visits, 0).desc(),
+                func.coalesce(DoctorVisitCounters.visits, 0).desc(),
                 Users.last_name.asc()
             )
 
@@ -131,25 +150,59 @@ class AppointmentsDAO:
 
             return doctors
 
+    @classmethod
+    async def roll_up_doctor_visits(cls):
+        """
+        Пересчитывает doctor_visit_counters из patient_doctor_visits.
+        Для ранжирования врачей точный счёт не нужен, а общая строка врача, обновляемая на каждый талон,
+        выстраивала бы параллельные записи к нему в очередь.
+        """
+        totals = (
+            select(PatientDoctorVisits.doctor_id, func.sum(PatientDoctorVisits.visits))
+            .group_by(PatientDoctorVisits.doctor_id)
+        )
+        statement = insert(DoctorVisitCounters).from_select(["doctor_id", "visits"], totals)
+        statement = statement.on_conflict_do_update(
+            index_elements=[DoctorVisitCounters.doctor_id],
+            set_={"visits": statement.excluded.visits},
+            where=DoctorVisitCounters.visits != statement.excluded.visits,
+        )
+        async with async_session_maker() as session:
+            await session.execute(statement)
+            await session.commit()
+
+    @classmethod
+    async def maintain_doctor_visits(cls, interval: float = settings.VISIT_COUNTERS_REFRESH_INTERVAL):
+        while True:
+            try:
+                await cls.roll_up_doctor_visits()
+            except Exception:
+                logger.exception("Не удалось пересчитать doctor_visit_counters")
+            await asyncio.sleep(interval)
+
     @classmethod
     async def get_available_slots(cls, doctor_id: int, date: str):
         async with async_session_maker() as session:
             date_obj = datetime.strptime(date, "%Y-%m-%d").date()
-            day_of_week = date_obj.strftime("%A")
 
             shift_query = await session.execute(
                 select(Schedules)
                 .options(selectinload(Schedules.shifts))
-                .where(Schedules.doctor_id == doctor_id, Schedules.day_of_week == day_of_week)
+                .where(Schedules.doctor_id == doctor_id, has_days(Schedules.days_mask, weekday_bit(date_obj)))
+                .order_by(Schedules._id)
             )
             schedule = shift_query.scalar()
 
             if not schedule or not schedule.shifts:
                 return {"available_slots": []}
 
+            await leave_index.ensure_loaded()
+            if leave_index.is_on_leave(doctor_id, date_obj):
+                return {"available_slots": []}
+
             booked_query = await session.execute(
                 select(Talons.time)
-                .where(Talons.doctor_id == doctor_id, Talons.date == date_obj)
+                .where(Talons.doctor_id == doctor_id, Talons.date == date_obj, Talons.status != TALON_DECLINED)
             )
             booked_slots = {row[0].strftime("%H:%M") for row in booked_query.all()}
 
@@ -165,21 +218,136 @@ class AppointmentsDAO:
 
             return {"available_slots": available_slots}
 
+    @classmethod
+    async def book_slot(cls, session, **values) -> Optional[Talons]:
+        # INSERT ... ON CONFLICT DO NOTHING по uq_talons_doctor_slot: занятый слот возвращает None без ожидания и повторов.
+        result = await session.execute(
+            insert(Talons)
+            .values(**values)
+            .on_conflict_do_nothing(
+                index_elements=[Talons.doctor_id, Talons.date, Talons.time],
+                index_where=text(f"status <> '{TALON_DECLINED}'"),
+            )
+            .returning(Talons)
+        )
+        return result.scalar_one_or_none()
+
     @classmethod
     async def create_appointment(cls, data: AppointmentCreate, patient_id: int):
         async with async_session_maker() as session:
             async with session.begin():
-                new_appointment = Talons(
-                    patient_id= patient_id,
-                    doctor_id = data.doctor_id,
-                    date = data.date,
-                    time = data.time,
+                new_appointment = await cls.book_slot(
+                    session,
+                    patient_id=patient_id,
+                    doctor_id=data.doctor_id,
+                    date=data.date,
+                    time=data.time,
                     service_id=data.service_id,
-                    status = "Pending",
+                    status="Pending",
                 )
-                session.add(new_appointment)
-                await session.commit()
-                return new_appointment
+            if not new_appointment:
+                return None
+            await slot_availability.book(new_appointment.doctor_id, new_appointment.date, new_appointment.time)
+            return new_appointment
+
+    @classmethod
+    async def create_appointments_bulk(cls, items: list[AppointmentBulkCreate]):
+        """Заявки могут быть для разных пациентов; результат - по одному на заявку, с её номером в запросе."""
+        if not items:
+            return []
+        async with async_session_maker() as session:
+            async with session.begin():
+                valid = await cls._valid_bulk_items(session, items)
+                rows = [
+                    dict(
+                        patient_id=item.patient_id,
+                        doctor_id=item.doctor_id,
+                        date=item.date,
+                        time=item.time,
+                        service_id=item.service_id,
+                        status="Pending",
+                    )
+                    for index, item in enumerate(items)
+                    if index in valid
+                ]
+                created = {}
+                if rows:
+                    result = await session.execute(
+                        insert(Talons)
+                        .values(rows)
+                        .on_conflict_do_nothing(
+                            index_elements=[Talons.doctor_id, Talons.date, Talons.time],
+                            index_where=text(f"status <> '{TALON_DECLINED}'"),
+                        )
+                        .returning(Talons)
+                    )
+                    created = {(talon.doctor_id, talon.date, talon.time): talon for talon in result.scalars().all()}
+
+        results, booked = [], []
+        for index, item in enumerate(items):
+            if index not in valid:
+                results.append({"index": index, "status": "invalid", "appointment": None})
+                continue
+            appointment = created.pop((item.doctor_id, item.date, item.time), None)
+            if appointment:
+                booked.append((appointment.doctor_id, appointment.date, appointment.time))
+                results.append({"index": index, "status": "created", "appointment": appointment})
+            else:
+                results.append({"index": index, "status": "conflict", "appointment": None})
+        await slot_availability.book_many(booked)
+        return results
+
+    @classmethod
+    async def _valid_bulk_items(cls, session, items: list[AppointmentBulkCreate]) -> set[int]:
+        """
+        Номера заявок, которые можно вставлять: пациент и услуга существуют, у врача в этот день есть смена
+        и время попадает на её слот, врач не в отпуске. Все заявки проверяются одним запросом,
+        чтобы ошибка внешнего ключа в одной из них не роняла всю пачку. Отпуск проверяется в том же запросе,
+        а не по leave_index: запись не должна зависеть от того, успел ли кэш процесса узнать об одобрении.
+        """
+        requested = values(
+            column("position", Integer),
+            column("patient_id", Integer),
+            column("doctor_id", Integer),
+            column("service_id", Integer),
+            column("day", Date),
+            column("day_bit", Integer),
+            name="requested",
+        ).data([
+            (index, item.patient_id, item.doctor_id, item.service_id, item.date, weekday_bit(item.date))
+            for index, item in enumerate(items)
+        ])
+        result = await session.execute(
+            select(
+                requested.c.position,
+                Shifts.start_time,
+                Shifts.end_time,
+                exists().where(Services._id == requested.c.service_id).label("service_exists"),
+                exists().where(Patients._id == requested.c.patient_id).label("patient_exists"),
+                exists().where(
+                    DoctorLeaves.doctor_id == requested.c.doctor_id,
+                    leave_index.approved(),
+                    DoctorLeaves.from_date <= requested.c.day,
+                    DoctorLeaves.to_date >= requested.c.day,
+                ).label("on_leave"),
+            )
+            .select_from(requested)
+            .join(Schedules, and_(Schedules.doctor_id == requested.c.doctor_id,
+                                  has_days(Schedules.days_mask, requested.c.day_bit)))
+            .join(Shifts, Schedules.shift_id == Shifts._id)
+        )
+
+        valid = set()
+        for row in result.all():
+            item = items[row.position]
+            if (
+                row.patient_exists
+                and row.service_exists
+                and not row.on_leave
+                and ShiftSlots(row.start_time, row.end_time).index_of(item.time) is not None
+            ):
+                valid.add(row.position)
+        return valid
 
     @classmethod
     async def delete_appointment(cls, appointment_id: int):
@@ -190,7 +358,8 @@ class AppointmentsDAO:
                     return None
                 await session.delete(appointment)
                 await session.commit()
-                return {"message": "Appointment deleted"}
+            await slot_availability.release(appointment.doctor_id, appointment.date)
+            return {"message": "Appointment deleted"}
 
     @classmethod
     async def update_appointment(cls, appointment_id: int, data: AppointmentCreate):
@@ -202,11 +371,18 @@ class AppointmentsDAO:
                 if not appointment:
                     return None
 
+                old_doctor_id, old_date = appointment.doctor_id, appointment.date
                 for key, value in data.dict().items():
                     setattr(appointment, key, value)
 
+                try:
+                    await session.flush()
+                except IntegrityError:
+                    raise HTTPException(status_code=409, detail="Это время у врача уже занято")
                 await session.commit()
-                return appointment
+            await slot_availability.release(old_doctor_id, old_date)
+            await slot_availability.book(appointment.doctor_id, appointment.date, appointment.time)
+            return appointment
 
 
     @classmethod
@@ -229,168 +405,189 @@ class AppointmentsDAO:
             return result.scalars().all()
 
     @classmethod
-    async def consume_requests(cls, today: date):
-        consumer = AIOKafkaConsumer(REQUEST_TOPIC, bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS, group_id="clinic_group")
-        await consumer.start()
-
-        async for message in consumer:
-            data = json.loads(message.value.decode("utf-8"))
-            specialty = data.get("specialty")
-            complaint_id = data.get("complaint_id")
-
-            max_days_ahead = 30
-            search_date = today
-
-            async with async_session_maker() as session:
-                earliest_slots = []
-
-                while search_date <= today + timedelta(days=max_days_ahead):
-                    day_of_week = search_date.strftime("%A")
-
-                    doctors_query = (
-                        select(
-                            Doctors._id.label("doctor_id"),
-                            Users.last_name,
-                            Users.first_name,
-                            Users.second_name,
-                            Departments.department_name.label("department"),
-                        )
-                        .join(Users, Doctors.user_id == Users._id)
-                        .join(Departments, Doctors.department_id == Departments._id)
-                        .join(Schedules, Doctors._id == Schedules.doctor_id)
-                        .where(
-                            Schedules.day_of_week == day_of_week,
-                            Departments.department_name.ilike(f"%{specialty}%"),
-                        )
-                        .group_by(Doctors._id, Departments.department_name, Users.last_name, Users.first_name,
-                                  Users.second_name)
-                    )
-
-                    doctors_result = await session.execute(doctors_query)
-                    doctors = doctors_result.fetchall()
-
-                    if doctors:
-                        for doctor in doctors:
-                            doctor_id = doctor.doctor_id
-                            doctor_name = f"{doctor.last_name} {doctor.first_name} {doctor.second_name}"
-
-                            shift_query = await session.execute(
-                                select(Schedules)
-                                .options(selectinload(Schedules.shifts))
-                                .where(Schedules.doctor_id == doctor_id, Schedules.day_of_week == day_of_week)
-                            )
-                            schedule = shift_query.scalar()
-
-                            if not schedule or not schedule.shifts:
-                                continue
-
-                            booked_query = await session.execute(
-                                select(Talons.time)
-                                .where(Talons.doctor_id == doctor_id, Talons.date == search_date)
-                            )
-                            booked_slots = {row[0].strftime("%H:%M") for row in booked_query.all()}
-
-                            current_time = datetime.combine(search_date, schedule.shifts.start_time)
-                            end_time = datetime.combine(search_date, schedule.shifts.end_time)
-
-                            while current_time < end_time:
-                                slot_time = current_time.strftime("%H:%M")
-                                if slot_time not in booked_slots:
-                                    earliest_slots.append({
-                                        "doctor_id": doctor_id,
-                                        "doctor_name": doctor_name,
-                                        "date": search_date,
-                                        "time": slot_time
-                                    })
-                                    break
-                                current_time += timedelta(minutes=30)
-
-                    search_date += timedelta(days=1)
-
-                if earliest_slots:
-                    earliest_slot = min(earliest_slots, key=lambda x: (x["date"], x["time"]))
-
-                    response_data = {
-                        "complaint_id": complaint_id,
-                        "doctor": earliest_slot["doctor_name"],
-                        "date": earliest_slot["date"].strftime("%Y-%m-%d"),
-                        "time": earliest_slot["time"]
-                    }
-
-                    await redis_client.setex(f"slot:{complaint_id}", 300, json.dumps(response_data))
-
-                    producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-                    await producer.start()
-                    await producer.send_and_wait(RESPONSE_TOPIC, json.dumps(response_data).encode("utf-8"))
-                    await producer.stop()
-
-                else:
-                    response_data = {
-                        "complaint_id": complaint_id,
-                        "message": "No available slots found within the next 30 days."
-                    }
-                    producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-                    await producer.start()
-                    await producer.send_and_wait(ERROR_TOPIC, json.dumps(response_data).encode("utf-8"))
-                    await producer.stop()
+    async def search_free_slots(cls, session, specialty: str, today: date, max_days_ahead: int = 30):
+        last_date = today + timedelta(days=max_days_ahead)
+
+        shifts_result = await session.execute(
+            select(
+                Doctors._id.label("doctor_id"),
+                Users.last_name,
+                Users.first_name,
+                Users.second_name,
+                Schedules.days_mask,
+                Shifts.start_time,
+                Shifts.end_time,
+            )
+            .join(Users, Doctors.user_id == Users._id)
+            .join(Departments, Doctors.department_id == Departments._id)
+            .join(Schedules, Doctors._id == Schedules.doctor_id)
+            .join(Shifts, Schedules.shift_id == Shifts._id)
+            .where(Departments.department_name.ilike(f"%{specialty}%"))
+            .order_by(Doctors._id, Schedules._id)
+        )
+
+        doctor_names = {}
+        templates = {}
+        for row in shifts_result.all():
+            doctor_names[row.doctor_id] = f"{row.last_name} {row.first_name} {row.second_name}"
+            shift = ShiftSlots(row.start_time, row.end_time)
+            days = templates.setdefault(row.doctor_id, {})
+            for weekday in weekdays_of(row.days_mask):
+                days.setdefault(weekday, shift)
+
+        if not templates:
+            return iter(())
+
+        await leave_index.ensure_loaded()
+
+        booked_result = await session.execute(
+            select(Talons.doctor_id, Talons.date, Talons.time)
+            .where(Talons.doctor_id.in_(templates.keys()), Talons.date.between(today, last_date),
+                   Talons.status != TALON_DECLINED)
+        )
+        booked = {}
+        for row in booked_result.all():
+            shift = templates[row.doctor_id].get(row.date.weekday())
+            index = shift.index_of(row.time) if shift else None
+            if index is not None:
+                key = (row.doctor_id, row.date)
+                booked[key] = booked.get(key, 0) | 1 << index
+
+        return cls._iter_free_slots(doctor_names, templates, booked, today, last_date)
+
+    @staticmethod
+    def _iter_free_slots(doctor_names: dict, templates: dict, booked: dict, today: date, last_date: date):
+        search_date = today
+        while search_date <= last_date:
+            weekday = search_date.weekday()
+            day_slots = []
+            for doctor_id, days in templates.items():
+                shift = days.get(weekday)
+                if not shift or leave_index.is_on_leave(doctor_id, search_date):
+                    continue
+                for index in shift.free_indexes(booked.get((doctor_id, search_date), 0)):
+                    day_slots.append((shift.minute_of(index), doctor_id, shift.labels[index]))
+
+            for _, doctor_id, slot_time in sorted(day_slots):
+                yield {
+                    "doctor_id": doctor_id,
+                    "doctor_name": doctor_names[doctor_id],
+                    "date": search_date,
+                    "time": slot_time,
+                }
+            search_date += timedelta(days=1)
 
     @classmethod
-    async def consume_confirmations(cls):
-        consumer = AIOKafkaConsumer(CONFIRMATION_TOPIC, bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
-                                    group_id="clinic_group")
-        await consumer.start()
-
-        async for message in consumer:
-            data = json.loads(message.value.decode("utf-8"))
-            complaint_id = data.get("complaint_id")
-            confirmed = data.get("confirmed")
-            patient_id = data.get("patient_id")
+    async def handle_request(cls, data: dict, today: Optional[date] = None):
+        specialty = data.get("specialty")
+        complaint_id = data.get("complaint_id")
 
-            slot_data = await redis_client.get(f"slot:{complaint_id}")
+        async with async_session_maker() as session:
+            free_slots = await cls.search_free_slots(session, specialty, today or date.today())
+
+        # Слот, уже забронированный другим обращением, пропускаем и пробуем следующий.
+        for _, slot in zip(range(MAX_HOLD_ATTEMPTS), free_slots):
+            response_data = {
+                "complaint_id": complaint_id,
+                "doctor_id": slot["doctor_id"],
+                "doctor": slot["doctor_name"],
+                "date": slot["date"].strftime("%Y-%m-%d"),
+                "time": slot["time"]
+            }
+            if await slot_holds.hold(complaint_id, response_data):
+                await kafka_producer.send(RESPONSE_TOPIC, response_data)
+                return
+
+        response_data = {
+            "complaint_id": complaint_id,
+            "message": "No available slots found within the next 30 days."
+        }
+        await kafka_producer.send(ERROR_TOPIC, response_data)
 
-            if not slot_data:
+    @classmethod
+    async def handle_confirmation(cls, data: dict):
+        complaint_id = data.get("complaint_id")
+        confirmed = data.get("confirmed")
+        patient_id = data.get("patient_id")
+
+        if confirmed:
+            slot = await slot_holds.confirm(complaint_id)
+        else:
+            slot = await slot_holds.release(complaint_id)
+
+        if not slot:
+            error_data = {
+                "complaint_id": complaint_id,
+                "message": "ТАлон не найден или истекло время резервации."
+            }
+            await kafka_producer.send(ERROR_TOPIC, error_data)
+            return
+
+        if confirmed:
+            try:
+                async with async_session_maker() as session:
+                    async with session.begin():
+                        new_appointment = await cls.book_slot(
+                            session,
+                            doctor_id=slot["doctor_id"],
+                            date=datetime.strptime(slot["date"], "%Y-%m-%d").date(),
+                            time=datetime.strptime(slot["time"], "%H:%M").time(),
+                            patient_id=patient_id,
+                            status="confirmed"
+                        )
+            except Exception:
+                # Сообщение будет прочитано повторно (consume_batches не коммитит его) - бронь должна его дождаться.
+                await slot_holds.hold(complaint_id, slot)
+                raise
+            if not new_appointment:
                 error_data = {
                     "complaint_id": complaint_id,
-                    "message": "ТАлон не найден или истекло время резервации."
+                    "message": "Это время уже занято, выберите другой талон."
                 }
-                producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-                await producer.start()
-                await producer.send_and_wait(ERROR_TOPIC, json.dumps(error_data).encode("utf-8"))
-                await producer.stop()
-                continue
-
-            slot = json.loads(slot_data)
-
-            if confirmed:
-                async with async_session_maker() as session:
-                    new_appointment = Talons(
-                        doctor_id=slot["doctor_id"],
-                        date=datetime.strptime(slot["date"], "%Y-%m-%d").date(),
-                        time=datetime.strptime(slot["time"], "%H:%M").time(),
-                        patient_id=patient_id,
-                        status="confirmed"
-                    )
-                    session.add(new_appointment)
-                    await session.commit()
-
-                await redis_client.delete(f"slot:{complaint_id}")
+                await kafka_producer.send(ERROR_TOPIC, error_data)
+                return
+            await slot_availability.book(new_appointment.doctor_id, new_appointment.date, new_appointment.time)
+
+            response_data = {
+                "complaint_id": complaint_id,
+                "message": "Запись подтверждена!"
+            }
+            await kafka_producer.send(RESPONSE_TOPIC, response_data)
+
+        else:
+            response_data = {
+                "complaint_id": complaint_id,
+                "message": "Запись отменена."
+            }
+            await kafka_producer.send(RESPONSE_TOPIC, response_data)
 
-                response_data = {
-                    "complaint_id": complaint_id,
-                    "message": "Запись подтверждена!"
-                }
-                producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-                await producer.start()
-                await producer.send_and_wait(RESPONSE_TOPIC, json.dumps(response_data).encode("utf-8"))
-                await producer.stop()
+    @classmethod
+    async def consume_requests(cls, today: Optional[date] = None):
+        await cls._consume(REQUEST_TOPIC, lambda data: cls.handle_request(data, today), "consume_requests")
 
-            else:
-                await redis_client.delete(f"slot:{complaint_id}")
-                response_data = {
-                    "complaint_id": complaint_id,
-                    "message": "Запись отменена."
-                }
-                producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-                await producer.start()
-                await producer.send_and_wait(RESPONSE_TOPIC, json.dumps(response_data).encode("utf-8"))
-                await producer.stop()
+    @classmethod
+    async def consume_confirmations(cls):
+        await cls._consume(CONFIRMATION_TOPIC, cls.handle_confirmation, "consume_confirmations")
+
+    @staticmethod
+    async def _consume(topic: str, handle, name: str):
+        consumer = AIOKafkaConsumer(
+            topic,
+            bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
+            group_id="clinic_group",
+            enable_auto_commit=False,
+        )
+        await consumer.start()
+        meter = ThroughputMeter(name)
+
+        try:
+            await consume_batches(
+                consumer,
+                handle,
+                key=lambda value: value.get("complaint_id"),
+                deserialize=lambda value: json.loads(value.decode("utf-8")),
+                before_commit=kafka_producer.flush,
+                on_batch=meter.tick,
+            )
+        finally:
+            await consumer.stop()
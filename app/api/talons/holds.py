@@ -0,0 +1,160 @@
+import json
+import time
+from typing import Optional
+
+from redis import asyncio as aioredis
+
+from clinicApp.app.core.config import settings
+
+# Скрипты трогают только ключи из KEYS. Прежний ключ слота клиент читает из брони заранее и передаёт
+# в KEYS; если бронь успела измениться, скрипт возвращает STALE и клиент повторяет вызов.
+STALE = -1
+
+# KEYS[1] - бронь обращения (hash: slot, claim), KEYS[2] - ключ нового слота,
+# KEYS[3] - ключ слота, записанный в брони (KEYS[2], если брони нет); ARGV: payload, ttl, complaint_id
+HOLD_SCRIPT = """
+if (redis.call('HGET', KEYS[1], 'claim') or KEYS[2]) ~= KEYS[3] then
+    return -1
+end
+local owner = redis.call('GET', KEYS[2])
+if owner and owner ~= ARGV[3] then
+    return 0
+end
+if KEYS[3] ~= KEYS[2] and redis.call('GET', KEYS[3]) == ARGV[3] then
+    redis.call('DEL', KEYS[3])
+end
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[2])
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'slot', ARGV[1], 'claim', KEYS[2])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# KEYS[1] - бронь обращения, KEYS[2] - ключ слота из брони; ARGV[1] - complaint_id.
+# Забирает бронь и снимает блокировку слота.
+TAKE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'claim') ~= KEYS[2] then
+    return -1
+end
+local payload = redis.call('HGET', KEYS[1], 'slot')
+redis.call('DEL', KEYS[1])
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+return payload
+"""
+
+
+def hold_key(complaint_id) -> str:
+    return f"slot:{complaint_id}"
+
+
+def claim_key(slot: dict) -> str:
+    return f"slot_claim:{slot['doctor_id']}:{slot['date']}:{slot['time']}"
+
+
+class RedisSlotHoldStore:
+    """Брони слотов в Redis: каждая операция - чтение ключа слота из брони и один вызов Lua-скрипта."""
+
+    def __init__(self, client: aioredis.Redis):
+        self._client = client
+        self._hold = self._client.register_script(HOLD_SCRIPT)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, max_connections: int) -> "RedisSlotHoldStore":
+        return cls(aioredis.Redis.from_url(url, max_connections=max_connections, decode_responses=True))
+
+    async def hold(self, complaint_id, slot: dict, ttl: int = settings.SLOT_HOLD_TTL) -> bool:
+        key, claim = hold_key(complaint_id), claim_key(slot)
+        while True:
+            previous = await self._client.hget(key, "claim")
+            held = await self._hold(
+                keys=[key, claim, previous or claim],
+                args=[json.dumps(slot), ttl, str(complaint_id)],
+            )
+            if held != STALE:
+                return bool(held)
+
+    async def confirm(self, complaint_id) -> Optional[dict]:
+        key = hold_key(complaint_id)
+        while True:
+            claim = await self._client.hget(key, "claim")
+            if not claim:
+                return None
+            payload = await self._take(keys=[key, claim], args=[str(complaint_id)])
+            if payload != STALE:
+                return json.loads(payload) if payload else None
+
+    async def release(self, complaint_id) -> Optional[dict]:
+        return await self.confirm(complaint_id)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class InMemorySlotHoldStore:
+    """Брони слотов в памяти процесса - для тестов и запуска на одном узле без Redis."""
+
+    def __init__(self):
+        self._holds: dict[str, tuple[str, dict, float]] = {}
+        self._claims: dict[str, tuple[str, float]] = {}
+        self._operations = 0
+
+    def _sweep(self, now: float):
+        self._holds = {key: value for key, value in self._holds.items() if value[2] > now}
+        self._claims = {key: value for key, value in self._claims.items() if value[1] > now}
+
+    async def hold(self, complaint_id, slot: dict, ttl: int = settings.SLOT_HOLD_TTL) -> bool:
+        now = time.monotonic()
+        self._operations += 1
+        if self._operations % 1000 == 0:
+            self._sweep(now)
+
+        owner = str(complaint_id)
+        key, claim = hold_key(complaint_id), claim_key(slot)
+        claimed = self._claims.get(claim)
+        if claimed and claimed[1] > now and claimed[0] != owner:
+            return False
+
+        previous = self._holds.get(key)
+        if previous and previous[0] != claim and self._claims.get(previous[0], ("",))[0] == owner:
+            del self._claims[previous[0]]
+
+        expires = now + ttl
+        self._claims[claim] = (owner, expires)
+        self._holds[key] = (claim, slot, expires)
+        return True
+
+    async def confirm(self, complaint_id) -> Optional[dict]:
+        held = self._holds.pop(hold_key(complaint_id), None)
+        if not held:
+            return None
+        claim, slot, expires = held
+        if self._claims.get(claim, ("",))[0] == str(complaint_id):
+            del self._claims[claim]
+        return slot if expires > time.monotonic() else None
+
+    async def release(self, complaint_id) -> Optional[dict]:
+        return await self.confirm(complaint_id)
+
+    async def close(self):
+        self._holds.clear()
+        self._claims.clear()
+
+
+def create_slot_hold_store():
+    """
+    SLOT_HOLD_STORE=redis (по умолчанию) - брони в Redis по REDIS_URL, общие для всех процессов;
+    SLOT_HOLD_STORE=memory - брони в памяти процесса, только для тестов и запуска в один процесс.
+    """
+    if settings.SLOT_HOLD_STORE == "memory":
+        return InMemorySlotHoldStore()
+    if settings.SLOT_HOLD_STORE != "redis":
+        raise ValueError(f"Unknown SLOT_HOLD_STORE: {settings.SLOT_HOLD_STORE}")
+    if not settings.REDIS_URL:
+        raise ValueError("SLOT_HOLD_STORE=redis requires REDIS_URL")
+    return RedisSlotHoldStore.from_url(settings.REDIS_URL, settings.REDIS_MAX_CONNECTIONS)
+
+
+slot_holds = create_slot_hold_store()
@@ -1,27 +1,34 @@
-import os
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
-from aiokafka import AIOKafkaProducer
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
 
 from clinicApp.app.api.doctors.schemas import DoctorResponseSchema
+from clinicApp.app.api.pagination import Page
+from clinicApp.app.api.talons.availability import slot_availability
 from clinicApp.app.api.talons.dao import AppointmentsDAO
 from clinicApp.app.api.talons.schema import AvailableSlotsResponse, AppointmentCreate, DoctorAppointmentsResponse, \
-    AppointmentResponse
+    AppointmentResponse, AppointmentBulkCreate, AppointmentBulkResult
 from clinicApp.app.schemas.schemas import TalonSchema
 
 router = APIRouter(prefix='/appointments', tags=['Appointments'])
 
-KAFKA_BOOTSTRAP_SERVERS =  os.getenv("KAFKA_BOOTSTRAP_SERVERS")
+MAX_BULK_APPOINTMENTS = 1000
 
-
-producer = AIOKafkaProducer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS)
-
-@router.get("/get_all", response_model=list[AppointmentResponse], summary="Получить все записи")
+@router.get("/get_all", response_model=Page[AppointmentResponse], summary="Получить все записи")
 async def find_appointments(doctor_name: Optional[str] = None, from_date: Optional[date] = None,
+            to_date: Optional[date] = None, status: Optional[str] = None,
+            limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    return await AppointmentsDAO.find_all(doctor_name, from_date, to_date, status, limit, cursor)
+
+@router.get("/get_all/stream", summary="Выгрузить все записи построчно (NDJSON)")
+async def stream_appointments(doctor_name: Optional[str] = None, from_date: Optional[date] = None,
             to_date: Optional[date] = None, status: Optional[str] = None):
-    return await AppointmentsDAO.find_all(doctor_name, from_date, to_date, status)
+    async def lines():
+        async for appointment in AppointmentsDAO.stream_all(doctor_name, from_date, to_date, status):
+            yield appointment.model_dump_json() + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @router.get("/get_for_doctor", response_model=list[TalonSchema], summary='Получить для врача все будущие записи к нему')
 async def get_talon(doctor_id: int = Query(...)):
@@ -29,12 +36,27 @@ async def get_talon(doctor_id: int = Query(...)):
 
 @router.get("/slots", response_model=AvailableSlotsResponse)
 async def get_available_slots(doctor_id: int, date: str):
-    return await AppointmentsDAO.get_available_slots(doctor_id, date)
+    date_obj = datetime.strptime(date, "%Y-%m-%d").date()
+    return {"available_slots": await slot_availability.get_available_slots(doctor_id, date_obj)}
+
+@router.get("/slots/stats", summary='Статистика кэша свободных слотов')
+async def get_slots_cache_stats():
+    return slot_availability.stats()
 
 
 @router.post("/add", response_model=TalonSchema)
 async def patient_book_appointment(data: AppointmentCreate, patient_id: int = Query(...), ):
-    return await AppointmentsDAO.create_appointment(data, patient_id)
+    appointment = await AppointmentsDAO.create_appointment(data, patient_id)
+    if not appointment:
+        raise HTTPException(status_code=409, detail="Это время у врача уже занято")
+    return appointment
+
+
+@router.post("/add_bulk", response_model=list[AppointmentBulkResult], summary='Массовая запись на приём')
+async def book_appointments_bulk(data: list[AppointmentBulkCreate]):
+    if len(data) > MAX_BULK_APPOINTMENTS:
+        raise HTTPException(status_code=422, detail=f"Не более {MAX_BULK_APPOINTMENTS} записей за один запрос")
+    return await AppointmentsDAO.create_appointments_bulk(data)
 
 
 @router.put("/update", response_model=TalonSchema)
@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import Optional, Literal
 
 from pydantic import BaseModel
 from datetime import time, date
 
+from clinicApp.app.schemas.schemas import TalonSchema
+
 
 class AppointmentCreate(BaseModel):
     doctor_id: int
@@ -10,6 +12,14 @@ class AppointmentCreate(BaseModel):
     time: time
     service_id: int
 
+class AppointmentBulkCreate(AppointmentCreate):
+    patient_id: int
+
+class AppointmentBulkResult(BaseModel):
+    index: int
+    status: Literal["created", "conflict", "invalid"]
+    appointment: Optional[TalonSchema] = None
+
 class AvailableSlotsResponse(BaseModel):
     available_slots: list[str]
 
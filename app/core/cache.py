@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Словарь ограниченного размера: при переполнении вытесняется давно не читанный ключ."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def peek(self, key, default=None):
+        """Чтение без учёта в статистике и без изменения порядка вытеснения."""
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def keys(self):
+        return list(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
+
+
+class VersionedPayloadCache:
+    """
+    Готовые тела ответов, привязанные к версии данных.
+
+    bump() вызывается после каждого изменения данных: ответы, собранные для старой версии,
+    больше не отдаются. Ответ, собранный во время изменения, не сохраняется.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.version = 0
+        self._payloads = LRUCache(capacity)
+
+    async def current_version(self) -> int:
+        return self.version
+
+    async def bump(self):
+        self.version += 1
+
+    async def get_or_build(self, key, build) -> tuple[str, bytes]:
+        """Возвращает (etag, body); build - корутина без аргументов, возвращающая тело ответа."""
+        version = await self.current_version()
+        cached = self._payloads.get(key)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+
+        body = await build()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.version == version:
+            self._payloads.set(key, (version, etag, body))
+        return etag, body
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self._payloads.stats()}
+
+
+class TTLCache:
+    """
+    Значения живут ttl секунд; не больше capacity ключей (вытесняются давно не читанные).
+    Одновременные промахи по одному ключу ждут одну общую загрузку.
+    """
+
+    def __init__(self, ttl: float, capacity: int = 10000):
+        self.ttl = ttl
+        self._entries = LRUCache(capacity)
+        self._inflight: dict = {}
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries.set(key, (time.monotonic() + self.ttl, value))
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key)
+        return entry[1] if entry else default
+
+    async def get_or_load(self, key, load):
+        """load - корутина без аргументов, вызывается только при отсутствии живого значения."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, load))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key, load):
+        try:
+            value = await load()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+import asyncpg
+from sqlalchemy import text
+
+from clinicApp.app.core.config import settings
+from clinicApp.app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "clinic_changes"
+RECONNECT_DELAY = 5
+
+# Обработчик получает данные сообщения или None - "сбросить всё".
+Handler = Callable[[Optional[str]], Awaitable[None]]
+
+
+class ChangeFeed:
+    """
+    Рассылка изменений между процессами приложения через LISTEN/NOTIFY Postgres.
+
+    Сообщение - "тема:процесс:данные". Процесс, сделавший изменение, обновляет свой кэш сам,
+    подписчики темы вызываются только в остальных процессах. Уведомления, пришедшие за время
+    разрыва соединения, теряются, поэтому после переподключения все подписчики получают None.
+    """
+
+    def __init__(self):
+        self.origin = uuid4().hex[:12]
+        self.connected = asyncio.Event()
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._pending: set[asyncio.Task] = set()
+
+    def subscribe(self, topic: str, handler: Handler):
+        self._handlers[topic].append(handler)
+
+    async def publish(self, topic: str, *payloads: str):
+        """Одно сообщение на каждый payload (без payload - одно пустое); рассылка одним запросом."""
+        messages = [f"{topic}:{self.origin}:{payload}" for payload in payloads or ("",)]
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("SELECT pg_notify(:channel, message) FROM unnest(CAST(:messages AS text[])) AS message"),
+                    {"channel": CHANNEL, "messages": messages},
+                )
+        except Exception:
+            # Изменение уже сохранено - ошибка рассылки не должна превращать запрос в 500.
+            logger.exception("Не удалось разослать изменение %s", topic)
+
+    async def dispatch(self, message: Optional[str]):
+        if message is None:
+            calls = [(handler, None) for handlers in self._handlers.values() for handler in handlers]
+        else:
+            topic, origin, payload = message.split(":", 2)
+            if origin == self.origin:
+                return
+            calls = [(handler, payload) for handler in self._handlers.get(topic, ())]
+        for handler, payload in calls:
+            try:
+                await handler(payload)
+            except Exception:
+                logger.exception("Не удалось обработать изменение %s", message)
+
+    def _on_notify(self, connection, pid, channel, message):
+        task = asyncio.create_task(self.dispatch(message))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def listen(self):
+        """Держит отдельное соединение с LISTEN; запускается фоновой задачей в lifespan."""
+        reconnect = False
+        while True:
+            try:
+                connection = await asyncpg.connect(
+                    user=settings.DB_USER, password=settings.DB_PASSWORD, host=settings.DB_HOST,
+                    port=settings.DB_PORT, database=settings.DB_NAME,
+                )
+            except Exception:
+                logger.exception("Не удалось подключиться для LISTEN %s", CHANNEL)
+                await asyncio.sleep(RECONNECT_DELAY)
+                reconnect = True
+                continue
+
+            try:
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                self.connected.set()
+                if reconnect:
+                    await self.dispatch(None)
+                await closed.wait()
+                logger.warning("Соединение LISTEN %s закрыто, переподключение", CHANNEL)
+            finally:
+                self.connected.clear()
+                await connection.close()
+            reconnect = True
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+changes = ChangeFeed()
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -15,6 +16,25 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
     SALT: str = os.getenv("SALT")
+    KAFKA_BOOTSTRAP_SERVERS: Optional[str] = os.getenv("KAFKA_BOOTSTRAP_SERVERS")
+    KAFKA_LINGER_MS: int = int(os.getenv("KAFKA_LINGER_MS", 5))
+    KAFKA_MAX_BATCH_SIZE: int = int(os.getenv("KAFKA_MAX_BATCH_SIZE", 16384))
+    KAFKA_MAX_POLL_RECORDS: int = int(os.getenv("KAFKA_MAX_POLL_RECORDS", 200))
+    KAFKA_CONSUMER_CONCURRENCY: int = int(os.getenv("KAFKA_CONSUMER_CONCURRENCY", 16))
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    SLOT_CACHE_SIZE: int = int(os.getenv("SLOT_CACHE_SIZE", 100000))
+    SLOT_HOLD_STORE: str = os.getenv("SLOT_HOLD_STORE", "redis")
+    SLOT_HOLD_TTL: int = int(os.getenv("SLOT_HOLD_TTL", 300))
+    DASHBOARD_CACHE_TTL: float = float(os.getenv("DASHBOARD_CACHE_TTL", 5))
+    CHAT_HISTORY_LIMIT: int = int(os.getenv("CHAT_HISTORY_LIMIT", 100))
+    CHAT_SEND_QUEUE_SIZE: int = int(os.getenv("CHAT_SEND_QUEUE_SIZE", 100))
+    VISIT_COUNTERS_REFRESH_INTERVAL: float = float(os.getenv("VISIT_COUNTERS_REFRESH_INTERVAL", 60))
+    PARTITION_MONTHS_AHEAD: int = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+    REQUEST_TOPIC: Optional[str] = os.getenv("REQUEST_TOPIC")
+    RESPONSE_TOPIC: Optional[str] = os.getenv("RESPONSE_TOPIC")
+    CONFIRMATION_TOPIC: Optional[str] = os.getenv("CONFIRMATION_TOPIC")
+    ERROR_TOPIC: Optional[str] = os.getenv("ERROR_TOPIC")
 
     def get_db_url(self):
         return (f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@"
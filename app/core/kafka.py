@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Callable, Awaitable, Any
+
+from aiokafka import AIOKafkaProducer
+
+from clinicApp.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class KafkaProducerManager:
+    """
+    Один AIOKafkaProducer на процесс. Запускается и останавливается в lifespan приложения,
+    сообщения копятся в батчи в течение KAFKA_LINGER_MS и досылаются при остановке.
+    """
+
+    def __init__(self):
+        self._producer: Optional[AIOKafkaProducer] = None
+
+    async def start(self):
+        if self._producer is not None:
+            return
+        self._producer = AIOKafkaProducer(
+            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            linger_ms=settings.KAFKA_LINGER_MS,
+            max_batch_size=settings.KAFKA_MAX_BATCH_SIZE,
+            value_serializer=lambda value: json.dumps(value).encode("utf-8"),
+        )
+        await self._producer.start()
+
+    async def stop(self):
+        if self._producer is None:
+            return
+        try:
+            await self._producer.flush()
+        finally:
+            await self._producer.stop()
+            self._producer = None
+
+    def _get(self) -> AIOKafkaProducer:
+        if self._producer is None:
+            raise RuntimeError("Kafka producer is not started")
+        return self._producer
+
+    async def send(self, topic: str, payload: dict):
+        # Сообщение ставится в буфер продюсера, доставка - вместе с остальными сообщениями батча.
+        await self._get().send(topic, payload)
+
+    async def send_and_wait(self, topic: str, payload: dict):
+        await self._get().send_and_wait(topic, payload)
+
+    async def flush(self):
+        await self._get().flush()
+
+
+kafka_producer = KafkaProducerManager()
+
+
+async def consume_batches(
+        consumer,
+        handle: Callable[[Any], Awaitable[None]],
+        key: Callable[[Any], Any],
+        deserialize: Optional[Callable[[bytes], Any]] = None,
+        concurrency: int = settings.KAFKA_CONSUMER_CONCURRENCY,
+        max_records: int = settings.KAFKA_MAX_POLL_RECORDS,
+        before_commit: Optional[Callable[[], Awaitable[None]]] = None,
+        on_batch: Optional[Callable[[int], None]] = None,
+        retry_delay: float = 1,
+):
+    """
+    Читает сообщения пачками через getmany и обрабатывает их параллельно, не более concurrency
+    групп одновременно. Сообщения с одинаковым ключом (key от разобранного значения) обрабатываются
+    последовательно в порядке поступления. Смещения коммитятся только после обработки всей пачки.
+    Сообщения, которые не удалось разобрать или получить для них ключ, пропускаются с записью в лог.
+
+    Если обработчик упал, остальные сообщения этого ключа в пачке не обрабатываются, смещение партиции
+    коммитится только до первого необработанного сообщения, и чтение партиции возвращается к нему:
+    сообщение будет прочитано повторно (обработчики должны переносить повторную доставку).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_group(records, failed: dict):
+        async with semaphore:
+            for position, (tp, message, value) in enumerate(records):
+                try:
+                    await handle(value)
+                except Exception:
+                    logger.exception("Failed to handle message %s:%s@%s",
+                                     message.topic, message.partition, message.offset)
+                    for pending_tp, pending, _ in records[position:]:
+                        failed[pending_tp] = min(failed.get(pending_tp, pending.offset), pending.offset)
+                    return
+
+    while True:
+        batch = await consumer.getmany(timeout_ms=1000, max_records=max_records)
+        groups = {}
+        offsets = {}
+        count = 0
+        for tp, messages in batch.items():
+            for message in messages:
+                count += 1
+                offsets[tp] = message.offset + 1
+                try:
+                    value = deserialize(message.value) if deserialize else message.value
+                    group = key(value)
+                except Exception:
+                    logger.exception("Skipping malformed message %s:%s@%s",
+                                     message.topic, message.partition, message.offset)
+                    continue
+                groups.setdefault(group, []).append((tp, message, value))
+        if not count:
+            continue
+
+        failed = {}
+        await asyncio.gather(*(run_group(records, failed) for records in groups.values()))
+        if before_commit:
+            await before_commit()
+        await consumer.commit({**offsets, **failed})
+        for tp, offset in failed.items():
+            consumer.seek(tp, offset)
+        if on_batch:
+            on_batch(count)
+        if failed:
+            await asyncio.sleep(retry_delay)
@@ -0,0 +1,24 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ThroughputMeter:
+    """Считает обработанные сообщения и раз в interval секунд пишет в лог скорость (сообщений/сек)."""
+
+    def __init__(self, name: str, interval: float = 10.0):
+        self.name = name
+        self.interval = interval
+        self.total = 0
+        self._count = 0
+        self._started = time.monotonic()
+
+    def tick(self, count: int = 1):
+        self.total += count
+        self._count += count
+        elapsed = time.monotonic() - self._started
+        if elapsed >= self.interval:
+            logger.info("%s: %.1f msg/s (%d total)", self.name, self._count / elapsed, self.total)
+            self._count = 0
+            self._started = time.monotonic()
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import Table, text
+
+from clinicApp.app.core.config import settings
+from clinicApp.app.core.database import engine
+from clinicApp.app.models.models import Talons, MedicalCards
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES: tuple[Table, ...] = (Talons.__table__, MedicalCards.__table__)
+MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+async def _create_partition(conn, table: Table, month: date):
+    name = partition_name(table.name, month)
+    columns = ", ".join(column.name for column in table.columns if column.computed is None)
+    bounds = {"start": month, "end": add_months(month, 1)}
+
+    # Строки этого месяца, попавшие в DEFAULT-секцию, не дают создать секцию - переносим их в новую.
+    await conn.execute(text(f"CREATE TEMP TABLE partition_rows (LIKE {table.name})"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table.name}_default WHERE date >= :start AND date < :end "
+        f"RETURNING {columns}) INSERT INTO partition_rows ({columns}) SELECT {columns} FROM moved"
+    ), bounds)
+    await conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table.name} "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    await conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM partition_rows"))
+    await conn.execute(text("DROP TABLE partition_rows"))
+
+
+async def ensure_monthly_partitions(months_ahead: int = settings.PARTITION_MONTHS_AHEAD):
+    """
+    Создаёт помесячные секции talons и medical_cards от текущего месяца на months_ahead вперёд.
+    Уже существующие секции не трогает, поэтому безопасна при каждом запуске.
+    """
+    first = date.today().replace(day=1)
+    months = [add_months(first, offset) for offset in range(months_ahead + 1)]
+
+    for table in PARTITIONED_TABLES:
+        async with engine.begin() as conn:
+            # Несколько процессов приложения стартуют одновременно - секции создаёт только один.
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table.name})
+            existing = set((await conn.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+            ), {"table": table.name})).scalars())
+
+            for month in months:
+                if partition_name(table.name, month) not in existing:
+                    await _create_partition(conn, table, month)
+
+
+async def maintain_partitions(interval: float = MAINTENANCE_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await ensure_monthly_partitions()
+        except Exception:
+            logger.exception("Не удалось создать секции talons/medical_cards")
@@ -0,0 +1,22 @@
+from clinicApp.app.core.cache import VersionedPayloadCache
+from clinicApp.app.core.changes import changes
+
+
+class SharedVersionedPayloadCache(VersionedPayloadCache):
+    """
+    Версия данных в памяти процесса, а bump() рассылается остальным процессам через changes:
+    изменение в одном воркере делает устаревшими готовые ответы во всех. Чтение версии
+    (в том числе для ответа 304) в базу не обращается.
+    """
+
+    def __init__(self, name: str, capacity: int = 256):
+        super().__init__(capacity)
+        self.name = name
+        changes.subscribe(name, self._on_change)
+
+    async def _on_change(self, payload):
+        await super().bump()
+
+    async def bump(self):
+        await super().bump()
+        await changes.publish(self.name)
@@ -0,0 +1,53 @@
+from datetime import date
+
+from fastapi import HTTPException
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def weekday_bit(day: date) -> int:
+    return 1 << day.weekday()
+
+
+def days_mask(names) -> int:
+    """Маска дней недели по названиям (регистр не важен); бит i - день date.weekday() == i."""
+    mask = 0
+    for name in names:
+        mask |= 1 << WEEKDAYS.index(name.strip().capitalize())
+    return mask
+
+
+def normalize_days(names) -> list[str]:
+    """Проверка списка дней из запроса: непустой, только известные названия; порядок - с понедельника."""
+    try:
+        mask = days_mask(names)
+    except ValueError:
+        mask = 0
+    if not mask:
+        raise HTTPException(
+            status_code=422, detail=f"Days of week should be from: {', '.join(WEEKDAYS)}"
+        )
+    return day_names(mask)
+
+
+def weekdays_of(mask: int) -> list[int]:
+    return [weekday for weekday in range(len(WEEKDAYS)) if mask >> weekday & 1]
+
+
+def day_names(mask: int) -> list[str]:
+    return [WEEKDAYS[weekday] for weekday in weekdays_of(mask)]
+
+
+def matching_days_mask(fragment: str) -> int:
+    """Маска дней, в названии которых встречается fragment - для поиска по части названия."""
+    fragment = fragment.strip().casefold()
+    return sum(1 << weekday for weekday, name in enumerate(WEEKDAYS) if fragment in name.casefold())
+
+
+def has_days(column, mask: int):
+    return column.op("&")(mask) != 0
+
+
+def first_day(column):
+    # Младший установленный бит: сортировка по нему упорядочивает расписания по первому дню недели.
+    return column.op("&")(-column)
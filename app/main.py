@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,8 +14,60 @@ from clinicApp.app.api.doctor_leaves.router import router as leaves_router
 from clinicApp.app.api.schedule.router import router as schedule_router
 from clinicApp.app.api.talons.router import router as talons_router
 from clinicApp.app.api.chat.router_socket import router as chat_router
+from clinicApp.app.api.doctor_leaves.leave_index import leave_index
+from clinicApp.app.api.doctors.directory import doctor_directory
+from clinicApp.app.api.talons.availability import slot_availability
+from clinicApp.app.api.talons.dao import AppointmentsDAO
+from clinicApp.app.api.talons.holds import slot_holds
+from clinicApp.app.core.changes import changes
+from clinicApp.app.core.config import settings
+from clinicApp.app.core.kafka import kafka_producer
+from clinicApp.app.core.partitions import ensure_monthly_partitions, maintain_partitions
+
+logger = logging.getLogger(__name__)
+
+
+def log_worker_failure(task: asyncio.Task):
+    # Фоновая задача завершилась с ошибкой - без этого она всплыла бы только при отмене в конце lifespan.
+    if not task.cancelled() and task.exception():
+        logger.error("Background worker %s failed", task.get_name(), exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_monthly_partitions()
+    # Подписка на изменения других воркеров - до загрузки кэшей, чтобы не пропустить изменения между ними.
+    listener = asyncio.create_task(changes.listen(), name="listen_changes")
+    await changes.connected.wait()
+    await slot_availability.load()
+    await doctor_directory.load()
+    await leave_index.load()
+
+    workers = [
+        listener,
+        asyncio.create_task(maintain_partitions(), name="maintain_partitions"),
+        asyncio.create_task(AppointmentsDAO.maintain_doctor_visits(), name="maintain_doctor_visits"),
+    ]
+    if settings.KAFKA_BOOTSTRAP_SERVERS:
+        await kafka_producer.start()
+        workers += [
+            asyncio.create_task(AppointmentsDAO.consume_requests(), name="consume_requests"),
+            asyncio.create_task(AppointmentsDAO.consume_confirmations(), name="consume_confirmations"),
+        ]
+
+    for worker in workers:
+        worker.add_done_callback(log_worker_failure)
+
+    yield
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await kafka_producer.stop()
+    await slot_holds.close()
+
 
-app = FastAPI(openapi_url="/api/v1/clinic/openapi.json", docs_url="/api/v1/clinic/docs")
+app = FastAPI(lifespan=lifespan, openapi_url="/api/v1/clinic/openapi.json", docs_url="/api/v1/clinic/docs")
 
 app.add_middleware(
     CORSMiddleware,
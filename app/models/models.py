@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, Time, DateTime, String, ForeignKey, SmallInteger, Float, Date
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, Time, DateTime, String, ForeignKey, SmallInteger, Float, Date, Index, text, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declarative_base, relationship, deferred
 
 from clinicApp.app.core.database import engine, Base
 
@@ -15,6 +16,15 @@ class Roles(Base):
 
 class Users(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Триграммные индексы для поиска по ФИО (ILIKE '%...%'), требуют расширения pg_trgm.
+        Index('ix_users_last_name_trgm', 'last_name', postgresql_using='gin',
+              postgresql_ops={'last_name': 'gin_trgm_ops'}),
+        Index('ix_users_first_name_trgm', 'first_name', postgresql_using='gin',
+              postgresql_ops={'first_name': 'gin_trgm_ops'}),
+        Index('ix_users_second_name_trgm', 'second_name', postgresql_using='gin',
+              postgresql_ops={'second_name': 'gin_trgm_ops'}),
+    )
 
     _id = Column(Integer, primary_key=True)
     login = Column(String, unique=True)
@@ -113,25 +123,49 @@ class Education(Base):
     doctors = relationship('Doctors', back_populates='education')
 
 
+# Диагноз важнее жалоб, жалобы важнее осмотра; каждое поле индексируется русской и английской конфигурацией.
+MEDICAL_CARD_SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+    for column, weight in (("diagnosis", "A"), ("complaints", "B"), ("wellness_check", "C"))
+    for config in ("russian", "english")
+)
+
+
 class MedicalCards(Base):
     __tablename__ = 'medical_cards'
+    __table_args__ = (
+        Index('ix_medical_cards_search_vector', 'search_vector', postgresql_using='gin'),
+        # Ленты записей: WHERE doctor_id/patient_id = ? ORDER BY date DESC, _id DESC - обратный проход индекса.
+        Index('ix_medical_cards_doctor_id_date_id', 'doctor_id', 'date', '_id'),
+        Index('ix_medical_cards_patient_id_date_id', 'patient_id', 'date', '_id'),
+        # Помесячные секции по date, см. core/partitions.py; ключ секционирования входит в первичный ключ.
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
     _id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True)
     complaints = Column(String, nullable=False)
     wellness_check = Column(String, nullable=False)
     diagnosis = Column(String, nullable=False)
+    search_vector = deferred(Column(TSVECTOR, Computed(MEDICAL_CARD_SEARCH_VECTOR, persisted=True)))
     doctor_id = Column(Integer, ForeignKey('doctors._id', ondelete='CASCADE'))
     doctors = relationship('Doctors', back_populates='medical_cards')
     patient_id = Column(Integer, ForeignKey('patients._id', ondelete='CASCADE'))
     patients = relationship('Patients', back_populates='medical_cards')
 
+    __mapper_args__ = {'primary_key': [_id]}
+
 
 class Schedules(Base):
     __tablename__ = 'schedules'
+    __table_args__ = (
+        # Условие days_mask & bit <> 0 индексом не обслуживается - индексируется только doctor_id.
+        Index('ix_schedules_doctor_id', 'doctor_id'),
+    )
 
     _id = Column(Integer, primary_key=True, autoincrement=True)
-    day_of_week = Column(String, nullable=False)
+    # Битовая маска дней недели: бит i - день с date.weekday() == i (0 - понедельник).
+    days_mask = Column(SmallInteger, nullable=False)
     doctor_id = Column(Integer, ForeignKey('doctors._id'))
     shift_id = Column(Integer, ForeignKey('shifts._id'))
     doctors = relationship('Doctors', back_populates='schedules')
@@ -147,11 +181,24 @@ class Shifts(Base):
     schedules = relationship('Schedules', back_populates='shifts')
 
 
+# Отклонённый талон слот не занимает: не входит в уникальный индекс и не считается занятым при поиске слотов.
+TALON_DECLINED = 'declined'
+
+
 class Talons(Base):
     __tablename__ = 'talons'
+    __table_args__ = (
+        # Один активный талон на слот врача; отклонённые талоны слот не занимают.
+        Index('uq_talons_doctor_slot', 'doctor_id', 'date', 'time', unique=True,
+              postgresql_where=text(f"status <> '{TALON_DECLINED}'")),
+        Index('ix_talons_doctor_id_date', 'doctor_id', 'date'),
+        Index('ix_talons_patient_id_date', 'patient_id', 'date'),
+        # Помесячные секции по date, см. core/partitions.py; ключ секционирования входит в первичный ключ.
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
     _id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True)
     time = Column(Time, nullable=False)
     status = Column(String, nullable=False)
     patient_id = Column(Integer, ForeignKey('patients._id', ondelete='CASCADE'))
@@ -161,6 +208,25 @@ class Talons(Base):
     doctors = relationship('Doctors', back_populates='talons')
     services = relationship('Services', back_populates='talons')
 
+    __mapper_args__ = {'primary_key': [_id]}
+
+
+class DoctorVisitCounters(Base):
+    """Число талонов врача. Периодически пересчитывается из patient_doctor_visits (AppointmentsDAO.roll_up_doctor_visits)."""
+    __tablename__ = 'doctor_visit_counters'
+
+    doctor_id = Column(Integer, ForeignKey('doctors._id', ondelete='CASCADE'), primary_key=True)
+    visits = Column(Integer, nullable=False, default=0)
+
+
+class PatientDoctorVisits(Base):
+    """Число талонов пациента к врачу. Ведётся триггером на talons."""
+    __tablename__ = 'patient_doctor_visits'
+
+    patient_id = Column(Integer, ForeignKey('patients._id', ondelete='CASCADE'), primary_key=True)
+    doctor_id = Column(Integer, ForeignKey('doctors._id', ondelete='CASCADE'), primary_key=True)
+    visits = Column(Integer, nullable=False, default=0)
+
 
 class ChatMessages(Base):
     __tablename__ = 'chat_messages'
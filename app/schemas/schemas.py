@@ -6,6 +6,8 @@ from typing import Optional, List
 
 from typing_extensions import Annotated
 
+from clinicApp.app.core.weekdays import normalize_days
+
 LETTER_MATCH_PATTERN = re.compile(r"^[а-яА-Яa-zA-Z\-]+$")
 
 
@@ -73,6 +75,17 @@ class DoctorSchema(BaseSchema):
     department_id: int
 
 
+class UserListSchema(BaseSchema):
+    """Пользователь в списках: без пароля и без проверок входных данных."""
+    login: str
+    first_name: str
+    last_name: str
+    second_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    gender: Optional[str] = None
+    role_id: int
+
+
 class AddressSchema(BaseSchema):
     country: str = Field(min_length=3, max_length=100)
     city: str = Field(min_length=3, max_length=100)
@@ -114,10 +127,14 @@ class MedicalCardSchema(BaseSchema):
 
 
 class ScheduleSchema(BaseSchema):
-    day_of_week: str
+    days_of_week: List[str]
     doctor_id: int
     shift_id: int
 
+    @field_validator('days_of_week')
+    def validate_days_of_week(cls, value):
+        return normalize_days(value)
+
 
 class ShiftSchema(BaseSchema):
     start_time: time
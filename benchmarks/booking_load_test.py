@@ -0,0 +1,63 @@
+"""
+Нагрузочный тест записи на приём: сотни конкурентных вызовов create_appointment на небольшое
+число слотов одного врача. Проверяет отсутствие двойных записей и печатает задержки.
+Созданные талоны удаляются после прогона.
+
+    python -m clinicApp.benchmarks.booking_load_test --doctor-id 1 --patient-id 1 --service-id 1 --date 2030-01-07
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, delete
+
+from clinicApp.app.api.talons.dao import AppointmentsDAO
+from clinicApp.app.api.talons.schema import AppointmentCreate
+from clinicApp.app.core.database import async_session_maker
+from clinicApp.app.models.models import Talons
+
+
+async def main(doctor_id: int, patient_id: int, service_id: int, day: str, bookers: int, slots: int):
+    date_obj = datetime.strptime(day, "%Y-%m-%d").date()
+    start = datetime.combine(date_obj, datetime.strptime("09:00", "%H:%M").time())
+    requests = [
+        AppointmentCreate(doctor_id=doctor_id, date=date_obj, service_id=service_id,
+                          time=(start + timedelta(minutes=30 * (i % slots))).time())
+        for i in range(bookers)
+    ]
+
+    async def book(data):
+        started = time.perf_counter()
+        appointment = await AppointmentsDAO.create_appointment(data, patient_id)
+        return appointment, (time.perf_counter() - started) * 1000
+
+    results = await asyncio.gather(*(book(data) for data in requests))
+    created = [appointment._id for appointment, _ in results if appointment]
+    latencies = sorted(latency for _, latency in results)
+
+    async with async_session_maker() as session:
+        duplicates = (await session.execute(
+            select(Talons.time, func.count())
+            .where(Talons.doctor_id == doctor_id, Talons.date == date_obj, Talons.status != "declined")
+            .group_by(Talons.time)
+            .having(func.count() > 1)
+        )).all()
+        await session.execute(delete(Talons).where(Talons._id.in_(created)))
+        await session.commit()
+
+    print(f"bookers={bookers} slots={slots} booked={len(created)} double_bookings={len(duplicates)}")
+    print(f"p50={latencies[len(latencies) // 2]:.1f}ms p99={latencies[int(len(latencies) * 0.99) - 1]:.1f}ms "
+          f"max={latencies[-1]:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctor-id", type=int, required=True)
+    parser.add_argument("--patient-id", type=int, required=True)
+    parser.add_argument("--service-id", type=int, required=True)
+    parser.add_argument("--date", required=True)
+    parser.add_argument("--bookers", type=int, default=500)
+    parser.add_argument("--slots", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.doctor_id, args.patient_id, args.service_id, args.date, args.bookers, args.slots))
@@ -0,0 +1,83 @@
+"""
+Поиск ближайшего свободного слота для consume_requests: прежний цикл по дням и врачам
+против пакетной выборки AppointmentsDAO.search_free_slots. Печатает сообщений/сек.
+
+    python -m clinicApp.benchmarks.earliest_slot_benchmark --specialty Терапия
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from clinicApp.app.core.weekdays import has_days, weekday_bit
+from clinicApp.app.api.talons.dao import AppointmentsDAO
+from clinicApp.app.core.database import async_session_maker
+from clinicApp.app.models.models import Doctors, Users, Departments, Schedules, Talons
+
+
+async def legacy_search(session, specialty: str, today: date, max_days_ahead: int = 30):
+    earliest_slots = []
+    search_date = today
+    while search_date <= today + timedelta(days=max_days_ahead):
+        day_bit = weekday_bit(search_date)
+        doctors = (await session.execute(
+            select(Doctors._id.label("doctor_id"), Users.last_name, Users.first_name, Users.second_name)
+            .join(Users, Doctors.user_id == Users._id)
+            .join(Departments, Doctors.department_id == Departments._id)
+            .join(Schedules, Doctors._id == Schedules.doctor_id)
+            .where(has_days(Schedules.days_mask, day_bit), Departments.department_name.ilike(f"%{specialty}%"))
+            .group_by(Doctors._id, Users.last_name, Users.first_name, Users.second_name)
+        )).fetchall()
+        for doctor in doctors:
+            schedule = (await session.execute(
+                select(Schedules).options(selectinload(Schedules.shifts))
+                .where(Schedules.doctor_id == doctor.doctor_id, has_days(Schedules.days_mask, day_bit))
+            )).scalar()
+            if not schedule or not schedule.shifts:
+                continue
+            booked_slots = {row[0].strftime("%H:%M") for row in (await session.execute(
+                select(Talons.time).where(Talons.doctor_id == doctor.doctor_id, Talons.date == search_date)
+            )).all()}
+            current_time = datetime.combine(search_date, schedule.shifts.start_time)
+            end_time = datetime.combine(search_date, schedule.shifts.end_time)
+            while current_time < end_time:
+                if current_time.strftime("%H:%M") not in booked_slots:
+                    earliest_slots.append((search_date, current_time.strftime("%H:%M"), doctor.doctor_id))
+                    break
+                current_time += timedelta(minutes=30)
+        search_date += timedelta(days=1)
+    return min(earliest_slots) if earliest_slots else None
+
+
+async def batched_search(session, specialty: str, today: date):
+    slot = next(await AppointmentsDAO.search_free_slots(session, specialty, today), None)
+    return (slot["date"], slot["time"], slot["doctor_id"]) if slot else None
+
+
+async def measure(name: str, search, specialty: str, messages: int):
+    started = time.perf_counter()
+    result = None
+    for _ in range(messages):
+        async with async_session_maker() as session:
+            result = await search(session, specialty, date.today())
+    elapsed = time.perf_counter() - started
+    print(f"{name:<8} {messages / elapsed:8.1f} msg/s  earliest={result}")
+    return result
+
+
+async def main(specialty: str, messages: int):
+    legacy = await measure("legacy", legacy_search, specialty, messages)
+    batched = await measure("batched", batched_search, specialty, messages)
+    if legacy and batched and legacy[:2] != batched[:2]:
+        print("WARNING: результаты различаются")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--specialty", required=True)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.specialty, args.messages))
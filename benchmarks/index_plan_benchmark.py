@@ -0,0 +1,152 @@
+"""
+Планы запросов DAO с составными индексами и без них.
+
+Заполняет базу тестовыми данными (логины bench_*, отделение bench), затем для каждого
+запроса выполняет EXPLAIN ANALYZE дважды: с индексами и внутри транзакции, где индексы
+удалены (транзакция откатывается). Запускать на отдельной базе.
+
+    python -m clinicApp.benchmarks.index_plan_benchmark --seed --patients 100000 --talons 2000000
+    python -m clinicApp.benchmarks.index_plan_benchmark --cleanup
+"""
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import text
+
+from clinicApp.app.core.database import engine
+
+# uq_talons_doctor_slot (doctor_id, date, time) обслуживает те же условия по врачу и дате,
+# поэтому в прогоне "без индекса" удаляется и он - иначе запросы по talons просто переходят на него.
+INDEXES = [
+    "uq_talons_doctor_slot",
+    "ix_talons_doctor_id_date",
+    "ix_talons_patient_id_date",
+    "ix_medical_cards_doctor_id_date_id",
+    "ix_medical_cards_patient_id_date_id",
+    "ix_schedules_doctor_id",
+]
+
+QUERIES = {
+    "AppointmentsDAO.get_for_doctor":
+        "SELECT * FROM talons WHERE doctor_id = :doctor_id AND date >= current_date",
+    "AppointmentsDAO.get_for_patient":
+        "SELECT * FROM talons WHERE patient_id = :patient_id AND date >= current_date",
+    "AppointmentsDAO.get_history_for_patient":
+        "SELECT * FROM talons WHERE patient_id = :patient_id AND date < current_date",
+    "AppointmentsDAO.get_available_slots":
+        "SELECT time FROM talons WHERE doctor_id = :doctor_id AND date = current_date + 1",
+    "DoctorsDAO.get_doctor_dashboard_data":
+        "SELECT * FROM talons WHERE doctor_id = :doctor_id AND date = current_date AND status <> 'declined'",
+    "MedicalCardsDAO.get_cards_for_doctor":
+        "SELECT * FROM medical_cards WHERE doctor_id = :doctor_id ORDER BY date DESC, _id DESC LIMIT 51",
+    "MedicalCardsDAO.get_cards_for_patient":
+        "SELECT * FROM medical_cards WHERE patient_id = :patient_id ORDER BY date DESC, _id DESC LIMIT 51",
+    "ScheduleDAO schedule lookup":
+        "SELECT * FROM schedules WHERE doctor_id = :doctor_id AND days_mask & 1 <> 0",
+}
+
+SEED = [
+    "INSERT INTO departments (department_name) VALUES ('bench')",
+    "INSERT INTO shifts (start_time, end_time) VALUES ('08:00', '16:00')",
+    """INSERT INTO users (login, password, first_name, last_name, second_name, phone_number, gender, role_id)
+       SELECT 'bench_d' || g || '@example.com', 'x', 'Врач' || g, 'Доктор' || g, 'Отчество' || g,
+              '+375290000000', 'M', 2
+       FROM generate_series(1, :doctors) g""",
+    """INSERT INTO doctors (start_date, birthday, user_id, department_id)
+       SELECT date '2015-01-01', date '1980-01-01', u._id, (SELECT max(_id) FROM departments WHERE department_name = 'bench')
+       FROM users u WHERE u.login LIKE 'bench_d%'""",
+    """INSERT INTO schedules (days_mask, doctor_id, shift_id)
+       SELECT 31, doc._id, (SELECT max(_id) FROM shifts)
+       FROM doctors doc JOIN users u ON u._id = doc.user_id
+       WHERE u.login LIKE 'bench_d%'""",
+    """INSERT INTO users (login, password, first_name, last_name, second_name, phone_number, gender, role_id)
+       SELECT 'bench_p' || g || '@example.com', 'x', 'Имя' || g, 'Фамилия' || g, 'Отчество' || g,
+              '+375290000000', 'F', 1
+       FROM generate_series(1, :patients) g""",
+    """INSERT INTO patients (b_date, user_id)
+       SELECT date '1990-01-01', u._id FROM users u WHERE u.login LIKE 'bench_p%'""",
+    """WITH doc AS (SELECT array_agg(d._id) ids FROM doctors d JOIN users u ON u._id = d.user_id
+                   WHERE u.login LIKE 'bench_d%'),
+            pat AS (SELECT array_agg(p._id) ids FROM patients p JOIN users u ON u._id = p.user_id
+                   WHERE u.login LIKE 'bench_p%')
+       INSERT INTO talons (date, time, status, patient_id, doctor_id)
+       SELECT current_date - 730 + (g / cardinality(doc.ids)) / 16,
+              time '08:00' + ((g / cardinality(doc.ids)) % 16) * interval '30 minutes',
+              'confirmed',
+              pat.ids[1 + (g * 7919) % cardinality(pat.ids)],
+              doc.ids[1 + g % cardinality(doc.ids)]
+       FROM doc, pat, generate_series(0, :talons - 1) g""",
+    """WITH doc AS (SELECT array_agg(d._id) ids FROM doctors d JOIN users u ON u._id = d.user_id
+                   WHERE u.login LIKE 'bench_d%'),
+            pat AS (SELECT array_agg(p._id) ids FROM patients p JOIN users u ON u._id = p.user_id
+                   WHERE u.login LIKE 'bench_p%')
+       INSERT INTO medical_cards (date, complaints, wellness_check, diagnosis, doctor_id, patient_id)
+       SELECT current_date - (g % 3650), 'Жалобы пациента', 'Общее состояние удовлетворительное', 'Диагноз',
+              doc.ids[1 + g % cardinality(doc.ids)], pat.ids[1 + (g * 7919) % cardinality(pat.ids)]
+       FROM doc, pat, generate_series(0, :cards - 1) g""",
+    "ANALYZE",
+]
+
+CLEANUP = [
+    """DELETE FROM schedules WHERE doctor_id IN
+       (SELECT d._id FROM doctors d JOIN users u ON u._id = d.user_id WHERE u.login LIKE 'bench_d%')""",
+    "DELETE FROM users WHERE login LIKE 'bench_%'",
+    "DELETE FROM departments WHERE department_name = 'bench'",
+]
+
+
+async def execution_time(connection, sql: str, params: dict) -> tuple[float, str]:
+    result = await connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params)
+    plan = result.scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    return plan[0]["Execution Time"], plan[0]["Plan"]["Node Type"]
+
+
+async def main(args):
+    if args.cleanup:
+        async with engine.begin() as connection:
+            for statement in CLEANUP:
+                await connection.execute(text(statement))
+        return
+
+    if args.seed:
+        params = {"doctors": args.doctors, "patients": args.patients, "talons": args.talons, "cards": args.cards}
+        async with engine.begin() as connection:
+            for statement in SEED:
+                statement = text(statement)
+                await connection.execute(statement, {key: params[key] for key in statement.compile().params})
+
+    async with engine.connect() as connection:
+        row = (await connection.execute(text(
+            "SELECT doctor_id, patient_id FROM talons ORDER BY _id DESC LIMIT 1"
+        ))).one()
+        params = {"doctor_id": row.doctor_id, "patient_id": row.patient_id}
+        await connection.rollback()
+
+        print(f"{'query':<42} {'indexed, ms':>12} {'plan':<18} {'no index, ms':>13} {'plan':<18}")
+        for name, sql in QUERIES.items():
+            bind = {key: value for key, value in params.items() if f":{key}" in sql}
+            with_index = await execution_time(connection, sql, bind)
+
+            # Индексы удаляются только внутри этой транзакции, откат возвращает их обратно.
+            for index in INDEXES:
+                await connection.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            without_index = await execution_time(connection, sql, bind)
+            await connection.rollback()
+
+            print(f"{name:<42} {with_index[0]:>12.2f} {with_index[1]:<18} "
+                  f"{without_index[0]:>13.2f} {without_index[1]:<18}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--talons", type=int, default=2_000_000)
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    asyncio.run(main(parser.parse_args()))
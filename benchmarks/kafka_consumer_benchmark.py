@@ -0,0 +1,84 @@
+"""
+Пропускная способность consume_batches на брокере в памяти: последовательная обработка
+(concurrency=1) против параллельной. Обработчик имитирует поиск в БД через asyncio.sleep
+и проверяет, что сообщения одного complaint_id приходят по порядку.
+
+    python -m clinicApp.benchmarks.kafka_consumer_benchmark --messages 2000 --latency-ms 5
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import namedtuple
+
+from clinicApp.app.core.kafka import consume_batches
+
+Message = namedtuple("Message", "topic partition offset value")
+
+
+class InMemoryConsumer:
+    """Заглушка AIOKafkaConsumer: отдаёт заранее подготовленные сообщения через getmany/commit."""
+
+    def __init__(self, messages: list, partitions: int = 4):
+        self._pending = [[] for _ in range(partitions)]
+        for offset, value in enumerate(messages):
+            partition = hash(value["complaint_id"]) % partitions
+            self._pending[partition].append(Message("requests", partition, offset, value))
+        self._positions = [0] * partitions
+        self._total = len(messages)
+        self.committed = 0
+        self.done = asyncio.Event()
+
+    async def getmany(self, timeout_ms: int = 0, max_records: int = None):
+        batch = {}
+        for partition, messages in enumerate(self._pending):
+            start = self._positions[partition]
+            chunk = messages[start:start + max_records]
+            if chunk:
+                batch[partition] = chunk
+                self._positions[partition] += len(chunk)
+        if not batch:
+            await asyncio.sleep(timeout_ms / 1000)
+        return batch
+
+    async def commit(self, offsets=None):
+        self.committed = sum(self._positions)
+        if self.committed == self._total:
+            self.done.set()
+
+
+async def run(messages: list, concurrency: int, latency: float) -> float:
+    last_seen = {}
+
+    async def handle(data):
+        await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+        previous = last_seen.get(data["complaint_id"], -1)
+        assert data["seq"] > previous, "нарушен порядок сообщений одного ключа"
+        last_seen[data["complaint_id"]] = data["seq"]
+
+    consumer = InMemoryConsumer(messages)
+    started = time.perf_counter()
+    worker = asyncio.create_task(consume_batches(
+        consumer, handle, key=lambda value: value["complaint_id"], concurrency=concurrency,
+    ))
+    await consumer.done.wait()
+    elapsed = time.perf_counter() - started
+    worker.cancel()
+    return len(messages) / elapsed
+
+
+async def main(count: int, keys: int, latency_ms: float, concurrency: int):
+    messages = [{"complaint_id": i % keys, "seq": i} for i in range(count)]
+    for limit in (1, concurrency):
+        rate = await run(messages, limit, latency_ms / 1000)
+        print(f"concurrency={limit:<4} {rate:10.1f} msg/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.keys, args.latency_ms, args.concurrency))
@@ -0,0 +1,106 @@
+"""
+Массовое добавление врачей: DoctorsDAO.onboard_doctors против прежнего пути
+add_doctor + ScheduleDAO.add_schedule на каждого врача. Созданные строки удаляются после прогона.
+
+    python -m clinicApp.benchmarks.onboarding_benchmark --department-id 1 --shift-id 1 --doctors 1000 --legacy 100
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import delete, exists, func, select
+
+from clinicApp.app.api.doctors.dao import DoctorsDAO
+from clinicApp.app.api.doctors.schemas import DoctorOnboardSchema, DoctorUpdateSchema
+from clinicApp.app.api.schedule.dao import ScheduleDAO
+from clinicApp.app.core.database import async_session_maker, engine
+from clinicApp.app.models.models import Addresses, Doctors, Education, Schedules, Users
+from clinicApp.app.schemas.schemas import ScheduleSchema
+
+SCHEDULES = [["Monday", "Wednesday", "Friday"], ["Tuesday", "Thursday"]]
+
+
+def doctor_data(prefix: str, number: int, department_id: int, shift_id: int) -> dict:
+    return {
+        "start_date": date(2020, 1, 1),
+        "birthday": date(1985, 1, 1),
+        "department_id": department_id,
+        "users": {
+            "login": f"{prefix}{number}@example.com", "password": "password123",
+            "first_name": "Врач", "last_name": "Онбординг", "second_name": "Тестович",
+            "phone_number": "+375291234567", "gender": "M", "role_id": 2,
+        },
+        "addresses": {"country": "Беларусь", "city": "Минск", "street": "Ленина", "house_number": "1", "flat_number": 1},
+        "education": {"university": "БГМУ", "faculty": "Лечебный", "speciality": "Терапевт общей практики"},
+        "schedules": [{"shift_id": shift_id, "days_of_week": days} for days in SCHEDULES],
+    }
+
+
+async def legacy_onboard(doctors: list[dict]):
+    for data in doctors:
+        doctor = await DoctorsDAO.add_doctor(DoctorUpdateSchema.model_validate(data))
+        for schedule in data["schedules"]:
+            await ScheduleDAO.add_schedule(ScheduleSchema(doctor_id=doctor._id, **schedule))
+
+
+async def last_education_id() -> int:
+    async with async_session_maker() as session:
+        return (await session.execute(select(func.coalesce(func.max(Education._id), 0)))).scalar()
+
+
+async def cleanup(prefix: str, education_after: int = None):
+    """
+    Удаляет врачей с логинами prefix*. add_doctor не связывает врача с образованием, поэтому после
+    прежнего пути удаляются и записи Education, созданные в этом прогоне (_id > education_after) без врача.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            rows = (await session.execute(
+                select(Doctors._id, Doctors.address_id, Doctors.education_id)
+                .join(Users, Doctors.user_id == Users._id)
+                .where(Users.login.like(f"{prefix}%"))
+            )).all()
+            doctor_ids = [row._id for row in rows]
+            await session.execute(delete(Schedules).where(Schedules.doctor_id.in_(doctor_ids)))
+            await session.execute(delete(Users).where(Users.login.like(f"{prefix}%")))
+            await session.execute(delete(Addresses).where(Addresses._id.in_([row.address_id for row in rows])))
+            await session.execute(delete(Education).where(Education._id.in_([row.education_id for row in rows])))
+            if education_after is not None:
+                await session.execute(delete(Education).where(
+                    Education._id > education_after,
+                    ~exists().where(Doctors.education_id == Education._id),
+                ))
+
+
+async def main(args):
+    prefix = "bench_onboard_"
+    doctors = [doctor_data(prefix, i, args.department_id, args.shift_id) for i in range(args.doctors)]
+    await cleanup(prefix)
+
+    started = time.perf_counter()
+    results = await DoctorsDAO.onboard_doctors([DoctorOnboardSchema.model_validate(data) for data in doctors])
+    bulk = time.perf_counter() - started
+    schedules = sum(len(result["schedule_ids"]) for result in results)
+    print(f"bulk:   {len(results)} doctors, {schedules} schedules in {bulk:.2f}s")
+    await cleanup(prefix)
+
+    if args.legacy:
+        education_before = await last_education_id()
+        started = time.perf_counter()
+        await legacy_onboard(doctors[:args.legacy])
+        legacy = time.perf_counter() - started
+        print(f"legacy: {args.legacy} doctors in {legacy:.2f}s "
+              f"(~{legacy / args.legacy * args.doctors:.1f}s for {args.doctors})")
+        await cleanup(prefix, education_after=education_before)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--department-id", type=int, required=True)
+    parser.add_argument("--shift-id", type=int, required=True)
+    parser.add_argument("--doctors", type=int, default=1000)
+    parser.add_argument("--legacy", type=int, default=100, help="сколько врачей добавить прежним путём (0 - пропустить)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,47 @@
+"""
+Сравнение /appointments/slots: запросы в БД (AppointmentsDAO.get_available_slots)
+против битовых масок SlotAvailability.
+
+    python -m clinicApp.benchmarks.slots_benchmark --doctor-id 1 --date 2025-03-10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from clinicApp.app.api.talons.availability import SlotAvailability
+from clinicApp.app.api.talons.dao import AppointmentsDAO
+
+
+async def measure(name: str, call, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    print(f"{name:<10} mean={statistics.mean(timings):10.1f}us "
+          f"p50={timings[len(timings) // 2]:10.1f}us p99={timings[int(len(timings) * 0.99) - 1]:10.1f}us")
+
+
+async def main(doctor_id: int, day: str, iterations: int):
+    date_obj = datetime.strptime(day, "%Y-%m-%d").date()
+    engine = SlotAvailability()
+    await engine.load()
+
+    from_db = (await AppointmentsDAO.get_available_slots(doctor_id, day))["available_slots"]
+    from_memory = await engine.get_available_slots(doctor_id, date_obj)
+    assert from_db == from_memory, (from_db, from_memory)
+
+    await measure("database", lambda: AppointmentsDAO.get_available_slots(doctor_id, day), iterations)
+    await measure("bitmap", lambda: engine.get_available_slots(doctor_id, date_obj), iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctor-id", type=int, required=True)
+    parser.add_argument("--date", required=True)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.doctor_id, args.date, args.iterations))
@@ -0,0 +1,35 @@
+"""Index schedules by doctor only
+
+Revision ID: 0c5313bd4dd9
+Revises: 20413f53df98
+Create Date: 2026-10-18 18:51:37.208441
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5313bd4dd9'
+down_revision: Union[str, None] = '20413f53df98'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Условие days_mask & bit <> 0 не использует days_mask в ключе индекса - оставляем только doctor_id.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_schedules_doctor_id', 'schedules', ['doctor_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_schedules_doctor_id_days_mask', table_name='schedules',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_schedules_doctor_id_days_mask', 'schedules', ['doctor_id', 'days_mask'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_schedules_doctor_id', table_name='schedules',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,68 @@
+"""Weekday bitmask on schedules
+
+Revision ID: 18310ca7f1cb
+Revises: d147c4d75aa4
+Create Date: 2026-10-18 15:48:51.207334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '18310ca7f1cb'
+down_revision: Union[str, None] = 'd147c4d75aa4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def upgrade() -> None:
+    op.add_column('schedules', sa.Column('days_mask', sa.SmallInteger(), nullable=True))
+    # Бит i - день с номером i начиная с понедельника; нераспознанные названия дают пустую маску.
+    names = ", ".join(f"'{name.lower()}'" for name in WEEKDAYS)
+    op.execute(f"""
+        UPDATE schedules
+        SET days_mask = coalesce(1 << (array_position(ARRAY[{names}], lower(trim(day_of_week))) - 1), 0)
+    """)
+    # Строки одного врача с одной сменой на разные дни объединяются в одну.
+    op.execute("""
+        WITH merged AS (
+            SELECT min(_id) AS keep_id, bit_or(days_mask) AS days_mask
+            FROM schedules
+            GROUP BY doctor_id, shift_id
+        )
+        UPDATE schedules s SET days_mask = merged.days_mask
+        FROM merged WHERE s._id = merged.keep_id
+    """)
+    op.execute("""
+        DELETE FROM schedules s
+        USING schedules k
+        WHERE k.doctor_id IS NOT DISTINCT FROM s.doctor_id
+          AND k.shift_id IS NOT DISTINCT FROM s.shift_id
+          AND k._id < s._id
+    """)
+    op.alter_column('schedules', 'days_mask', nullable=False)
+    op.drop_index('ix_schedules_doctor_id_day_of_week', table_name='schedules', if_exists=True)
+    op.drop_column('schedules', 'day_of_week')
+    op.create_index('ix_schedules_doctor_id_days_mask', 'schedules', ['doctor_id', 'days_mask'])
+
+
+def downgrade() -> None:
+    op.add_column('schedules', sa.Column('day_of_week', sa.String(), nullable=True))
+    # Каждый день из маски снова становится отдельной строкой.
+    op.execute("""
+        INSERT INTO schedules (days_mask, doctor_id, shift_id)
+        SELECT 1 << d, doctor_id, shift_id
+        FROM schedules, generate_series(0, 6) AS d
+        WHERE days_mask & (1 << d) <> 0 AND days_mask & -days_mask <> 1 << d
+    """)
+    names = " ".join(f"WHEN {1 << i} THEN '{name}'" for i, name in enumerate(WEEKDAYS))
+    op.execute(f"UPDATE schedules SET day_of_week = CASE days_mask & -days_mask {names} ELSE '' END")
+    op.alter_column('schedules', 'day_of_week', nullable=False)
+    op.drop_index('ix_schedules_doctor_id_days_mask', table_name='schedules')
+    op.drop_column('schedules', 'days_mask')
+    op.create_index('ix_schedules_doctor_id_day_of_week', 'schedules', ['doctor_id', 'day_of_week'])
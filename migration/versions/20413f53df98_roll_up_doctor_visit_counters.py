@@ -0,0 +1,70 @@
+"""Roll up doctor visit counters instead of updating them per talon
+
+Revision ID: 20413f53df98
+Revises: 281343e32c29
+Create Date: 2026-10-18 18:32:10.417265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20413f53df98'
+down_revision: Union[str, None] = '281343e32c29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Строка врача в doctor_visit_counters больше не обновляется триггером: она блокировала
+    # все параллельные записи к одному врачу до коммита. Её пересчитывает приложение из patient_doctor_visits.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION talons_visit_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE patient_doctor_visits SET visits = visits - 1
+                WHERE patient_id = OLD.patient_id AND doctor_id = OLD.doctor_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.doctor_id IS NOT NULL AND NEW.patient_id IS NOT NULL THEN
+                INSERT INTO patient_doctor_visits AS c (patient_id, doctor_id, visits)
+                VALUES (NEW.patient_id, NEW.doctor_id, 1)
+                ON CONFLICT (patient_id, doctor_id) DO UPDATE SET visits = c.visits + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION talons_visit_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE doctor_visit_counters SET visits = visits - 1
+                WHERE doctor_id = OLD.doctor_id;
+                UPDATE patient_doctor_visits SET visits = visits - 1
+                WHERE patient_id = OLD.patient_id AND doctor_id = OLD.doctor_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.doctor_id IS NOT NULL THEN
+                INSERT INTO doctor_visit_counters AS c (doctor_id, visits) VALUES (NEW.doctor_id, 1)
+                ON CONFLICT (doctor_id) DO UPDATE SET visits = c.visits + 1;
+                IF NEW.patient_id IS NOT NULL THEN
+                    INSERT INTO patient_doctor_visits AS c (patient_id, doctor_id, visits)
+                    VALUES (NEW.patient_id, NEW.doctor_id, 1)
+                    ON CONFLICT (patient_id, doctor_id) DO UPDATE SET visits = c.visits + 1;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Точный пересчёт: за время работы без триггера счётчики врачей обновлялись только свёрткой.
+    op.execute("DELETE FROM doctor_visit_counters")
+    op.execute("""
+        INSERT INTO doctor_visit_counters (doctor_id, visits)
+        SELECT doctor_id, count(*) FROM talons WHERE doctor_id IS NOT NULL GROUP BY doctor_id
+    """)
@@ -0,0 +1,43 @@
+"""Full-text search vector on medical cards
+
+Revision ID: 20ba800ad776
+Revises: 810fdc57883f
+Create Date: 2026-10-18 17:05:42.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20ba800ad776'
+down_revision: Union[str, None] = '810fdc57883f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Копия MEDICAL_CARD_SEARCH_VECTOR на момент миграции.
+SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+    for column, weight in (("diagnosis", "A"), ("complaints", "B"), ("wellness_check", "C"))
+    for config in ("russian", "english")
+)
+
+
+def upgrade() -> None:
+    # Добавление хранимой вычисляемой колонки переписывает таблицу под эксклюзивной блокировкой.
+    op.add_column('medical_cards', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_medical_cards_search_vector', 'medical_cards', ['search_vector'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_medical_cards_search_vector', table_name='medical_cards',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('medical_cards', 'search_vector')
@@ -0,0 +1,132 @@
+"""Monthly partitions for talons and medical cards
+
+Revision ID: 281343e32c29
+Revises: 20ba800ad776
+Create Date: 2026-10-18 17:48:26.904512
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '281343e32c29'
+down_revision: Union[str, None] = '20ba800ad776'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции на будущее создаются заранее; дальше их добавляет приложение (core/partitions.py).
+MONTHS_AHEAD = 3
+
+TABLES = {
+    'talons': {
+        'columns': ['_id', 'date', 'time', 'status', 'patient_id', 'doctor_id', 'service_id'],
+        'foreign_keys': [
+            ('talons_patient_id_fkey', 'patients', 'patient_id', 'CASCADE'),
+            ('talons_doctor_id_fkey', 'doctors', 'doctor_id', 'CASCADE'),
+            ('talons_service_id_fkey', 'services', 'service_id', None),
+        ],
+        'indexes': [
+            ('uq_talons_doctor_slot', ['doctor_id', 'date', 'time'],
+             {'unique': True, 'postgresql_where': sa.text("status <> 'declined'")}),
+            ('ix_talons_doctor_id_date', ['doctor_id', 'date'], {}),
+            ('ix_talons_patient_id_date', ['patient_id', 'date'], {}),
+        ],
+    },
+    'medical_cards': {
+        # search_vector вычисляется и при копировании не указывается.
+        'columns': ['_id', 'date', 'complaints', 'wellness_check', 'diagnosis', 'doctor_id', 'patient_id'],
+        'foreign_keys': [
+            ('medical_cards_doctor_id_fkey', 'doctors', 'doctor_id', 'CASCADE'),
+            ('medical_cards_patient_id_fkey', 'patients', 'patient_id', 'CASCADE'),
+        ],
+        'indexes': [
+            ('ix_medical_cards_search_vector', ['search_vector'], {'postgresql_using': 'gin'}),
+            ('ix_medical_cards_doctor_id_date_id', ['doctor_id', 'date', '_id'], {}),
+            ('ix_medical_cards_patient_id_date_id', ['patient_id', 'date', '_id'], {}),
+        ],
+    },
+}
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_visit_counter_triggers() -> None:
+    # Те же триггеры, что в b9bf22a00335: пересоздаются вместе с таблицей talons.
+    op.execute("""
+        CREATE TRIGGER talons_visit_counters_insert_delete
+        AFTER INSERT OR DELETE ON talons
+        FOR EACH ROW EXECUTE FUNCTION talons_visit_counters()
+    """)
+    op.execute("""
+        CREATE TRIGGER talons_visit_counters_update
+        AFTER UPDATE OF doctor_id, patient_id ON talons
+        FOR EACH ROW
+        WHEN (OLD.doctor_id IS DISTINCT FROM NEW.doctor_id OR OLD.patient_id IS DISTINCT FROM NEW.patient_id)
+        EXECUTE FUNCTION talons_visit_counters()
+    """)
+
+
+def create_monthly_partitions(table: str, parent: str) -> None:
+    first, last = op.get_bind().execute(sa.text(f"SELECT min(date), max(date) FROM {table}")).one()
+    current = date.today().replace(day=1)
+    month = min(first.replace(day=1), current) if first else current
+    last = max(last.replace(day=1), add_months(current, MONTHS_AHEAD)) if last else add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {parent} DEFAULT")
+
+
+def rebuild(table: str, partitioned: bool) -> None:
+    """
+    Переносит строки в новую таблицу (секционированную или обычную) и подменяет ею старую.
+    Таблица переписывается целиком под эксклюзивной блокировкой - запускать в окно обслуживания.
+    """
+    spec = TABLES[table]
+    rebuilt = f"{table}_rebuilt"
+    columns = ", ".join(spec['columns'])
+
+    op.execute(f"ALTER SEQUENCE {table}__id_seq OWNED BY NONE")
+    if partitioned:
+        # Первичный ключ секционированной таблицы обязан включать ключ секционирования.
+        op.execute(
+            f"CREATE TABLE {rebuilt} (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED, "
+            f"PRIMARY KEY (_id, date)) PARTITION BY RANGE (date)"
+        )
+        create_monthly_partitions(table, rebuilt)
+    else:
+        op.execute(f"CREATE TABLE {rebuilt} (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED, PRIMARY KEY (_id))")
+
+    op.execute(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {rebuilt} RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {rebuilt}_pkey TO {table}_pkey")
+    op.execute(f"ALTER SEQUENCE {table}__id_seq OWNED BY {table}._id")
+
+    for name, referent, column, ondelete in spec['foreign_keys']:
+        op.create_foreign_key(name, table, referent, [column], ['_id'], ondelete=ondelete)
+    for name, index_columns, options in spec['indexes']:
+        op.create_index(name, table, index_columns, **options)
+
+
+def upgrade() -> None:
+    # Счётчики визитов уже учитывают все талоны: триггеры вешаются после копирования строк.
+    rebuild('talons', partitioned=True)
+    create_visit_counter_triggers()
+    rebuild('medical_cards', partitioned=True)
+
+
+def downgrade() -> None:
+    rebuild('medical_cards', partitioned=False)
+    rebuild('talons', partitioned=False)
+    create_visit_counter_triggers()
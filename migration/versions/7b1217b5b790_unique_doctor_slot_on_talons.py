@@ -0,0 +1,37 @@
+"""Unique doctor slot on talons
+
+Revision ID: 7b1217b5b790
+Revises: 0aa149c8c434
+Create Date: 2026-10-18 12:05:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1217b5b790'
+down_revision: Union[str, None] = '0aa149c8c434'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Уже существующие двойные записи: остаётся самый ранний талон, остальные отклоняются.
+    op.execute("""
+        UPDATE talons SET status = 'declined'
+        WHERE status <> 'declined' AND _id IN (
+            SELECT _id FROM (
+                SELECT _id, row_number() OVER (PARTITION BY doctor_id, date, time ORDER BY _id) AS n
+                FROM talons WHERE status <> 'declined'
+            ) ranked WHERE n > 1
+        )
+    """)
+    op.create_index('uq_talons_doctor_slot', 'talons', ['doctor_id', 'date', 'time'], unique=True,
+                    postgresql_where=sa.text("status <> 'declined'"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_talons_doctor_slot', table_name='talons', postgresql_where=sa.text("status <> 'declined'"))
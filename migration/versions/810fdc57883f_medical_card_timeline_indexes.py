@@ -0,0 +1,40 @@
+"""Medical card timeline indexes
+
+Revision ID: 810fdc57883f
+Revises: 18310ca7f1cb
+Create Date: 2026-10-18 16:41:17.530296
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '810fdc57883f'
+down_revision: Union[str, None] = '18310ca7f1cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REPLACED = [
+    ('ix_medical_cards_doctor_id_date_id', 'ix_medical_cards_doctor_id_date', 'doctor_id'),
+    ('ix_medical_cards_patient_id_date_id', 'ix_medical_cards_patient_id_date', 'patient_id'),
+]
+
+
+def upgrade() -> None:
+    # Новый индекс строится до удаления старого, чтобы запросы не оставались без индекса.
+    with op.get_context().autocommit_block():
+        for new_name, old_name, column in REPLACED:
+            op.create_index(new_name, 'medical_cards', [column, 'date', '_id'],
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(old_name, table_name='medical_cards', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for new_name, old_name, column in reversed(REPLACED):
+            op.create_index(old_name, 'medical_cards', [column, 'date'],
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(new_name, table_name='medical_cards', postgresql_concurrently=True, if_exists=True)
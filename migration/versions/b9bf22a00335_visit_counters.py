@@ -0,0 +1,89 @@
+"""Visit counters
+
+Revision ID: b9bf22a00335
+Revises: 7b1217b5b790
+Create Date: 2026-10-18 13:21:07.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9bf22a00335'
+down_revision: Union[str, None] = '7b1217b5b790'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('doctor_visit_counters',
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('visits', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors._id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('doctor_id')
+    )
+    op.create_table('patient_doctor_visits',
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('visits', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors._id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients._id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('patient_id', 'doctor_id')
+    )
+
+    op.execute("""
+        CREATE FUNCTION talons_visit_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE doctor_visit_counters SET visits = visits - 1
+                WHERE doctor_id = OLD.doctor_id;
+                UPDATE patient_doctor_visits SET visits = visits - 1
+                WHERE patient_id = OLD.patient_id AND doctor_id = OLD.doctor_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.doctor_id IS NOT NULL THEN
+                INSERT INTO doctor_visit_counters AS c (doctor_id, visits) VALUES (NEW.doctor_id, 1)
+                ON CONFLICT (doctor_id) DO UPDATE SET visits = c.visits + 1;
+                IF NEW.patient_id IS NOT NULL THEN
+                    INSERT INTO patient_doctor_visits AS c (patient_id, doctor_id, visits)
+                    VALUES (NEW.patient_id, NEW.doctor_id, 1)
+                    ON CONFLICT (patient_id, doctor_id) DO UPDATE SET visits = c.visits + 1;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER talons_visit_counters_insert_delete
+        AFTER INSERT OR DELETE ON talons
+        FOR EACH ROW EXECUTE FUNCTION talons_visit_counters()
+    """)
+    op.execute("""
+        CREATE TRIGGER talons_visit_counters_update
+        AFTER UPDATE OF doctor_id, patient_id ON talons
+        FOR EACH ROW
+        WHEN (OLD.doctor_id IS DISTINCT FROM NEW.doctor_id OR OLD.patient_id IS DISTINCT FROM NEW.patient_id)
+        EXECUTE FUNCTION talons_visit_counters()
+    """)
+
+    op.execute("""
+        INSERT INTO doctor_visit_counters (doctor_id, visits)
+        SELECT doctor_id, count(*) FROM talons WHERE doctor_id IS NOT NULL GROUP BY doctor_id
+    """)
+    op.execute("""
+        INSERT INTO patient_doctor_visits (patient_id, doctor_id, visits)
+        SELECT patient_id, doctor_id, count(*) FROM talons
+        WHERE doctor_id IS NOT NULL AND patient_id IS NOT NULL
+        GROUP BY patient_id, doctor_id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER talons_visit_counters_update ON talons")
+    op.execute("DROP TRIGGER talons_visit_counters_insert_delete ON talons")
+    op.execute("DROP FUNCTION talons_visit_counters()")
+    op.drop_table('patient_doctor_visits')
+    op.drop_table('doctor_visit_counters')
@@ -0,0 +1,37 @@
+"""Trigram indexes for name search
+
+Revision ID: d147c4d75aa4
+Revises: db22657b3c00
+Create Date: 2026-10-18 15:12:08.440913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd147c4d75aa4'
+down_revision: Union[str, None] = 'db22657b3c00'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ['last_name', 'first_name', 'second_name']
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_trgm', 'users', [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in reversed(COLUMNS):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Composite indexes for DAO filters
+
+Revision ID: db22657b3c00
+Revises: b9bf22a00335
+Create Date: 2026-10-18 14:02:33.871402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'db22657b3c00'
+down_revision: Union[str, None] = 'b9bf22a00335'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_talons_doctor_id_date', 'talons', ['doctor_id', 'date']),
+    ('ix_talons_patient_id_date', 'talons', ['patient_id', 'date']),
+    ('ix_medical_cards_doctor_id_date', 'medical_cards', ['doctor_id', 'date']),
+    ('ix_medical_cards_patient_id_date', 'medical_cards', ['patient_id', 'date']),
+    ('ix_schedules_doctor_id_day_of_week', 'schedules', ['doctor_id', 'day_of_week']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться внутри транзакции.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,18 @@
+import os
+import sys
+import types
+from pathlib import Path
+
+# Настройки читаются при импорте config - для тестов без базы достаточно заглушек.
+for name, value in {
+    "DB_HOST": "localhost", "DB_PORT": "5432", "DB_USER": "test", "DB_PASSWORD": "test",
+    "DB_NAME": "test", "SECRET_KEY": "test", "ALGORITHM": "HS256", "SALT": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+# Код импортируется как пакет clinicApp независимо от имени каталога с репозиторием.
+ROOT = Path(__file__).resolve().parent.parent
+if "clinicApp" not in sys.modules:
+    package = types.ModuleType("clinicApp")
+    package.__path__ = [str(ROOT)]
+    sys.modules["clinicApp"] = package
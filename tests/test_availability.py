@@ -0,0 +1,117 @@
+import asyncio
+from datetime import date, time
+
+import pytest
+
+from clinicApp.app.api.talons.availability import ShiftSlots, SlotAvailability
+from clinicApp.app.core.changes import changes
+
+MONDAY = date(2026, 10, 19)
+
+
+def test_shift_labels_and_full_mask():
+    shift = ShiftSlots(time(9, 0), time(11, 0))
+    assert shift.labels == ("09:00", "09:30", "10:00", "10:30")
+    assert shift.full_mask == 0b1111
+
+
+def test_partial_last_slot_is_kept():
+    shift = ShiftSlots(time(9, 0), time(10, 15))
+    assert shift.labels == ("09:00", "09:30", "10:00")
+
+
+def test_empty_shift():
+    shift = ShiftSlots(time(9, 0), time(9, 0))
+    assert shift.labels == ()
+    assert shift.full_mask == 0
+    assert shift.free_labels(0) == []
+
+
+def test_index_of():
+    shift = ShiftSlots(time(9, 0), time(11, 0))
+    assert shift.index_of(time(9, 0)) == 0
+    assert shift.index_of(time(10, 30)) == 3
+    assert shift.index_of(time(8, 30)) is None
+    assert shift.index_of(time(9, 15)) is None
+    assert shift.index_of(time(11, 0)) is None
+
+
+def test_mask_ignores_times_outside_grid():
+    shift = ShiftSlots(time(9, 0), time(11, 0))
+    assert shift.mask_of([time(9, 30), time(10, 30), time(9, 45), time(12, 0)]) == 0b1010
+
+
+def test_free_labels_and_indexes():
+    shift = ShiftSlots(time(9, 0), time(11, 0))
+    booked = shift.mask_of([time(9, 30), time(10, 30)])
+    assert shift.free_labels(booked) == ["09:00", "10:00"]
+    assert list(shift.free_indexes(booked)) == [0, 2]
+    assert list(shift.free_indexes(shift.full_mask)) == []
+    assert shift.minute_of(2) == 10 * 60
+
+
+def test_shifts_compare_by_grid():
+    assert ShiftSlots(time(9, 0), time(10, 0)) == ShiftSlots(time(9, 0), time(9, 45))
+    assert ShiftSlots(time(9, 0), time(10, 0)) != ShiftSlots(time(9, 30), time(10, 30))
+
+
+@pytest.fixture
+def published(monkeypatch):
+    messages = []
+
+    async def publish(topic, *payloads):
+        messages.extend((topic, payload) for payload in payloads)
+
+    monkeypatch.setattr(changes, "publish", publish)
+    return messages
+
+
+def cached_availability() -> SlotAvailability:
+    availability = SlotAvailability(capacity=10)
+    availability._templates = {1: {MONDAY.weekday(): ShiftSlots(time(9, 0), time(11, 0))}}
+    availability._days.set((1, MONDAY), 0)
+    return availability
+
+
+def test_book_updates_cached_day_and_release_drops_it(published):
+    availability = cached_availability()
+
+    asyncio.run(availability.book(1, MONDAY, time(10, 0)))
+    assert availability._days.peek((1, MONDAY)) == 0b100
+
+    # Время вне сетки смены маску не меняет.
+    asyncio.run(availability.book(1, MONDAY, time(10, 15)))
+    assert availability._days.peek((1, MONDAY)) == 0b100
+
+    asyncio.run(availability.release(1, MONDAY))
+    assert availability._days.peek((1, MONDAY)) is None
+    assert published == [("slots", "1:2026-10-19")] * 3
+
+
+def test_book_does_not_cache_unknown_day(published):
+    availability = SlotAvailability(capacity=10)
+    availability._templates = {1: {MONDAY.weekday(): ShiftSlots(time(9, 0), time(11, 0))}}
+
+    asyncio.run(availability.book(1, MONDAY, time(9, 0)))
+    assert (1, MONDAY) not in availability._days
+
+
+def test_book_many_publishes_each_day_once(published):
+    availability = cached_availability()
+    asyncio.run(availability.book_many([(1, MONDAY, time(9, 0)), (1, MONDAY, time(9, 30))]))
+    asyncio.run(availability.book_many([]))
+
+    assert availability._days.peek((1, MONDAY)) == 0b11
+    assert published == [("slots", "1:2026-10-19")]
+
+
+def test_change_from_other_worker_drops_cached_day():
+    availability = cached_availability()
+    availability._days.set((2, MONDAY), 0)
+
+    asyncio.run(availability._on_change("1:2026-10-19"))
+    assert (1, MONDAY) not in availability._days
+    assert (2, MONDAY) in availability._days
+
+    asyncio.run(availability._on_change(None))
+    assert len(availability._days) == 0
@@ -0,0 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, time
+from types import SimpleNamespace
+
+from clinicApp.app.api.talons import dao as talons_dao
+from clinicApp.app.api.talons.dao import AppointmentsDAO
+from clinicApp.app.api.talons.schema import AppointmentBulkCreate
+
+DAY = date(2026, 10, 19)
+
+
+class FakeSession:
+    """Вставка возвращает заранее заданные талоны - как INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+
+    def __init__(self, inserted):
+        self.inserted = inserted
+        self.params = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+
+    async def execute(self, statement):
+        self.params = statement.compile().params
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.inserted))
+
+
+def item(patient_id: int, slot_time: time) -> AppointmentBulkCreate:
+    return AppointmentBulkCreate(patient_id=patient_id, doctor_id=1, date=DAY, time=slot_time, service_id=2)
+
+
+def talon(patient_id: int, slot_time: time):
+    return SimpleNamespace(_id=patient_id, patient_id=patient_id, doctor_id=1, date=DAY, time=slot_time)
+
+
+def test_bulk_booking_keeps_patient_per_item(monkeypatch):
+    items = [item(10, time(9, 0)), item(11, time(9, 30)), item(12, time(10, 0)), item(13, time(10, 30))]
+    # Заявка 2 не прошла проверку, заявка 1 упёрлась в занятый слот.
+    session = FakeSession([talon(10, time(9, 0)), talon(13, time(10, 30))])
+    booked = []
+
+    async def valid_bulk_items(session, items):
+        return {0, 1, 3}
+
+    async def book_many(slots):
+        booked.extend(slots)
+
+    monkeypatch.setattr(talons_dao, "async_session_maker", lambda: session)
+    monkeypatch.setattr(AppointmentsDAO, "_valid_bulk_items", valid_bulk_items)
+    monkeypatch.setattr(talons_dao.slot_availability, "book_many", book_many)
+
+    results = asyncio.run(AppointmentsDAO.create_appointments_bulk(items))
+
+    assert [(result["index"], result["status"]) for result in results] == [
+        (0, "created"), (1, "conflict"), (2, "invalid"), (3, "created")
+    ]
+    assert results[0]["appointment"].patient_id == 10
+    assert results[3]["appointment"].patient_id == 13
+    assert sorted(value for key, value in session.params.items() if key.startswith("patient_id")) == [10, 11, 13]
+    assert booked == [(1, DAY, time(9, 0)), (1, DAY, time(10, 30))]
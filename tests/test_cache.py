@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+
+from clinicApp.app.core.cache import LRUCache, TTLCache, VersionedPayloadCache
+
+
+def test_lru_evicts_least_recently_read():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.keys() == ["a", "c"]
+    assert "b" not in cache
+
+
+def test_lru_set_refreshes_existing_key():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+    assert cache.keys() == ["a", "c"]
+    assert cache.peek("a") == 10
+
+
+def test_lru_peek_does_not_touch_order_or_stats():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    assert cache.peek("missing") is None
+    cache.set("c", 3)
+    assert cache.keys() == ["b", "c"]
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_lru_stats():
+    cache = LRUCache(3)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+    assert cache.stats() == {"size": 1, "capacity": 3, "hits": 2, "misses": 1, "hit_ratio": 2 / 3}
+    assert LRUCache(1).stats()["hit_ratio"] == 0.0
+
+
+def test_lru_pop():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_versioned_payloads_are_built_once_per_version():
+    cache = VersionedPayloadCache()
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return b'{"items": []}'
+
+    async def scenario():
+        first = await cache.get_or_build("all", build)
+        assert await cache.get_or_build("all", build) == first
+        await cache.bump()
+        second = await cache.get_or_build("all", build)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert len(builds) == 2
+    assert first == second
+    assert first[0].startswith('"') and first[1] == b'{"items": []}'
+
+
+def test_versioned_payload_built_during_bump_is_not_cached():
+    cache = VersionedPayloadCache()
+    builds = []
+
+    async def build():
+        builds.append(1)
+        if len(builds) == 1:
+            # Данные изменились, пока собирался ответ.
+            await cache.bump()
+        return b"body"
+
+    async def scenario():
+        await cache.get_or_build("all", build)
+        await cache.get_or_build("all", build)
+        await cache.get_or_build("all", build)
+
+    asyncio.run(scenario())
+    assert len(builds) == 2
+    assert cache.stats()["version"] == 1
+
+
+def test_ttl_cache_expires_values(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert cache.get("a", "expired") == "expired"
+
+
+def test_ttl_cache_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0)
+        return {"visits": 3}
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_load(1, load) for _ in range(5)))
+        results.append(await cache.get_or_load(1, load))
+        return results
+
+    assert asyncio.run(scenario()) == [{"visits": 3}] * 6
+    assert loads == [1]
+
+
+def test_ttl_cache_failed_load_is_not_cached():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("db is down")
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", load)
+        return await cache.get_or_load("key", load)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert cache.pop("key") == "ok"
+    assert cache.pop("key") is None
@@ -0,0 +1,44 @@
+import asyncio
+
+from clinicApp.app.core.changes import ChangeFeed
+
+
+def test_dispatch_routes_messages_from_other_processes():
+    feed = ChangeFeed()
+    received = []
+
+    async def on_slots(payload):
+        received.append(("slots", payload))
+
+    async def on_schedule(payload):
+        received.append(("schedule", payload))
+
+    feed.subscribe("slots", on_slots)
+    feed.subscribe("schedule", on_schedule)
+
+    async def scenario():
+        await feed.dispatch("slots:other:1:2026-10-19")
+        await feed.dispatch("schedule:other:")
+        await feed.dispatch(f"slots:{feed.origin}:1:2026-10-19")
+        await feed.dispatch("unknown:other:x")
+
+    asyncio.run(scenario())
+    assert received == [("slots", "1:2026-10-19"), ("schedule", "")]
+
+
+def test_reset_reaches_every_subscriber_and_survives_errors():
+    feed = ChangeFeed()
+    received = []
+
+    async def broken(payload):
+        raise RuntimeError("boom")
+
+    async def on_change(payload):
+        received.append(payload)
+
+    feed.subscribe("slots", broken)
+    feed.subscribe("slots", on_change)
+    feed.subscribe("leaves", on_change)
+
+    asyncio.run(feed.dispatch(None))
+    assert received == [None, None]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from clinicApp.app.api.chat.clientManager import ConnectionManager, SLOW_CLIENT_CLOSE_CODE
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False, broken: bool = False):
+        self.sent = []
+        self.closed = None
+        self.stalled = stalled
+        self.broken = broken
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.broken:
+            raise RuntimeError("connection closed")
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int, reason=None):
+        self.closed = code
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_broadcast_marks_sender():
+    async def scenario():
+        manager = ConnectionManager()
+        sender, other = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(sender, "cardio", 1)
+        await manager.connect(other, "cardio", 2)
+        await manager.broadcast("hi", "cardio", 1, "Ivanov", "12:00")
+        await manager.broadcast("nobody", "neuro", 1, "Ivanov", "12:01")
+        await settle()
+        return sender.sent, other.sent
+
+    sender_sent, other_sent = asyncio.run(scenario())
+    assert sender_sent == [{"msg": "hi", "timestamp": "12:00", "sender": "Ivanov", "isSender": True}]
+    assert other_sent == [{"msg": "hi", "timestamp": "12:00", "sender": "Ivanov", "isSender": False}]
+
+
+def test_slow_client_is_dropped_without_blocking_others():
+    async def scenario():
+        manager = ConnectionManager()
+        slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+        await manager.connect(slow, "cardio", 1)
+        await manager.connect(fast, "cardio", 2)
+        queue_size = manager.active_connections["cardio"][1].queue.maxsize
+        for n in range(queue_size + 2):
+            await manager.broadcast(str(n), "cardio", 2, "Petrov", "12:00")
+            await asyncio.sleep(0)
+        await settle()
+        return manager, slow, fast, queue_size
+
+    manager, slow, fast, queue_size = asyncio.run(scenario())
+    assert list(manager.active_connections["cardio"]) == [2]
+    assert slow.closed == SLOW_CLIENT_CLOSE_CODE
+    assert len(fast.sent) == queue_size + 2
+
+
+def test_broken_socket_is_disconnected():
+    async def scenario():
+        manager = ConnectionManager()
+        await manager.connect(FakeWebSocket(broken=True), "cardio", 1)
+        await manager.broadcast("hi", "cardio", 2, "Petrov", "12:00")
+        await settle()
+        delivered = await manager.send_personal({"msg": "history"}, "cardio", 1)
+        return manager, delivered
+
+    manager, delivered = asyncio.run(scenario())
+    assert manager.active_connections == {}
+    assert delivered is False
+
+
+def test_reconnect_is_not_removed_by_old_socket():
+    async def scenario():
+        manager = ConnectionManager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(old, "cardio", 1)
+        await manager.connect(new, "cardio", 1)
+        manager.disconnect("cardio", 1, old)
+        assert await manager.send_personal({"msg": "history"}, "cardio", 1)
+        await settle()
+        return manager, new
+
+    manager, new = asyncio.run(scenario())
+    assert manager.active_connections["cardio"][1].websocket is new
+    assert new.sent == [{"msg": "history"}]
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from clinicApp.app.api.doctors.directory import DoctorDirectory, normalize
+
+
+def make_directory(*doctors) -> DoctorDirectory:
+    directory = DoctorDirectory()
+    entries = {
+        doctor_id: DoctorDirectory._entry(SimpleNamespace(
+            _id=doctor_id, last_name=last_name, first_name=first_name, second_name=None, department_name=department
+        ))
+        for doctor_id, last_name, first_name, department in doctors
+    }
+    directory._doctors = entries
+    directory._tokens = sorted(
+        (token, doctor_id) for doctor_id, entry in entries.items() for token in DoctorDirectory._tokens_of(entry)
+    )
+    return directory
+
+
+def ids(entries) -> list[int]:
+    return [entry["doctor_id"] for entry in entries]
+
+
+def test_normalize():
+    assert normalize("Ёлкин") == "елкин"
+    assert normalize(None) == ""
+
+
+def test_autocomplete_by_prefix_of_any_word():
+    directory = make_directory(
+        (1, "Иванов", "Пётр", "Кардиология"),
+        (2, "Иванова", "Анна", "Неврология"),
+        (3, "Петров", "Иван", "Кардиология"),
+    )
+    assert ids(directory.autocomplete("иван")) == [1, 2, 3]
+    assert ids(directory.autocomplete("кардио")) == [1, 3]
+    assert ids(directory.autocomplete("иван кардио")) == [1, 3]
+    assert ids(directory.autocomplete("иванова не")) == [2]
+    assert directory.autocomplete("хирург") == []
+    assert directory.autocomplete("   ") == []
+
+
+def test_autocomplete_orders_by_name_and_limits():
+    directory = make_directory(
+        (1, "Сидоров", "Олег", "Хирургия"),
+        (2, "Абрамов", "Олег", "Хирургия"),
+        (3, "Ёжиков", "Олег", "Хирургия"),
+    )
+    assert ids(directory.autocomplete("олег")) == [2, 3, 1]
+    assert ids(directory.autocomplete("олег", limit=2)) == [2, 3]
+    assert ids(directory.autocomplete("еж")) == [3]
+
+
+def test_remove_drops_tokens():
+    directory = make_directory((1, "Иванов", "Пётр", "Кардиология"), (2, "Петров", "Иван", None))
+    directory.remove(1)
+    directory.remove(1)
+    assert ids(directory.autocomplete("иван")) == [2]
+    assert directory.autocomplete("кардио") == []
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from clinicApp.app.api.talons.holds import InMemorySlotHoldStore, RedisSlotHoldStore
+
+SLOT_A = {"doctor_id": 1, "date": "2026-10-19", "time": "09:00"}
+SLOT_B = {"doctor_id": 1, "date": "2026-10-19", "time": "09:30"}
+
+
+def redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisSlotHoldStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    return InMemorySlotHoldStore() if request.param == "memory" else redis_store()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_slot_is_held_by_one_complaint(store):
+    async def scenario():
+        assert await store.hold(1, SLOT_A)
+        assert not await store.hold(2, SLOT_A)
+        # Повторная бронь тем же обращением продлевает её.
+        assert await store.hold(1, SLOT_A)
+        assert await store.hold(2, SLOT_B)
+
+    run(scenario())
+
+
+def test_confirm_takes_hold_once_and_frees_slot(store):
+    async def scenario():
+        await store.hold(1, SLOT_A)
+        assert await store.confirm(1) == SLOT_A
+        assert await store.confirm(1) is None
+        assert await store.hold(2, SLOT_A)
+
+    run(scenario())
+
+
+def test_release_frees_slot(store):
+    async def scenario():
+        await store.hold(1, SLOT_A)
+        assert await store.release(1) == SLOT_A
+        assert await store.release(1) is None
+        assert await store.hold(2, SLOT_A)
+
+    run(scenario())
+
+
+def test_moving_hold_frees_previous_slot(store):
+    async def scenario():
+        await store.hold(1, SLOT_A)
+        assert await store.hold(1, SLOT_B)
+        assert await store.hold(2, SLOT_A)
+        assert not await store.hold(3, SLOT_B)
+        assert await store.confirm(1) == SLOT_B
+
+    run(scenario())
+
+
+def test_confirm_unknown_complaint(store):
+    assert run(store.confirm(404)) is None
+
+
+def test_in_memory_hold_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store = InMemorySlotHoldStore()
+
+    async def scenario():
+        assert await store.hold(1, SLOT_A, ttl=60)
+        now[0] += 61
+        # Истёкшая бронь не занимает слот и не подтверждается.
+        assert await store.hold(2, SLOT_A, ttl=60)
+        assert await store.confirm(1) is None
+        assert await store.confirm(2) == SLOT_A
+
+    run(scenario())
+
+
+def test_in_memory_confirm_after_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store = InMemorySlotHoldStore()
+
+    async def scenario():
+        await store.hold(1, SLOT_A, ttl=60)
+        now[0] += 61
+        assert await store.confirm(1) is None
+        assert await store.hold(2, SLOT_A, ttl=60)
+
+    run(scenario())
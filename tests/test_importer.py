@@ -0,0 +1,135 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from sqlalchemy.exc import DataError
+
+from clinicApp.app.api.patients.importer import (
+    ImportReport, MAX_REPORTED_ERRORS, iter_lines, parse_csv, parse_ndjson, validate_patients,
+)
+from clinicApp.app.api.patients.dao import PatientsDAO
+from clinicApp.app.api.patients.schemas import PatientCreateSchema
+
+PATIENT = {
+    "b_date": "1990-05-01",
+    "users": {
+        "login": "anna@example.com", "password": "secret123", "first_name": "Anna", "last_name": "Ivanova",
+        "phone_number": "+375291234567", "gender": "female",
+    },
+    "addresses": {"country": "Belarus", "city": "Minsk", "street": "Lenina", "house_number": "1", "flat_number": 5},
+}
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def collect(rows) -> list:
+    return [row async for row in rows]
+
+
+def run(rows) -> list:
+    return asyncio.run(collect(rows))
+
+
+def test_iter_lines_splits_across_chunks():
+    lines = run(iter_lines(chunks("﻿пер".encode(), "вая\r\nвто".encode()[:-1], "вто".encode()[-1:], b"\nlast")))
+    assert lines == ["первая", "вто", "last"]
+
+
+def test_parse_csv():
+    header = "b_date,login,password,first_name,last_name,phone_number,gender,country,city,street,house_number,flat_number"
+    row = '1990-05-01,anna@example.com,secret123,Anna,Ivanova,+375291234567,female,Belarus,Minsk,"Lenina, 1",1,5'
+
+    async def lines():
+        for line in (header, "", row):
+            yield line
+
+    [(row_number, data)] = run(parse_csv(lines()))
+    assert row_number == 1
+    assert data["b_date"] == "1990-05-01"
+    assert data["users"]["role_id"] == 1
+    assert "second_name" not in data["users"]
+    assert data["addresses"]["street"] == "Lenina, 1"
+    assert PatientCreateSchema.model_validate(data).addresses.flat_number == 5
+
+
+def test_parse_ndjson_reports_bad_json():
+    async def lines():
+        for line in (json.dumps(PATIENT), "{broken", "", json.dumps([1])):
+            yield line
+
+    rows = run(parse_ndjson(lines()))
+    assert [row_number for row_number, _ in rows] == [1, 2, 3]
+    assert rows[0][1]["users"]["role_id"] == 1
+    assert rows[1][1].startswith("Некорректный JSON")
+    assert rows[2][1] == [1]
+
+
+def test_validate_patients():
+    valid = {**PATIENT, "users": {**PATIENT["users"], "role_id": 1}}
+    invalid = {**valid, "addresses": {**PATIENT["addresses"], "flat_number": 0}}
+    bad_name = {**valid, "users": {**valid["users"], "second_name": "Petrovna1"}}
+
+    async def rows():
+        yield 1, valid
+        yield 2, "Некорректный JSON"
+        yield 3, invalid
+        yield 4, bad_name
+
+    results = dict(run(validate_patients(rows())))
+    assert isinstance(results[1], PatientCreateSchema)
+    assert results[2] == "Некорректный JSON"
+    assert results[3] == "addresses.flat_number: Input should be greater than 0"
+    assert results[4] == "Name should contains only letters"
+
+
+def test_import_report_caps_errors():
+    report = ImportReport()
+    for row in range(MAX_REPORTED_ERRORS + 5):
+        report.fail(row, "error")
+    assert report.failed == MAX_REPORTED_ERRORS + 5
+    assert len(report.as_dict()["errors"]) == MAX_REPORTED_ERRORS
+
+
+class FakeImportSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def execute(self, statement):
+        # Ни один логин ещё не занят.
+        return SimpleNamespace(scalars=lambda: iter(()))
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_import_batch_reports_data_errors_per_row(monkeypatch):
+    valid = PatientCreateSchema.model_validate({**PATIENT, "users": {**PATIENT["users"], "role_id": 1}})
+    huge_flat = valid.model_copy(update={
+        "users": valid.users.model_copy(update={"login": "huge@example.com"}),
+        "addresses": valid.addresses.model_copy(update={"flat_number": 10 ** 12}),
+    })
+    inserted = []
+
+    async def insert_patients(session, patients):
+        if any(patient.addresses.flat_number > 2 ** 31 for patient in patients):
+            raise DataError("INSERT", {}, Exception("value out of range for type integer"))
+        inserted.extend(patients)
+
+    monkeypatch.setattr(PatientsDAO, "_insert_patients", staticmethod(insert_patients))
+    session, report = FakeImportSession(), ImportReport()
+
+    asyncio.run(PatientsDAO._import_batch(session, [(1, valid), (2, huge_flat)], report))
+
+    assert inserted == [valid]
+    assert report.as_dict() == {
+        "imported": 1, "failed": 1, "errors": [{"row": 2, "error": "value out of range for type integer"}]
+    }
+    assert session.commits == 1
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from clinicApp.app.core.kafka import consume_batches
+
+
+class StopConsuming(Exception):
+    pass
+
+
+class FakeConsumer:
+    """Отдаёт заранее заданные пачки, затем останавливает цикл consume_batches."""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.commits = 0
+        self.committed = {}
+        self.seeks = []
+
+    async def getmany(self, timeout_ms, max_records):
+        if not self.batches:
+            raise StopConsuming
+        return self.batches.pop(0)
+
+    async def commit(self, offsets):
+        self.commits += 1
+        self.committed.update(offsets)
+
+    def seek(self, tp, offset):
+        self.seeks.append((tp, offset))
+
+
+def message(offset: int, value: bytes, partition: int = 0):
+    return SimpleNamespace(topic="talons", partition=partition, offset=offset, value=value)
+
+
+def encode(payload: dict) -> bytes:
+    return json.dumps(payload).encode()
+
+
+def run(consumer, handle, **kwargs):
+    with pytest.raises(StopConsuming):
+        asyncio.run(consume_batches(
+            consumer, handle, key=lambda value: value["doctor_id"], deserialize=json.loads, retry_delay=0, **kwargs
+        ))
+
+
+def test_same_key_is_handled_in_order():
+    handled = []
+
+    async def handle(value):
+        # Уступаем управление, чтобы группы разных ключей перемешались.
+        await asyncio.sleep(0)
+        handled.append((value["doctor_id"], value["n"]))
+
+    consumer = FakeConsumer([{
+        "p0": [message(0, encode({"doctor_id": 1, "n": 1})), message(1, encode({"doctor_id": 2, "n": 1}))],
+        "p1": [message(0, encode({"doctor_id": 1, "n": 2}), 1), message(1, encode({"doctor_id": 2, "n": 2}), 1)],
+    }])
+    run(consumer, handle)
+
+    assert sorted(handled) == [(1, 1), (1, 2), (2, 1), (2, 2)]
+    assert [n for doctor_id, n in handled if doctor_id == 1] == [1, 2]
+    assert [n for doctor_id, n in handled if doctor_id == 2] == [1, 2]
+    assert consumer.commits == 1
+
+
+def test_malformed_messages_are_skipped_and_batch_committed():
+    handled, batches = [], []
+
+    async def handle(value):
+        handled.append(value["n"])
+
+    consumer = FakeConsumer([{"p0": [
+        message(0, b"not json"),
+        message(1, encode({"n": 1})),
+        message(2, encode({"doctor_id": 3, "n": 2})),
+    ]}])
+    run(consumer, handle, on_batch=batches.append)
+
+    assert handled == [2]
+    assert consumer.committed == {"p0": 3}
+    assert consumer.seeks == []
+    assert batches == [3]
+
+
+def test_handler_error_is_not_committed_and_read_again():
+    handled = []
+
+    async def handle(value):
+        if value["n"] == 2:
+            raise RuntimeError("db is down")
+        handled.append(value["n"])
+
+    consumer = FakeConsumer([{
+        "p0": [
+            message(0, encode({"doctor_id": 1, "n": 1})),
+            message(1, encode({"doctor_id": 1, "n": 2})),
+            message(2, encode({"doctor_id": 2, "n": 3})),
+            message(3, encode({"doctor_id": 1, "n": 4})),
+        ],
+        "p1": [message(0, encode({"doctor_id": 3, "n": 5}), 1)],
+    }])
+    run(consumer, handle)
+
+    # Сообщение 4 того же ключа не обрабатывается после ошибки, чтобы не нарушить порядок.
+    assert sorted(handled) == [1, 3, 5]
+    assert consumer.committed == {"p0": 1, "p1": 1}
+    assert consumer.seeks == [("p0", 1)]
+
+
+def test_empty_poll_is_not_committed():
+    async def handle(value):
+        pass
+
+    consumer = FakeConsumer([{}, {"p0": []}])
+    run(consumer, handle)
+    assert consumer.commits == 0
+
+
+def test_before_commit_runs_after_handlers():
+    events = []
+
+    async def handle(value):
+        events.append("handle")
+
+    async def before_commit():
+        events.append("before_commit")
+
+    consumer = FakeConsumer([{"p0": [message(0, encode({"doctor_id": 1, "n": 1}))]}])
+    run(consumer, handle, before_commit=before_commit)
+    assert events == ["handle", "before_commit"]
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import date
+
+from clinicApp.app.api.doctor_leaves.leave_index import LeaveIndex, merge_ranges
+
+
+def test_merge_overlapping_and_adjacent_ranges():
+    starts, ends = merge_ranges([
+        (date(2026, 11, 10), date(2026, 11, 12)),
+        (date(2026, 11, 1), date(2026, 11, 5)),
+        (date(2026, 11, 6), date(2026, 11, 7)),
+        (date(2026, 11, 3), date(2026, 11, 4)),
+    ])
+    assert starts == [date(2026, 11, 1), date(2026, 11, 10)]
+    assert ends == [date(2026, 11, 7), date(2026, 11, 12)]
+
+
+def test_merge_keeps_gaps():
+    starts, ends = merge_ranges([(date(2026, 11, 1), date(2026, 11, 1)), (date(2026, 11, 3), date(2026, 11, 3))])
+    assert starts == [date(2026, 11, 1), date(2026, 11, 3)]
+    assert ends == [date(2026, 11, 1), date(2026, 11, 3)]
+    assert merge_ranges([]) == ([], [])
+
+
+def test_is_on_leave_bounds_are_inclusive():
+    index = LeaveIndex()
+    index._ranges = {1: merge_ranges([(date(2026, 11, 1), date(2026, 11, 5)), (date(2026, 11, 10), date(2026, 11, 10))])}
+
+    assert not index.is_on_leave(1, date(2026, 10, 31))
+    assert index.is_on_leave(1, date(2026, 11, 1))
+    assert index.is_on_leave(1, date(2026, 11, 5))
+    assert not index.is_on_leave(1, date(2026, 11, 6))
+    assert index.is_on_leave(1, date(2026, 11, 10))
+    assert not index.is_on_leave(1, date(2026, 11, 11))
+    assert not index.is_on_leave(2, date(2026, 11, 1))
+
+
+def test_changes_from_other_workers_reload_index(monkeypatch):
+    index = LeaveIndex()
+    reloaded, loads = [], []
+
+    async def reload(doctor_id):
+        reloaded.append(doctor_id)
+
+    async def load():
+        loads.append(1)
+
+    monkeypatch.setattr(index, "_reload", reload)
+    monkeypatch.setattr(index, "load", load)
+
+    asyncio.run(index._on_change("7"))
+    asyncio.run(index._on_change(None))
+    assert reloaded == [7]
+    assert loads == [1]
@@ -0,0 +1,70 @@
+from datetime import date, time
+
+import pytest
+from fastapi import HTTPException
+
+from clinicApp.app.api.pagination import Page, encode_cursor, decode_cursor, keyset_after, labeled, unflatten
+from clinicApp.app.api.patients.dao import USER_FIELDS
+from clinicApp.app.api.patients.schemas import PatientListSchema
+from clinicApp.app.models.models import Talons, Users
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(date(2026, 10, 19), time(9, 30), 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, date.fromisoformat, time.fromisoformat, int) == [
+        date(2026, 10, 19), time(9, 30), 42
+    ]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(1, 2), encode_cursor("x", 2, 3)])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, date.fromisoformat, time.fromisoformat, int)
+    assert error.value.status_code == 400
+
+
+def test_keyset_after_direction():
+    columns = [Talons.date, Talons._id]
+    values = [date(2026, 10, 19), 42]
+    ascending = str(keyset_after(columns, values))
+    descending = str(keyset_after(columns, values, descending=True))
+    assert "talons.date >= " in ascending and ") > (" in ascending
+    assert "talons.date <= " in descending and ") < (" in descending
+
+
+class Row:
+    def __init__(self, **values):
+        self._mapping = values
+
+
+def test_labeled_columns():
+    assert [column.key for column in labeled("users", Users, ["first_name", "last_name"])] == [
+        "users__first_name", "users__last_name"
+    ]
+
+
+def test_unflatten_groups_prefixed_columns():
+    row = Row(_id=1, b_date=date(2000, 1, 1), users__first_name="Анна", users__last_name="Иванова",
+              addresses__city=None, addresses__street=None)
+    assert unflatten(row) == {
+        "_id": 1,
+        "b_date": date(2000, 1, 1),
+        "users": {"first_name": "Анна", "last_name": "Иванова"},
+        "addresses": None,
+    }
+
+
+def test_unflatten_keeps_partially_filled_group():
+    assert unflatten(Row(addresses__city="Минск", addresses__flat_number=None)) == {
+        "addresses": {"city": "Минск", "flat_number": None}
+    }
+
+
+def test_listing_projection_has_no_password():
+    users = {f"users__{field}": 1 if field == "role_id" else "x" for field in USER_FIELDS}
+    row = Row(_id=1, b_date=date(2000, 1, 1), addresses__city=None, **users)
+    page = Page[PatientListSchema](items=[unflatten(row)])
+    assert "password" not in USER_FIELDS
+    assert "password" not in page.model_dump()["items"][0]["users"]
+    assert page.items[0].addresses is None
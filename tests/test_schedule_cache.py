@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from clinicApp.app.api.schedule import dao as schedule_dao
+from clinicApp.app.api.schedule.cache import schedule_payloads
+from clinicApp.app.api.schedule.dao import ScheduleDAO
+from clinicApp.app.core import changes as changes_module
+from clinicApp.app.main import app
+
+
+def no_database(*args, **kwargs):
+    raise AssertionError("database must not be touched")
+
+
+def test_matching_etag_returns_304_without_database(monkeypatch):
+    builds = []
+
+    async def get_all_schedules():
+        builds.append(1)
+        return []
+
+    monkeypatch.setattr(ScheduleDAO, "get_all_schedules", get_all_schedules)
+    monkeypatch.setattr(schedule_dao, "async_session_maker", no_database)
+    monkeypatch.setattr(changes_module.changes, "publish", no_database)
+    asyncio.run(schedule_payloads._on_change(None))
+
+    client = TestClient(app)
+    first = client.get("/schedule/")
+    assert first.status_code == 200
+    assert first.json() == []
+
+    second = client.get("/schedule/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert builds == [1]
+
+
+def test_bump_from_other_worker_invalidates_payloads(monkeypatch):
+    builds = []
+
+    async def get_all_schedules():
+        builds.append(1)
+        return []
+
+    monkeypatch.setattr(ScheduleDAO, "get_all_schedules", get_all_schedules)
+    monkeypatch.setattr(schedule_dao, "async_session_maker", no_database)
+    asyncio.run(schedule_payloads._on_change(None))
+    client = TestClient(app)
+    etag = client.get("/schedule/").headers["ETag"]
+    client.get("/schedule/")
+    assert len(builds) == 1
+
+    asyncio.run(changes_module.changes.dispatch("schedule:other-worker:"))
+    # Тело не изменилось - ETag тот же, но ответ собран заново для новой версии.
+    assert client.get("/schedule/", headers={"If-None-Match": etag}).status_code == 304
+    assert len(builds) == 2
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from clinicApp.app.core.weekdays import (
+    days_mask, day_names, matching_days_mask, normalize_days, weekday_bit, weekdays_of,
+)
+
+
+def test_days_mask_is_case_insensitive():
+    assert days_mask(["monday", " Wednesday ", "SUNDAY"]) == 0b1000101
+    assert days_mask([]) == 0
+
+
+def test_days_mask_rejects_unknown_day():
+    with pytest.raises(ValueError):
+        days_mask(["Funday"])
+
+
+def test_mask_round_trip():
+    mask = days_mask(["Friday", "Monday"])
+    assert weekdays_of(mask) == [0, 4]
+    assert day_names(mask) == ["Monday", "Friday"]
+
+
+def test_weekday_bit_matches_date_weekday():
+    # 19.10.2026 - понедельник.
+    assert weekday_bit(date(2026, 10, 19)) == days_mask(["Monday"])
+    assert weekday_bit(date(2026, 10, 25)) == days_mask(["Sunday"])
+
+
+def test_normalize_days_orders_and_deduplicates():
+    assert normalize_days(["friday", "Monday", "FRIDAY"]) == ["Monday", "Friday"]
+
+
+@pytest.mark.parametrize("names", [[], ["Funday"], ["Monday", "Funday"]])
+def test_normalize_days_rejects_bad_input(names):
+    with pytest.raises(HTTPException) as error:
+        normalize_days(names)
+    assert error.value.status_code == 422
+
+
+def test_matching_days_mask():
+    assert matching_days_mask("day") == 0b1111111
+    assert matching_days_mask(" TU ") == days_mask(["Tuesday", "Saturday"])
+    assert matching_days_mask("xyz") == 0